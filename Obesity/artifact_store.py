@@ -0,0 +1,128 @@
+"""Directory artifact layout with memory-mapped forest arrays.
+
+``salvar``/``salvar_pickle`` write a single opaque blob, so every process
+that loads it deserialises a private copy of every tree. This layout stores
+the large numeric arrays of the flattened forest (see forest_engine) as
+uncompressed ``.npy`` files that are opened with ``mmap_mode='r'``; the OS
+page cache then shares them between all processes on the machine.
+
+Layout of an artifact directory::
+
+    manifesto.json           format/version, defaults, expected columns,
+                             compiled preprocessing tables, forest metadata
+    floresta/<array>.npy     FlatForest arrays (memory-mapped on load)
+    preprocessamento.joblib  fitted ColumnTransformer (small)
+    pipeline.joblib          full sklearn Pipeline, only read on demand
+    <anexo>.joblib           optional extra objects (e.g. the training reservoir)
+
+Only the manifest and the forest arrays are needed to predict with the NumPy
+engine; the joblib files are read lazily by ObesityPipeline.
+"""
+import json
+import os
+
+import numpy as np
+
+FORMATO = 'obesity-pipeline-mmap'
+VERSAO = 1
+MANIFESTO = 'manifesto.json'
+PASTA_FLORESTA = 'floresta'
+ARQUIVO_PIPELINE = 'pipeline.joblib'
+ARQUIVO_PREPROCESSAMENTO = 'preprocessamento.joblib'
+
+
+def eh_diretorio_artefato(caminho):
+    return os.path.isdir(caminho) and os.path.exists(os.path.join(caminho, MANIFESTO))
+
+
+def salvar_diretorio(caminho, floresta, pipeline=None, preprocessador=None, compilado=None,
+                     defaults=None, expected_columns=None, extras=None, anexos=None):
+    """Write ``floresta`` (a FlatForest) and metadata into directory ``caminho``.
+
+    ``extras`` are merged into the manifest (must be JSON serialisable);
+    ``anexos`` maps a name to an object saved as ``<name>.joblib``.
+    """
+    os.makedirs(os.path.join(caminho, PASTA_FLORESTA), exist_ok=True)
+    arrays = {}
+    for nome, arr in floresta.arrays().items():
+        if arr.dtype == object:
+            # object arrays would be pickled inside the .npy and never mmapped
+            arr = arr.astype(str)
+        np.save(os.path.join(caminho, PASTA_FLORESTA, f'{nome}.npy'), np.ascontiguousarray(arr))
+        arrays[nome] = {'dtype': str(arr.dtype), 'shape': list(arr.shape)}
+
+    anexos = dict(anexos or {})
+    if pipeline is not None or preprocessador is not None or anexos:
+        import joblib
+
+        if pipeline is not None:
+            joblib.dump(pipeline, os.path.join(caminho, ARQUIVO_PIPELINE))
+        if preprocessador is not None:
+            joblib.dump(preprocessador, os.path.join(caminho, ARQUIVO_PREPROCESSAMENTO))
+        for nome, objeto in anexos.items():
+            joblib.dump(objeto, os.path.join(caminho, f'{nome}.joblib'))
+
+    manifesto = {
+        'formato': FORMATO,
+        'versao': VERSAO,
+        'defaults': {k: _json_escalar(v) for k, v in (defaults or {}).items()},
+        'expected_columns': list(expected_columns or []),
+        'preprocessamento_compilado': compilado.to_dict() if compilado is not None else None,
+        'floresta': {'max_depth': floresta.max_depth, 'n_trees': floresta.n_trees, 'arrays': arrays},
+        'tem_pipeline': pipeline is not None,
+        'tem_preprocessamento': preprocessador is not None,
+        'anexos': sorted(anexos),
+    }
+    manifesto.update(extras or {})
+    # Write the manifest last so a half-written directory is never picked up
+    temporario = os.path.join(caminho, MANIFESTO + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, os.path.join(caminho, MANIFESTO))
+
+
+def ler_manifesto(caminho):
+    with open(os.path.join(caminho, MANIFESTO), encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get('formato') != FORMATO:
+        raise ValueError(f'{caminho} is not an {FORMATO} artifact')
+    if manifesto.get('versao', 0) > VERSAO:
+        raise ValueError(f'artifact version {manifesto["versao"]} is newer than supported ({VERSAO})')
+    return manifesto
+
+
+def carregar_floresta(caminho, manifesto=None, mmap=True):
+    """Open the forest arrays of an artifact directory (memory-mapped by default)."""
+    from forest_engine import FlatForest
+
+    manifesto = manifesto or ler_manifesto(caminho)
+    info = manifesto['floresta']
+    arrays = {
+        nome: np.load(os.path.join(caminho, PASTA_FLORESTA, f'{nome}.npy'), mmap_mode='r' if mmap else None)
+        for nome in info['arrays']
+    }
+    # classes are tiny; object dtype matches what sklearn's predict returns
+    arrays['classes'] = np.asarray(arrays['classes']).astype(object)
+    return FlatForest.from_arrays(arrays, max_depth=info['max_depth'])
+
+
+def carregar_joblib(caminho, arquivo):
+    import joblib
+
+    return joblib.load(os.path.join(caminho, arquivo))
+
+
+def tamanho_artefato(caminho):
+    """Bytes on disk of an artifact: a single file or every file under a directory."""
+    if os.path.isdir(caminho):
+        return sum(os.path.getsize(os.path.join(raiz, a)) for raiz, _, arquivos in os.walk(caminho) for a in arquivos)
+    return os.path.getsize(caminho)
+
+
+def _json_escalar(valor):
+    # numpy scalars (e.g. medians) are not JSON serialisable
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+__all__ = ["eh_diretorio_artefato", "salvar_diretorio", "ler_manifesto", "carregar_floresta", "carregar_joblib",
+           "tamanho_artefato"]
@@ -0,0 +1,85 @@
+"""Multi-process streaming CSV scoring.
+
+Used by ``python -m obesity_pipeline score input.csv output.csv --workers N``.
+The parent process only splits the input into blocks of raw lines; worker
+processes (each loading the ``salvar`` artifact once) parse their block with
+pandas and score it with ``prever_lote``. At most ``2 * workers`` blocks are
+in flight and results are written back in input order, so memory stays
+bounded regardless of file size.
+
+Records must not contain embedded newlines (true for Obesity.csv exports).
+"""
+import io
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Per-worker pipeline, loaded once by _inicializar_worker
+_PIPELINE = None
+
+
+def _inicializar_worker(artefato, motor):
+    global _PIPELINE
+    from obesity_pipeline import ObesityPipeline
+
+    _PIPELINE = ObesityPipeline([], {}, [], [], motor=motor)
+    _PIPELINE.carregar(artefato)
+
+
+def _pontuar_bloco(cabecalho, linhas):
+    df = pd.read_csv(io.BytesIO(cabecalho + linhas))
+    rotulos = _PIPELINE.prever_lote(df)
+    # Send compact codes back; categories are tiny
+    return rotulos.codes, list(rotulos.categories)
+
+
+def _blocos(arquivo, linhas_por_bloco):
+    while True:
+        bloco = list(itertools.islice(arquivo, linhas_por_bloco))
+        if not bloco:
+            return
+        if not bloco[-1].endswith(b'\n'):
+            bloco[-1] += b'\n'
+        yield b''.join(bloco)
+
+
+def pontuar_csv(entrada, saida, artefato='pipeline_obesidade.pkl', workers=None,
+                linhas_por_bloco=50_000, motor='sklearn', coluna_saida='previsao'):
+    """Score ``entrada`` into ``saida`` (one prediction per input row).
+
+    Returns a dict with the number of rows, elapsed seconds and rows/sec.
+    """
+    workers = workers or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    n_linhas = 0
+    with open(entrada, 'rb') as f_in, open(saida, 'w', encoding='utf-8', newline='') as f_out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker,
+                                initargs=(artefato, motor)) as pool:
+        cabecalho = f_in.readline()
+        f_out.write(coluna_saida + '\n')
+        pendentes = deque()
+
+        def _escrever_proximo():
+            codigos, categorias = pendentes.popleft().result()
+            if len(codigos):
+                f_out.write('\n'.join(np.asarray(categorias, dtype=object)[codigos]) + '\n')
+            return len(codigos)
+
+        for bloco in _blocos(f_in, linhas_por_bloco):
+            pendentes.append(pool.submit(_pontuar_bloco, cabecalho, bloco))
+            # Keep every worker busy while bounding buffered blocks
+            if len(pendentes) >= 2 * workers:
+                n_linhas += _escrever_proximo()
+        while pendentes:
+            n_linhas += _escrever_proximo()
+
+    duracao = time.perf_counter() - inicio
+    return {'linhas': n_linhas, 'segundos': duracao, 'linhas_por_segundo': n_linhas / duracao if duracao else 0.0}
+
+
+__all__ = ["pontuar_csv"]
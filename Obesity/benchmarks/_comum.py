@@ -0,0 +1,51 @@
+"""Shared helpers for the benchmark scripts in this folder.
+
+The scripts are meant to be run from the repository root, e.g.
+``python Obesity/benchmarks/bench_prever_lote.py``.
+"""
+import os
+import sys
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import pandas as pd  # noqa: E402
+from obesity_pipeline import ObesityPipeline  # noqa: E402
+from training_report import pico_rss_mib as pico_rss_mb  # noqa: E402
+
+CSV_PATH = os.path.join(BASE, 'Obesity.csv')
+
+# Same feature configuration used by obesity_pipeline.py / the Streamlit app
+COL_ORDINAIS = ['CAEC', 'CALC']
+ORDEM_ORDINAIS = {
+    'CAEC': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'CALC': ['no', 'Sometimes', 'Frequently', 'Always']
+}
+COL_NOMINAIS = ['FAVC', 'SCC', 'MTRANS', 'family_history']
+COL_NUMERICAS = ['Age', 'Height', 'Weight', 'FCVC', 'FAF', 'CH2O', 'TUE']
+
+
+def novo_pipeline():
+    return ObesityPipeline(COL_ORDINAIS, ORDEM_ORDINAIS, COL_NOMINAIS, COL_NUMERICAS)
+
+
+def carregar_csv():
+    return pd.read_csv(CSV_PATH)
+
+
+def treinar_padrao(df=None):
+    """Train the default pipeline quietly and return it."""
+    import contextlib
+    import io
+
+    pipeline = novo_pipeline()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.treinar(carregar_csv() if df is None else df)
+    return pipeline
+
+
+def replicar(df, n_linhas):
+    """Tile ``df`` until it has ``n_linhas`` rows (features only)."""
+    repeticoes = -(-n_linhas // len(df))
+    return pd.concat([df] * repeticoes, ignore_index=True).iloc[:n_linhas]
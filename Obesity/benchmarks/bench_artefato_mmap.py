@@ -0,0 +1,88 @@
+"""Per-process memory and load time: joblib file vs memory-mapped directory.
+
+Starts ``--processos`` workers per format that stay alive at the same time.
+Each one loads the artifact, scores Obesity.csv once (touching the whole
+forest) and reports its load time plus RSS/PSS from /proc (Linux). PSS
+splits shared pages between the processes that map them, so it shows what
+each worker really costs.
+
+The directory is loaded with both engines: ``carregar`` predicts from the
+mapped forest whatever ``motor`` was set before it, so 'mmap + sklearn'
+(batch_scoring's default) must cost the same as 'mmap + numpy'.
+
+    python Obesity/benchmarks/bench_artefato_mmap.py --processos 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _comum import carregar_csv, novo_pipeline, treinar_padrao
+
+
+def _memoria_kb():
+    campos = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) >= 2 and partes[1].isdigit():
+                campos[partes[0].rstrip(':')] = int(partes[1])
+    return campos
+
+
+def _worker(artefato, motor):
+    antes = _memoria_kb()
+    inicio = time.perf_counter()
+    pipeline = novo_pipeline()
+    pipeline.usar_motor(motor)
+    pipeline.carregar(artefato)
+    carga = time.perf_counter() - inicio
+    pipeline.prever(carregar_csv().drop(columns='Obesity'))
+    depois = _memoria_kb()
+    print(json.dumps({'motor': pipeline.motor, 'carga_s': carga,
+                      'rss_mb': depois['Rss'] / 1024,
+                      'pss_mb': depois['Pss'] / 1024,
+                      'pss_modelo_mb': (depois['Pss'] - antes['Pss']) / 1024}), flush=True)
+    sys.stdin.read()  # stay alive until the parent has heard from everyone
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processos', type=int, default=4)
+    parser.add_argument('--worker', nargs=2, metavar=('ARTEFATO', 'MOTOR'))
+    args = parser.parse_args()
+    if args.worker:
+        _worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = treinar_padrao()
+        arquivo = os.path.join(tmp, 'pipeline.pkl')
+        diretorio = os.path.join(tmp, 'pipeline_mmap')
+        pipeline.salvar(arquivo)
+        pipeline.salvar(diretorio, formato='mmap')
+
+        casos = (('joblib', arquivo, 'sklearn'), ('mmap + sklearn', diretorio, 'sklearn'),
+                 ('mmap + numpy', diretorio, 'numpy'))
+        for nome, artefato, motor in casos:
+            workers = [subprocess.Popen([sys.executable, __file__, '--worker', artefato, motor],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                       for _ in range(args.processos)]
+            resultados = [json.loads(w.stdout.readline()) for w in workers]
+            for w in workers:
+                w.stdin.close()
+                w.wait()
+            motor_usado = resultados[0].pop('motor')
+            for r in resultados[1:]:
+                r.pop('motor')
+            media = {k: sum(r[k] for r in resultados) / len(resultados) for k in resultados[0]}
+            print(f"{nome:14s} (motor {motor_usado:7s}) {args.processos} processos: carga {media['carga_s'] * 1000:7.1f} ms  "
+                  f"RSS {media['rss_mb']:6.1f} MB  PSS {media['pss_mb']:6.1f} MB  "
+                  f"PSS do modelo {media['pss_modelo_mb']:6.1f} MB por processo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Forest compression frontier (ObesityPipeline.comprimir).
+
+Trains the default forest, compresses it against the held-out split and
+prints every candidate on the accuracy/latency frontier: accuracy, loss
+against the original forest, agreement with it, single-row p50/p95 latency
+and batch cost per row of the forest step, size and node count. The chosen
+candidate is the fastest one within ``--max-perda``.
+
+    python Obesity/benchmarks/bench_compressao.py --max-perda 0.01 --todos
+"""
+import argparse
+
+from _comum import carregar_csv, novo_pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-perda', type=float, default=0.01, help='accuracy loss tolerated (default 0.01)')
+    parser.add_argument('--max-latencia-ms', type=float, default=None)
+    parser.add_argument('--max-bytes', type=int, default=None)
+    parser.add_argument('--todos', action='store_true', help='print every candidate, not only the frontier')
+    args = parser.parse_args()
+
+    pipeline = novo_pipeline()
+    X_test, y_test = pipeline.treinar(carregar_csv(), verbose=False)
+    resultado = pipeline.comprimir(X_test.assign(**{pipeline.target: y_test}), max_perda=args.max_perda,
+                                   max_latencia_ms=args.max_latencia_ms, max_bytes=args.max_bytes)
+
+    linhas = resultado['candidatos'] if args.todos else resultado['fronteira']
+    print(f"{'tipo':<12} {'parametros':<28} {'acuracia':>9} {'perda':>7} {'concord':>8} {'p50 ms':>7} "
+          f"{'p95 ms':>7} {'lote us/l':>10} {'KiB':>8} {'nos':>8}")
+    for c in [resultado['professor']] + sorted(linhas, key=lambda c: c['latencia_ms']):
+        marca = ' *' if c is resultado['escolhido'] else ''
+        parametros = ' '.join(f'{k}={v}' for k, v in c['parametros'].items())
+        print(f"{c['tipo']:<12} {parametros:<28} {c['acuracia']:9.4f} {c.get('perda', 0.0):7.4f} "
+              f"{c['concordancia']:8.4f} {c['latencia_ms']:7.3f} {c['latencia_p95_ms']:7.3f} "
+              f"{c['lote_us_por_linha']:10.2f} {c['bytes'] / 1024:8.1f} {c['nos']:8d}{marca}")
+    print(f"{len(resultado['candidatos'])} candidatos em {resultado['segundos']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
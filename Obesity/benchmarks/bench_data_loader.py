@@ -0,0 +1,61 @@
+"""Cold parse vs warm snapshot load of data_loader.load_data.
+
+For the original CSV and, with ``--linhas``, copies of it tiled to larger
+sizes: ``load_data(usar_snapshot=False)`` (parse and process the CSV), the
+first snapshot call (parse, process and write the snapshot) and the warm
+call that only reads the snapshot. Also checks that the warm frames equal
+the parsed ones.
+
+    python Obesity/benchmarks/bench_data_loader.py --linhas 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+from _comum import CSV_PATH, carregar_csv, replicar
+
+import data_loader
+from feature_cache import FeatureCache
+
+
+def _cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='*', default=[], help='also time tiled copies of the CSV')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'csv ms':>9} {'1a carga ms':>12} {'snapshot ms':>12} {'ganho':>7}")
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = [CSV_PATH]
+        for linhas in args.linhas:
+            caminho = os.path.join(pasta, f'obesity_{linhas}.csv')
+            replicar(carregar_csv(), linhas).to_csv(caminho, index=False)
+            caminhos.append(caminho)
+        for caminho in caminhos:
+            cache = FeatureCache(os.path.join(pasta, 'snapshot'))
+            frio, esperado = _cronometrar(lambda: data_loader.load_data(caminho, usar_snapshot=False),
+                                          args.repeticoes)
+            inicio = time.perf_counter()
+            data_loader.load_data(caminho, cache=cache)
+            primeira = time.perf_counter() - inicio
+            quente, obtido = _cronometrar(lambda: data_loader.load_data(caminho, cache=cache), args.repeticoes)
+            pd.testing.assert_frame_equal(esperado[0], obtido[0])
+            pd.testing.assert_frame_equal(esperado[1], obtido[1])
+            print(f"{len(esperado[0]):>10} {frio * 1e3:9.1f} {primeira * 1e3:12.1f} {quente * 1e3:12.1f} "
+                  f"{frio / quente:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
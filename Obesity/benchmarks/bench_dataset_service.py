@@ -0,0 +1,55 @@
+"""Per-rerun data loading cost of the Streamlit pages with and without dataset_service.
+
+Simulates ``--reruns`` page executions spread over ``--sessoes`` threads
+(Streamlit runs each session in its own thread). Each execution loads what
+pages 2-5 need: Obesity.csv, load_data() and the model_matrix df_numerico.
+It compares loading them directly (each from its own on-disk snapshot) with
+asking the shared service, then prints the service's hit/miss metrics.
+
+    python Obesity/benchmarks/bench_dataset_service.py --reruns 200 --sessoes 20
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from _comum import CSV_PATH
+
+import data_loader
+import model_matrix
+from dataset_service import servico
+
+
+def _direto(_):
+    pd.read_csv(CSV_PATH)
+    data_loader.load_data(CSV_PATH)
+    model_matrix.matriz_numerica(CSV_PATH)
+
+
+def _servico(_):
+    for nome in ('obesity_csv', 'load_data', 'df_numerico'):
+        servico.obter(nome)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=200)
+    parser.add_argument('--sessoes', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'modo':<10} {'total s':>8} {'ms/rerun':>9} {'cpu s':>7}")
+    for modo, funcao in (('direto', _direto), ('servico', _servico)):
+        parede, cpu = time.perf_counter(), time.process_time()
+        with ThreadPoolExecutor(max_workers=args.sessoes) as pool:
+            list(pool.map(funcao, range(args.reruns)))
+        parede, cpu = time.perf_counter() - parede, time.process_time() - cpu
+        print(f"{modo:<10} {parede:8.2f} {parede / args.reruns * 1e3:9.2f} {cpu:7.2f}")
+    for nome, m in servico.metricas().items():
+        if not m['falhas']:
+            continue
+        print(f"{nome:<12} acertos {m['acertos']:>5}  falhas {m['falhas']}  "
+              f"construcao {m['segundos_construcao'] * 1e3:.1f} ms  {m['bytes'] / 1024 ** 2:.2f} MiB")
+
+
+if __name__ == '__main__':
+    main()
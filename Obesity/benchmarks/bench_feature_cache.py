@@ -0,0 +1,51 @@
+"""Training time with and without the encoded-feature cache.
+
+Replicates Obesity.csv to ``--linhas`` rows in a temporary CSV and compares
+``treinar(pd.read_csv(...))`` with ``treinar_csv`` on a cold and a warm
+FeatureCache. The warm run skips CSV parsing and encoding; the forest fit is
+the same in all three.
+
+    python Obesity/benchmarks/bench_feature_cache.py --linhas 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from _comum import carregar_csv, novo_pipeline, replicar
+
+from feature_cache import FeatureCache
+
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=200_000)
+    parser.add_argument('--arvores', type=int, default=20, help='n_estimators (keeps the fit short)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'obesity.csv')
+        replicar(carregar_csv(), args.linhas).to_csv(caminho, index=False)
+        cache = FeatureCache(os.path.join(pasta, 'cache'))
+
+        def pipeline():
+            return novo_pipeline().nova_configuracao(parametros_floresta={'n_estimators': args.arvores})
+
+        segundos = _cronometrar(lambda: pipeline().treinar(pd.read_csv(caminho), verbose=False))
+        print(f"treinar(read_csv)          {segundos:7.2f} s")
+        for rotulo in ('treinar_csv cache frio', 'treinar_csv cache quente'):
+            segundos = _cronometrar(lambda: pipeline().treinar_csv(caminho, verbose=False, cache=cache))
+            print(f"{rotulo:<26} {segundos:7.2f} s")
+        print(f"tamanho do cache           {cache.tamanho() / 1024 ** 2:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Peak memory of in-memory vs out-of-core training as the CSV grows.
+
+Writes ``Obesity.csv`` tiled to each ``--linhas`` size into a temporary
+folder and trains on it in a fresh process per run, so the reported peak
+resident set (ru_maxrss) belongs to that run alone:
+
+- ``treinar``: ``treinar(pd.read_csv(...))``, the whole file in memory
+- ``fora``: ``treinar_fora_de_memoria`` (out_of_core_training)
+
+    python Obesity/benchmarks/bench_fora_de_memoria.py --linhas 100000 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _comum import carregar_csv, novo_pipeline, pico_rss_mb, replicar
+
+
+def _filho(modo, caminho, linhas_por_arvore):
+    import pandas as pd
+
+    pipeline = novo_pipeline()
+    inicio = time.perf_counter()
+    if modo == 'treinar':
+        X_test, y_test = pipeline.treinar(pd.read_csv(caminho), verbose=False, medir_memoria=False)
+    else:
+        X_test, y_test = pipeline.treinar_fora_de_memoria(caminho, linhas_por_arvore=linhas_por_arvore,
+                                                          verbose=False, medir_memoria=False)
+    segundos = time.perf_counter() - inicio
+    acuracia = float((pipeline.prever(X_test) == y_test.to_numpy()).mean())
+    print(json.dumps({'segundos': segundos, 'pico_mib': pico_rss_mb(), 'acuracia': acuracia}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--linhas-por-arvore', type=int, default=10_000)
+    parser.add_argument('--filho', nargs=2, metavar=('MODO', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.filho:
+        _filho(*args.filho, args.linhas_por_arvore)
+        return
+
+    df = carregar_csv()
+    print(f"{'linhas':>10} {'MiB csv':>8} {'modo':<8} {'s':>8} {'pico MiB':>9} {'acuracia':>9}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for linhas in args.linhas:
+            caminho = os.path.join(pasta, f'obesity_{linhas}.csv')
+            replicar(df, linhas).to_csv(caminho, index=False)
+            tamanho = os.path.getsize(caminho) / 1024 ** 2
+            for modo in ('treinar', 'fora'):
+                saida = subprocess.run([sys.executable, '-W', 'ignore', __file__, '--filho', modo, caminho,
+                                        '--linhas-por-arvore', str(args.linhas_por_arvore)],
+                                       check=True, capture_output=True, text=True).stdout
+                r = json.loads(saida.strip().splitlines()[-1])
+                print(f"{linhas:>10} {tamanho:8.1f} {modo:<8} {r['segundos']:8.2f} {r['pico_mib']:9.1f} "
+                      f"{r['acuracia']:9.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Compare the sklearn and flattened NumPy forest engines.
+
+Checks that both engines agree on every row of Obesity.csv and reports the
+single-row latency of the forest alone and of a full ``prever`` call.
+
+    python Obesity/benchmarks/bench_forest_engine.py
+"""
+import time
+
+import numpy as np
+
+from _comum import carregar_csv, treinar_padrao
+
+
+def _latencia_us(funcao, repeticoes):
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main(repeticoes=2000):
+    pipeline = treinar_padrao()
+    df = carregar_csv().drop(columns='Obesity')
+    floresta = pipeline.pipeline.named_steps['classificador']
+    X = pipeline.pipeline.named_steps['preprocessamento'].transform(df)
+
+    pipeline.usar_motor('numpy')
+    plana = pipeline.floresta_plana
+    assert np.array_equal(plana.predict_proba(X), floresta.predict_proba(X))
+    assert np.array_equal(plana.predict(X), floresta.predict(X))
+    print(f'{plana.n_trees} arvores, {len(plana.value)} nos, profundidade {plana.max_depth}, '
+          f'{plana.nbytes / 1e6:.1f} MB; resultados identicos ao sklearn')
+
+    linha = X[:1]
+    registro = df.iloc[0].to_dict()
+    print(f"floresta sklearn  1 linha: {_latencia_us(lambda: floresta.predict(linha), repeticoes // 10):9.1f} us")
+    print(f"floresta numpy    1 linha: {_latencia_us(lambda: plana.predict(linha), repeticoes):9.1f} us")
+    pipeline.usar_motor('sklearn')
+    print(f"prever (sklearn)  1 linha: {_latencia_us(lambda: pipeline.prever(registro), repeticoes // 10):9.1f} us")
+    pipeline.usar_motor('numpy')
+    print(f"prever (numpy)    1 linha: {_latencia_us(lambda: pipeline.prever(registro), repeticoes // 10):9.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Cold import cost of the inference runtimes (``python -X importtime``).
+
+Compares:
+- obesity_inference: slim runtime (NumPy only)
+- obesity_pipeline: full wrapper with lazy training imports
+- eager training stack: obesity_pipeline plus every sklearn/joblib/pickle
+  import the module used to do at import time
+
+For each target the cumulative ``-X importtime`` of the module and the
+best-of-N wall time of a fresh interpreter are reported.
+
+    python Obesity/benchmarks/bench_importtime.py --repeticoes 5
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+from _comum import BASE
+
+ALVOS = {
+    'obesity_inference': 'import obesity_inference',
+    'obesity_pipeline': 'import obesity_pipeline',
+    'obesity_pipeline + treino (antigo)': (
+        'import obesity_pipeline, pickle, joblib\n'
+        'from sklearn.pipeline import Pipeline\n'
+        'from sklearn.compose import ColumnTransformer\n'
+        'from sklearn.preprocessing import OrdinalEncoder, OneHotEncoder, MinMaxScaler\n'
+        'from sklearn.ensemble import RandomForestClassifier\n'
+        'from sklearn.model_selection import train_test_split\n'
+        'from sklearn.metrics import classification_report, accuracy_score'
+    ),
+}
+
+
+def _importtime_us(codigo):
+    """Sum of the cumulative times of the top-level imports in ``codigo``."""
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=BASE,
+                           capture_output=True, text=True, check=True).stderr
+    total = 0
+    modulos = 0
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or '|' not in linha:
+            continue
+        partes = linha[len('import time:'):].split('|')
+        if not partes[0].strip().isdigit():
+            continue  # header line
+        modulos += 1
+        # top-level imports are not indented in the name column
+        if not partes[2].startswith('  '):
+            total += int(partes[1])
+    return total, modulos
+
+
+def _parede_ms(codigo, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', codigo], cwd=BASE, check=True)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+    base_ms = _parede_ms('pass', args.repeticoes)
+    print(f'interpretador vazio: {base_ms:7.1f} ms')
+    for nome, codigo in ALVOS.items():
+        cumulativo_us, modulos = _importtime_us(codigo)
+        print(f'{nome:36s} importtime {cumulativo_us / 1000:7.1f} ms  '
+              f'{modulos:4d} modulos  parede {_parede_ms(codigo, args.repeticoes):7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
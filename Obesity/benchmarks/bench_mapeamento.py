@@ -0,0 +1,106 @@
+"""Label translation of load_data: chained per-column maps vs label_mapping.traduzir.
+
+Tiles ``Obesity.csv`` in memory to ``--linhas`` rows (10M by default), then
+times ``processar_encadeado`` (the previous
+data_loader.processar: ``.map``/``fillna``/``Categorical`` per column and a
+final ``apply`` over df_num) against ``data_loader.processar``, which
+applies ``ESPEC_ROTULOS`` in one pass per column. Before timing, both are
+run on a copy of the CSV with unmapped values and missing cells to check
+that they return equal frames. Either implementation peaks at about 6 GiB
+RSS for 10M rows (input plus both output frames); on smaller machines lower
+``--linhas`` and time each one in its own run with ``--implementacoes``.
+
+    python Obesity/benchmarks/bench_mapeamento.py --linhas 10000000
+"""
+import argparse
+import gc
+import time
+
+import numpy as np
+import pandas as pd
+from _comum import carregar_csv, pico_rss_mb, replicar
+
+import data_loader
+from data_loader import (COLUNAS_PT, MAPA_FREQUENCIA, MAPA_GENERO, MAPA_OBESIDADE, MAPA_SIM_NAO,
+                         ORDEM_ENTRE_REFEICOES, ORDEM_NIVEIS)
+
+COLUNAS_BINARIAS = ['Histórico Familiar', 'Consumo de Alimentos com Alta Caloria', 'Fuma',
+                    'Monitora Calorias Diárias Consumidas']
+
+
+def processar_encadeado(df):
+    """data_loader.processar before label_mapping."""
+    df = df.rename(columns=COLUNAS_PT)
+    df['Nivel de Obesidade'] = df['Nivel de Obesidade'].map(MAPA_OBESIDADE)
+    df['Nivel de Obesidade'] = pd.Categorical(df['Nivel de Obesidade'], categories=ORDEM_NIVEIS, ordered=True)
+    for coluna in ['Comer Entre Refeições', 'Consumo de Alcool']:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].map(MAPA_FREQUENCIA).fillna(df[coluna])
+    df['Comer Entre Refeições'] = pd.Categorical(df['Comer Entre Refeições'],
+                                                 categories=ORDEM_ENTRE_REFEICOES, ordered=True)
+    df['Gênero'] = df['Gênero'].map(MAPA_GENERO)
+    for c in COLUNAS_BINARIAS:
+        df[c] = df[c].map(MAPA_SIM_NAO)
+
+    df_num = df.copy()
+    for c in COLUNAS_BINARIAS:
+        df_num[c] = df_num[c].map({'Sim': 1, 'Não': 0})
+    df_num['Comer Entre Refeições'] = df['Comer Entre Refeições'].map(dict(zip(ORDEM_ENTRE_REFEICOES, range(4))))
+    df_num['Nivel de Obesidade'] = df['Nivel de Obesidade'].map(dict(zip(ORDEM_NIVEIS, range(7))))
+    df_num = df_num.apply(
+        lambda col: col.astype('category').cat.codes
+        if col.dtype == 'category' or not pd.api.types.is_numeric_dtype(col)
+        else col
+    )
+    df_num = df_num.apply(pd.to_numeric, errors='coerce')
+    return df, df_num
+
+
+def _com_ruido(df, semente=0):
+    # unmapped labels and missing cells in every translated column
+    rng = np.random.default_rng(semente)
+    df = df.copy()
+    for coluna in ['Gender', 'family_history', 'FAVC', 'SMOKE', 'SCC', 'CAEC', 'CALC', 'MTRANS', 'Obesity']:
+        linhas = rng.choice(len(df), size=40, replace=False)
+        df.loc[linhas[:20], coluna] = 'Outro'
+        df.loc[linhas[20:], coluna] = np.nan
+    return df
+
+
+def _cronometrar(funcao, df):
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = funcao(df)
+    return time.perf_counter() - inicio, resultado
+
+
+IMPLEMENTACOES = {'encadeada': processar_encadeado, 'traduzir': data_loader.processar}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=10_000_000)
+    parser.add_argument('--implementacoes', nargs='+', choices=sorted(IMPLEMENTACOES),
+                        default=['encadeada', 'traduzir'])
+    args = parser.parse_args()
+
+    for bruto in (carregar_csv(), _com_ruido(carregar_csv())):
+        esperado, obtido = processar_encadeado(bruto), data_loader.processar(bruto)
+        pd.testing.assert_frame_equal(esperado[0], obtido[0])
+        pd.testing.assert_frame_equal(esperado[1], obtido[1])
+    print('saidas identicas (CSV original e com valores desconhecidos/ausentes)')
+
+    bruto = replicar(carregar_csv(), args.linhas)
+    print(f"{'implementacao':<14} {'linhas':>10} {'s':>7} {'Mlinhas/s':>10}")
+    tempos = {}
+    for nome in args.implementacoes:
+        tempos[nome], resultado = _cronometrar(IMPLEMENTACOES[nome], bruto)
+        del resultado
+        print(f"{nome:<14} {len(bruto):>10} {tempos[nome]:7.2f} {len(bruto) / tempos[nome] / 1e6:10.2f}")
+    if len(tempos) == 2:
+        print(f"ganho {tempos['encadeada'] / tempos['traduzir']:.1f}x")
+    print(f"pico RSS {pico_rss_mb():.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
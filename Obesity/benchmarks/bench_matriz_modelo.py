@@ -0,0 +1,67 @@
+"""Exported df_numerico.csv vs the model_matrix materialization of Obesity.csv.
+
+First checks that ``matriz_numerica`` / ``matriz_modelo`` equal the
+committed ``df_numerico.csv`` / ``df_modelo.csv``. Then, for the original
+CSV and (with ``--linhas``) tiled copies of it, times parsing an exported
+numeric CSV against deriving the matrix (first call, which encodes and
+writes the cache) and re-reading it memory-mapped (warm call).
+
+    python Obesity/benchmarks/bench_matriz_modelo.py --linhas 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+from _comum import BASE, CSV_PATH, carregar_csv, replicar
+
+import model_matrix
+from feature_cache import FeatureCache
+
+
+def _cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='*', default=[], help='also time tiled copies of the CSV')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        cache = FeatureCache(os.path.join(pasta, 'matrizes'))
+        pd.testing.assert_frame_equal(model_matrix.matriz_numerica(CSV_PATH, cache),
+                                      pd.read_csv(os.path.join(BASE, 'df_numerico.csv')))
+        pd.testing.assert_frame_equal(model_matrix.matriz_modelo(CSV_PATH, cache),
+                                      pd.read_csv(os.path.join(BASE, 'df_modelo.csv')))
+        print('matriz_numerica == df_numerico.csv, matriz_modelo == df_modelo.csv\n')
+
+        print(f"{'linhas':>10} {'csv exportado ms':>17} {'1a carga ms':>12} {'mmap ms':>9}")
+        fontes = [(CSV_PATH, os.path.join(BASE, 'df_numerico.csv'))]
+        for linhas in args.linhas:
+            fonte = os.path.join(pasta, f'obesity_{linhas}.csv')
+            replicar(carregar_csv(), linhas).to_csv(fonte, index=False)
+            exportado = os.path.join(pasta, f'numerico_{linhas}.csv')
+            model_matrix.codificar(pd.read_csv(fonte)).to_csv(exportado, index=False)
+            fontes.append((fonte, exportado))
+        for fonte, exportado in fontes:
+            cache = FeatureCache(os.path.join(pasta, f'matrizes_{os.path.basename(fonte)}'))
+            csv, esperado = _cronometrar(lambda: pd.read_csv(exportado), args.repeticoes)
+            inicio = time.perf_counter()
+            model_matrix.matriz_numerica(fonte, cache)
+            primeira = time.perf_counter() - inicio
+            quente, obtido = _cronometrar(lambda: model_matrix.matriz_numerica(fonte, cache), args.repeticoes)
+            pd.testing.assert_frame_equal(esperado, obtido, check_exact=False)
+            print(f"{len(obtido):>10} {csv * 1e3:17.1f} {primeira * 1e3:12.1f} {quente * 1e3:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
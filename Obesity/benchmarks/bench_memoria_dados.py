@@ -0,0 +1,49 @@
+"""Per-column memory of the default vs compact load_data frames.
+
+Tiles ``Obesity.csv`` to ``--linhas`` rows, loads it with
+``load_data(compacto=False)`` and ``load_data(compacto=True)`` (warm
+snapshots) and prints data_loader.relatorio_memoria for ``df`` and
+``df_num``, plus the load time of each layout.
+
+    python Obesity/benchmarks/bench_memoria_dados.py --linhas 2000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from _comum import carregar_csv, replicar
+
+import data_loader
+from feature_cache import FeatureCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'obesity.csv')
+        replicar(carregar_csv(), args.linhas).to_csv(caminho, index=False)
+        cache = FeatureCache(os.path.join(pasta, 'snapshot'))
+        quadros, tempos = {}, {}
+        for compacto in (False, True):
+            data_loader.load_data(caminho, cache=cache, compacto=compacto)
+            inicio = time.perf_counter()
+            quadros[compacto] = data_loader.load_data(caminho, cache=cache, compacto=compacto)[:2]
+            tempos[compacto] = time.perf_counter() - inicio
+
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        for i, nome in enumerate(('df', 'df_num')):
+            relatorio = data_loader.relatorio_memoria(quadros[False][i], quadros[True][i])
+            relatorio[['bytes_antes', 'bytes_depois']] /= 1024 ** 2
+            print(f'\n{nome} ({args.linhas} linhas, MiB)')
+            print(relatorio.rename(columns={'bytes_antes': 'MiB_antes', 'bytes_depois': 'MiB_depois'})
+                  .round({'MiB_antes': 2, 'MiB_depois': 2, 'reducao': 3}))
+    print(f"\ncarga do snapshot: padrao {tempos[False]:.2f}s, compacto {tempos[True]:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Random forest vs histogram gradient boosting (``modelo='hgb'``).
+
+For each model family: fit time on the default split, test accuracy,
+single-record p50/p95 latency and batch cost per row of ``prever``
+(model_registry.medir_latencia_predicao), joblib artifact size and the
+encoded feature width. ``--folds`` adds k-fold accuracy (validar_cruzado).
+
+    python Obesity/benchmarks/bench_modelos.py --folds 5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from _comum import carregar_csv, novo_pipeline
+
+from model_registry import medir_latencia_predicao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--folds', type=int, default=0, help='also report k-fold accuracy (0 = off)')
+    args = parser.parse_args()
+
+    df = carregar_csv()
+    print(f"{'modelo':<10} {'ajuste s':>9} {'acuracia':>9} {'kfold':>7} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'lote us/l':>10} {'MiB':>6} {'colunas':>8}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for modelo in ('floresta', 'hgb'):
+            pipeline = novo_pipeline().nova_configuracao(modelo=modelo)
+            inicio = time.perf_counter()
+            X_test, y_test = pipeline.treinar(df, verbose=False)
+            ajuste = time.perf_counter() - inicio
+            acuracia = float((pipeline.prever(X_test) == y_test.to_numpy()).mean())
+            kfold = pipeline.validar_cruzado(df, n_folds=args.folds)['acuracia_media'] if args.folds else float('nan')
+            latencia = medir_latencia_predicao(pipeline)
+            caminho = os.path.join(pasta, f'{modelo}.pkl')
+            pipeline.salvar(caminho)
+            largura = pipeline.preprocessamento_compilado.n_saida
+            print(f"{modelo:<10} {ajuste:9.2f} {acuracia:9.4f} {kfold:7.4f} {latencia['registro_p50_ms']:7.2f} "
+                  f"{latencia['registro_p95_ms']:7.2f} {latencia['lote_us_por_linha']:10.1f} "
+                  f"{os.path.getsize(caminho) / 1024 ** 2:6.2f} {largura:8d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Wall time of k-fold evaluation: sequential vs parallel, cold vs cached folds.
+
+Runs ``ObesityPipeline.validar_cruzado`` on Obesity.csv with ``n_jobs=1``
+and ``--workers`` processes, first with an empty fold cache and then with the
+folds already encoded, and compares it with one ``treinar`` call (a single
+train/test split). Accuracy is identical across modes; only time changes.
+
+    python Obesity/benchmarks/bench_validacao_cruzada.py --folds 5 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from _comum import carregar_csv, novo_pipeline
+
+import cross_validation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    df = carregar_csv()
+    pipeline = novo_pipeline()
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline.treinar(df)
+    print(f"treinar (1 split)                 {time.perf_counter() - inicio:7.2f} s")
+
+    for n_jobs in dict.fromkeys((1, args.workers)):
+        for rotulo in ('folds frios', 'folds em cache'):
+            if rotulo == 'folds frios':
+                cross_validation.limpar_cache()
+            r = pipeline.validar_cruzado(df, n_folds=args.folds, n_jobs=n_jobs)
+            s = r['segundos']
+            print(f"{args.folds}-fold n_jobs={n_jobs:<2} {rotulo:<15} {s['total']:7.2f} s "
+                  f"(codificacao {s['codificacao']:.2f} s)  "
+                  f"acuracia {r['acuracia_media']:.4f} +- {r['acuracia_desvio']:.4f}")
+
+
+if __name__ == '__main__':
+    main()
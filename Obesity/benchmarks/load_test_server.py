@@ -0,0 +1,110 @@
+"""Local load test for scoring_server.py.
+
+Trains the default pipeline into a temporary artifact, starts the server in
+a subprocess for each configuration and fires single-record requests from
+many concurrent keep-alive connections. Reports requests/sec and the
+p50/p95/p99 latency.
+
+    python Obesity/benchmarks/load_test_server.py --conexoes 64 --requisicoes 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from _comum import BASE, carregar_csv, treinar_padrao
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def _cliente(porta, corpos, latencias):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    try:
+        for corpo in corpos:
+            pedido = (f'POST /prever HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                      f'Content-Length: {len(corpo)}\r\n\r\n').encode() + corpo
+            inicio = time.perf_counter()
+            escritor.write(pedido)
+            await escritor.drain()
+            tamanho = 0
+            while True:
+                linha = await leitor.readline()
+                if linha in (b'\r\n', b''):
+                    break
+                if linha.lower().startswith(b'content-length:'):
+                    tamanho = int(linha.split(b':')[1])
+            await leitor.readexactly(tamanho)
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        escritor.close()
+
+
+async def _disparar(porta, registros, conexoes, requisicoes):
+    corpos = [json.dumps(r).encode() for r in registros]
+    latencias = []
+    tarefas = []
+    for c in range(conexoes):
+        meus = [corpos[(c * requisicoes + i) % len(corpos)] for i in range(requisicoes)]
+        tarefas.append(_cliente(porta, meus, latencias))
+    inicio = time.perf_counter()
+    await asyncio.gather(*tarefas)
+    return time.perf_counter() - inicio, np.array(latencias)
+
+
+def _aguardar_porta(porta, processo, timeout=60):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError('server exited before accepting connections')
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError('server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--conexoes', type=int, default=64)
+    parser.add_argument('--requisicoes', type=int, default=200, help='requests per connection')
+    parser.add_argument('--max-espera-ms', type=float, default=2.0)
+    parser.add_argument('--motor', default='numpy')
+    args = parser.parse_args()
+
+    registros = carregar_csv().drop(columns='Obesity').to_dict('records')
+    configuracoes = [('sem micro-lotes', 1), ('micro-lotes', 256)]
+    with tempfile.TemporaryDirectory() as tmp:
+        artefato = os.path.join(tmp, 'pipeline.pkl')
+        treinar_padrao().salvar(artefato)
+        for nome, max_lote in configuracoes:
+            porta = _porta_livre()
+            processo = subprocess.Popen(
+                [sys.executable, os.path.join(BASE, 'scoring_server.py'), '--artefato', artefato,
+                 '--porta', str(porta), '--max-lote', str(max_lote),
+                 '--max-espera-ms', str(args.max_espera_ms), '--motor', args.motor],
+                stdout=subprocess.DEVNULL)
+            try:
+                _aguardar_porta(porta, processo)
+                duracao, lat = asyncio.run(_disparar(porta, registros, args.conexoes, args.requisicoes))
+            finally:
+                processo.terminate()
+                processo.wait()
+            p50, p95, p99 = np.percentile(lat * 1000, [50, 95, 99])
+            print(f'{nome:16s} max_lote={max_lote:4d}  {len(lat) / duracao:8.0f} req/s  '
+                  f'p50={p50:6.2f}ms p95={p95:6.2f}ms p99={p99:6.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Parallel stratified k-fold evaluation for ObesityPipeline.
+
+``treinar`` scores a single train/test split, so its accuracy moves with the
+seed. `validar_cruzado` fits the pipeline's classifier on every fold in worker
+processes and returns structured metrics instead of printed text:
+
+- per fold: accuracy, macro F1, confusion matrix and fit/predict seconds
+- overall: mean/std accuracy, the confusion matrix summed over folds and the
+  per-class precision/recall/F1 derived from it
+
+Fold encodings (fold_encoding) are kept in a small in-process cache keyed by
+the data content, the split and the encoder settings, so evaluating several
+forest settings on the same data only encodes the folds once.
+"""
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fold_encoding import chave_encoder, codificar_folds, dividir_folds
+
+# (hash_dados, colunas, ordens, modelo, n_folds, random_state, chave_encoder) -> [FoldCodificado]
+_CACHE_FOLDS = OrderedDict()
+MAX_CACHE_FOLDS = 8
+
+# Encoded folds and class order, installed in each worker by _inicializar
+_FOLDS = None
+_CLASSES = None
+
+
+def _inicializar(folds, classes):
+    global _FOLDS, _CLASSES
+    _FOLDS = folds
+    _CLASSES = classes
+
+
+def _avaliar_fold(tarefa):
+    """Fit and score one fold; returns a dict of metrics for that fold."""
+    from sklearn.base import clone
+    from sklearn.metrics import confusion_matrix, f1_score
+
+    indice, classificador = tarefa
+    fold = _FOLDS[indice]
+    inicio = time.perf_counter()
+    modelo = clone(classificador)
+    modelo.fit(fold.X_treino, fold.y_treino)
+    meio = time.perf_counter()
+    y_pred = modelo.predict(fold.X_validacao)
+    fim = time.perf_counter()
+    return {
+        'fold': indice,
+        'linhas_treino': int(len(fold.y_treino)),
+        'linhas_validacao': int(len(fold.y_validacao)),
+        'acuracia': float((y_pred == fold.y_validacao).mean()),
+        'f1_macro': float(f1_score(fold.y_validacao, y_pred, labels=_CLASSES, average='macro', zero_division=0)),
+        'matriz_confusao': confusion_matrix(fold.y_validacao, y_pred, labels=_CLASSES),
+        'segundos_codificacao': fold.segundos_codificacao,
+        'segundos_ajuste': meio - inicio,
+        'segundos_predicao': fim - meio,
+    }
+
+
+def folds_codificados(pipeline_obj, df, n_folds=5, random_state=4242, parametros_encoders=None):
+    """Encoded folds of ``df`` for ``pipeline_obj``, reused across calls."""
+    from incremental_training import hash_linhas
+
+    parametros_encoders = {**pipeline_obj.PARAMETROS_ENCODERS_PADRAO, **pipeline_obj.parametros_encoders,
+                           **(parametros_encoders or {})}
+    colunas = list(pipeline_obj.col_ordinais + pipeline_obj.col_nominais + pipeline_obj.col_numericas)
+    chave = (hash_linhas(df), tuple(colunas), tuple(map(tuple, pipeline_obj.ordem_ordinais)), pipeline_obj.modelo,
+             n_folds, random_state, chave_encoder(parametros_encoders))
+    if chave in _CACHE_FOLDS:
+        _CACHE_FOLDS.move_to_end(chave)
+        return _CACHE_FOLDS[chave], True
+
+    X = df.drop(columns=pipeline_obj.target)
+    y = df[pipeline_obj.target].to_numpy()
+    divisoes = dividir_folds(y, n_folds, random_state)
+    folds = codificar_folds(pipeline_obj, X, y, divisoes, [parametros_encoders])[chave_encoder(parametros_encoders)]
+    _CACHE_FOLDS[chave] = folds
+    while len(_CACHE_FOLDS) > MAX_CACHE_FOLDS:
+        _CACHE_FOLDS.popitem(last=False)
+    return folds, False
+
+
+def limpar_cache():
+    _CACHE_FOLDS.clear()
+
+
+def validar_cruzado(pipeline_obj, df, n_folds=5, n_jobs=None, random_state=4242,
+                    parametros_floresta=None, parametros_encoders=None):
+    """Stratified k-fold evaluation of ``pipeline_obj``'s configuration on ``df``.
+
+    The classifier is the pipeline's ``modelo`` (forest or booster);
+    ``parametros_floresta``/``parametros_encoders`` override the pipeline's
+    settings for this evaluation only; ``pipeline_obj`` itself is not fitted.
+    ``n_jobs=1`` runs in-process. Returns a dict with ``folds`` (one entry per
+    fold), ``acuracia_media``, ``acuracia_desvio``, ``f1_macro_media``,
+    ``classes``, ``matriz_confusao`` (summed over folds), ``por_classe``
+    (precision/recall/F1/support from that matrix) and ``segundos``.
+    """
+    inicio = time.perf_counter()
+    folds, cache_hit = folds_codificados(pipeline_obj, df, n_folds, random_state, parametros_encoders)
+    fim_codificacao = time.perf_counter()
+    classes = np.unique(np.concatenate([f.y_validacao for f in folds]))
+
+    classificador = pipeline_obj.construir_classificador(parametros_floresta)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, n_folds)
+    if n_jobs > 1 and 'n_jobs' in classificador.get_params():
+        # workers run one fold each; keep the forest itself single-threaded
+        classificador.set_params(n_jobs=1)
+    tarefas = [(f.indice, classificador) for f in folds]
+    if n_jobs == 1:
+        _inicializar(folds, classes)
+        try:
+            resultados = [_avaliar_fold(t) for t in tarefas]
+        finally:
+            _inicializar(None, None)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_inicializar, initargs=(folds, classes)) as pool:
+            resultados = list(pool.map(_avaliar_fold, tarefas))
+
+    matriz = np.sum([r['matriz_confusao'] for r in resultados], axis=0)
+    acuracias = np.array([r['acuracia'] for r in resultados])
+    return {
+        'folds': resultados,
+        'acuracia_media': float(acuracias.mean()),
+        'acuracia_desvio': float(acuracias.std()),
+        'f1_macro_media': float(np.mean([r['f1_macro'] for r in resultados])),
+        'classes': classes,
+        'matriz_confusao': matriz,
+        'por_classe': metricas_por_classe(matriz, classes),
+        'segundos': {
+            'codificacao': fim_codificacao - inicio,
+            'cache_folds': cache_hit,
+            'ajuste': float(sum(r['segundos_ajuste'] for r in resultados)),
+            'predicao': float(sum(r['segundos_predicao'] for r in resultados)),
+            'total': time.perf_counter() - inicio,
+        },
+    }
+
+
+def metricas_por_classe(matriz, classes):
+    """Precision, recall, F1 and support per class from a confusion matrix."""
+    matriz = np.asarray(matriz, dtype=np.float64)
+    acertos = np.diag(matriz)
+    previstos = matriz.sum(axis=0)
+    reais = matriz.sum(axis=1)
+    precisao = np.divide(acertos, previstos, out=np.zeros_like(acertos), where=previstos > 0)
+    revocacao = np.divide(acertos, reais, out=np.zeros_like(acertos), where=reais > 0)
+    soma = precisao + revocacao
+    f1 = np.divide(2 * precisao * revocacao, soma, out=np.zeros_like(acertos), where=soma > 0)
+    return {
+        str(c): {'precisao': float(p), 'revocacao': float(r), 'f1': float(f), 'suporte': int(s)}
+        for c, p, r, f, s in zip(classes, precisao, revocacao, f1, reais)
+    }
+
+
+__all__ = ["validar_cruzado", "folds_codificados", "metricas_por_classe", "limpar_cache"]
@@ -1,5 +1,11 @@
+import os
+
+import numpy as np
 import pandas as pd
 
+from feature_cache import FeatureCache
+from label_mapping import derivar, traduzir
+
 # Shared mapping for transport options (UI label -> training code)
 MTRANS_MAP = {
     'Carro': 'Automobile',
@@ -9,158 +15,286 @@ MTRANS_MAP = {
     'Caminhar': 'Walking'
 }
 
+BASE = os.path.dirname(os.path.abspath(__file__))
+CSV_PADRAO = os.path.join(BASE, 'Obesity.csv')
 
-def load_data():
-    df = pd.read_csv("Obesity/Obesity.csv")
-
-    # ------------------------------------------------------------
-    # 1️⃣ Renomear colunas
-    # ------------------------------------------------------------
-    colunas_pt = {
-        'Gender': 'Gênero',
-        'Age': 'Idade',
-        'Height': 'Altura',
-        'Weight': 'Peso',
-        'family_history': 'Histórico Familiar',
-        'FAVC': 'Consumo de Alimentos com Alta Caloria',
-        'FCVC': 'Frequência de Consumo de Vegetais',
-        'NCP': 'Número de Refeições por Dia',
-        'CAEC': 'Comer Entre Refeições',
-        'SMOKE': 'Fuma',
-        'CH2O': 'Consumo de Água',
-        'SCC': 'Monitora Calorias Diárias Consumidas',
-        'FAF': 'Atividade Física',
-        'TUE': 'Uso de Dispositivos Tecnológicos',
-        'CALC': 'Consumo de Alcool',
-        'MTRANS': 'Meio de Transporte - Caminhar',
-        'Obesity': 'Nivel de Obesidade'
-    }
-    df.rename(columns=colunas_pt, inplace=True)
-
-
-    # ------------------------------------------------------------
-    # 2️⃣ Mapear níveis de obesidade
-    # ------------------------------------------------------------
-    mapa_obesidade = {
-        'Insufficient_Weight': 'Abaixo do peso',
-        'Normal_Weight': 'Peso normal',
-        'Overweight_Level_I': 'Sobrepeso Tipo I',
-        'Overweight_Level_II': 'Sobrepeso Tipo II',
-        'Obesity_Type_I': 'Obesidade Tipo I',
-        'Obesity_Type_II': 'Obesidade Tipo II',
-        'Obesity_Type_III': 'Obesidade Tipo III'
-    }
+# Processed frames are kept as a columnar snapshot (one .npy per column, see
+# feature_cache) keyed by the CSV content and the mappings below, so editing
+# either one invalidates it. Bump FORMATO_SNAPSHOT when load_data's output changes.
+DIRETORIO_SNAPSHOT = os.environ.get('OBESITY_DATA_SNAPSHOT', os.path.join(BASE, '.cache', 'dados'))
+FORMATO_SNAPSHOT = 2
 
-    ordem_niveis = list(mapa_obesidade.values())
+# compactar: largest relative error accepted when storing a float column as float32
+TOLERANCIA_FLOAT32 = 1e-6
 
-    df['Nivel de Obesidade'] = df['Nivel de Obesidade'].map(mapa_obesidade)
-    df['Nivel de Obesidade'] = pd.Categorical(df['Nivel de Obesidade'], categories=ordem_niveis, ordered=True)
+# ------------------------------------------------------------
+# Mapeamentos
+# ------------------------------------------------------------
+COLUNAS_PT = {
+    'Gender': 'Gênero',
+    'Age': 'Idade',
+    'Height': 'Altura',
+    'Weight': 'Peso',
+    'family_history': 'Histórico Familiar',
+    'FAVC': 'Consumo de Alimentos com Alta Caloria',
+    'FCVC': 'Frequência de Consumo de Vegetais',
+    'NCP': 'Número de Refeições por Dia',
+    'CAEC': 'Comer Entre Refeições',
+    'SMOKE': 'Fuma',
+    'CH2O': 'Consumo de Água',
+    'SCC': 'Monitora Calorias Diárias Consumidas',
+    'FAF': 'Atividade Física',
+    'TUE': 'Uso de Dispositivos Tecnológicos',
+    'CALC': 'Consumo de Alcool',
+    'MTRANS': 'Meio de Transporte - Caminhar',
+    'Obesity': 'Nivel de Obesidade'
+}
 
-    # ------------------------------------------------------------
-    # 3️⃣ Mapear Comer Entre Refeições e Alcool
-    # ------------------------------------------------------------
-    mapa_frequencia = {
-        'Always': 'Sempre',
-        'Frequently': 'Frequentemente',
-        'Sometimes': 'Às vezes',
-        'no': 'Nunca'
-    }
+MAPA_OBESIDADE = {
+    'Insufficient_Weight': 'Abaixo do peso',
+    'Normal_Weight': 'Peso normal',
+    'Overweight_Level_I': 'Sobrepeso Tipo I',
+    'Overweight_Level_II': 'Sobrepeso Tipo II',
+    'Obesity_Type_I': 'Obesidade Tipo I',
+    'Obesity_Type_II': 'Obesidade Tipo II',
+    'Obesity_Type_III': 'Obesidade Tipo III'
+}
+ORDEM_NIVEIS = list(MAPA_OBESIDADE.values())
+ORDEM_NIVEIS_NUM = [0, 1, 2, 3, 4, 5, 6]
 
-    for coluna in ['Comer Entre Refeições', 'Consumo de Alcool']:
-        if coluna in df.columns:
-            df[coluna] = df[coluna].map(mapa_frequencia).fillna(df[coluna])
-
-    ordem_entre_refeicoes = ['Nunca', 'Às vezes', 'Frequentemente', 'Sempre']
-    df['Comer Entre Refeições'] = pd.Categorical(df['Comer Entre Refeições'],
-                                                 categories=ordem_entre_refeicoes,
-                                                 ordered=True)
-
-    # ------------------------------------------------------------
-    # 4️⃣ Mapear Sim/Não e gênero
-    # ------------------------------------------------------------
-    mapa_sim_nao = {'yes': 'Sim', 'no': 'Não', 'Sim': 'Sim', 'Não': 'Não'}
-    mapa_genero = {'Male': 'Masculino', 'Female': 'Feminino'}
-
-    df['Gênero'] = df['Gênero'].map(mapa_genero)
-
-    colunas_binarias = [
-        'Histórico Familiar',
-        'Consumo de Alimentos com Alta Caloria',
-        'Fuma',
-        'Monitora Calorias Diárias Consumidas'
-    ]
-
-    for c in colunas_binarias:
-        df[c] = df[c].map(mapa_sim_nao)
-
-    # ------------------------------------------------------------
-    # 5️⃣ Criar versão numérica
-    # ------------------------------------------------------------
-    df_num = df.copy()
-
-    # Binárias
-    for c in colunas_binarias:
-        df_num[c] = df_num[c].map({'Sim': 1, 'Não': 0})
-
-    # Comer Entre Refeições numérico
-    mapa_entre_refeicoes_num = {
-        'Nunca': 0,
-        'Às vezes': 1,
-        'Frequentemente': 2,
-        'Sempre': 3
-    }
-    df_num['Comer Entre Refeições'] = df['Comer Entre Refeições'].map(mapa_entre_refeicoes_num)
-
-    # Obesidade numérica
-    mapa_obesidade_num = dict(zip(ordem_niveis, range(7)))
-    df_num['Nivel de Obesidade'] = df['Nivel de Obesidade'].map(mapa_obesidade_num)
-
-    ordem_niveis_num = [0, 1, 2, 3, 4, 5, 6]
-    
-    # ------------------------------------------------------------
-    # 6️⃣ Cores
-    # ------------------------------------------------------------
-    cores_obesidade = {
-        'Abaixo do peso': '#F2D7A6',
-        'Peso normal': '#EBC97A',
-        'Sobrepeso Tipo I': '#C5C98A',
-        'Sobrepeso Tipo II': '#91C4B8',
-        'Obesidade Tipo I': '#6FAFC2',
-        'Obesidade Tipo II': "#6391BD",
-        'Obesidade Tipo III': '#4B6A97'
-    }
+MAPA_FREQUENCIA = {
+    'Always': 'Sempre',
+    'Frequently': 'Frequentemente',
+    'Sometimes': 'Às vezes',
+    'no': 'Nunca'
+}
+ORDEM_ENTRE_REFEICOES = ['Nunca', 'Às vezes', 'Frequentemente', 'Sempre']
+
+MAPA_SIM_NAO = {'yes': 'Sim', 'no': 'Não', 'Sim': 'Sim', 'Não': 'Não'}
+MAPA_SIM_NAO_NUM = {'Sim': 1, 'Não': 0}
+MAPA_GENERO = {'Male': 'Masculino', 'Female': 'Feminino'}
+
+MAPA_TRANSPORTE = {
+    'Automobile': 'Automóvel',
+    'Bike': 'Bicicleta',
+    'Motorbike': 'Motocicleta',
+    'Public_Transportation': 'Transporte público',
+    'Walking': 'Caminhar'
+}
+
+# Single translation spec of the CSV (see label_mapping): Portuguese name,
+# labels, category order and numeric codes of every column. Ordered columns
+# are numbered by their position in 'ordem' in df_num.
+_REGRAS = {
+    'Gender': {'valores': MAPA_GENERO},
+    'CAEC': {'valores': MAPA_FREQUENCIA, 'desconhecidos': 'manter', 'ordem': ORDEM_ENTRE_REFEICOES},
+    'CALC': {'valores': MAPA_FREQUENCIA, 'desconhecidos': 'manter'},
+    'Obesity': {'valores': MAPA_OBESIDADE, 'ordem': ORDEM_NIVEIS},
+    **{coluna: {'valores': MAPA_SIM_NAO, 'codigos': MAPA_SIM_NAO_NUM}
+       for coluna in ('family_history', 'FAVC', 'SMOKE', 'SCC')},
+}
+ESPEC_ROTULOS = {coluna: {'nome': nome, **_REGRAS.get(coluna, {})} for coluna, nome in COLUNAS_PT.items()}
+
+# Exploration page: same labels, its own names for a few columns, transport
+# modes translated and unmapped values kept as they are
+ESPEC_EXPLORACAO = derivar(ESPEC_ROTULOS, {
+    'SCC': {'nome': 'Calorias Diárias Consumidas'},
+    'MTRANS': {'nome': 'Meio de Transporte', 'valores': MAPA_TRANSPORTE},
+    'CAEC': {'ordem': None},
+    'Obesity': {'nome': 'Obesidade'},
+}, desconhecidos='manter')
+
+# ------------------------------------------------------------
+# Cores
+# ------------------------------------------------------------
+CORES_OBESIDADE = {
+    'Abaixo do peso': '#F2D7A6',
+    'Peso normal': '#EBC97A',
+    'Sobrepeso Tipo I': '#C5C98A',
+    'Sobrepeso Tipo II': '#91C4B8',
+    'Obesidade Tipo I': '#6FAFC2',
+    'Obesidade Tipo II': "#6391BD",
+    'Obesidade Tipo III': '#4B6A97'
+}
+
+CORES_OBESIDADE_NUM = {
+    0: '#F2D7A6',
+    1: '#EBC97A',
+    2: '#C5C98A',
+    3: '#91C4B8',
+    4: '#6FAFC2',
+    5: "#6391BD",
+    6: '#4B6A97'
+}
 
-    cores_obesidade_num = {
-        0: '#F2D7A6',
-        1: '#EBC97A',
-        2: '#C5C98A',
-        3: '#91C4B8',
-        4: '#6FAFC2',
-        5: "#6391BD",
-        6: '#4B6A97'
+CORES_OBESIDADE_NUM_AJUSTADA = dict(zip(ORDEM_NIVEIS, CORES_OBESIDADE_NUM.values()))
+
+
+def load_data(caminho_csv=None, usar_snapshot=True, cache=None, compacto=False):
+    """Processed dataset: ``(df, df_num, ordem_niveis, ordem_niveis_num, cores_obesidade,
+    cores_obesidade_num, cores_obesidade_num_ajustada)``.
+
+    ``df`` has Portuguese column names and labels, ``df_num`` is its fully
+    numeric version: text columns without a numeric coding (Gênero, Consumo
+    de Alcool, ...) are int8 alphabetical category codes, -1 when missing.
+    That is what pandas 2 always gave; under pandas 3 those columns were
+    all-NaN float64 before FORMATO_SNAPSHOT 2. Both come from the columnar snapshot of ``caminho_csv``
+    (default ``Obesity/Obesity.csv``) when one exists for the current file
+    content and mappings; otherwise the CSV is parsed and processed and the
+    snapshot is written. ``cache`` is a FeatureCache (default: one under
+    ``Obesity/.cache/dados``).
+
+    ``compacto=True`` returns both frames with compact dtypes (see
+    ``compactar``). The compact frames have their own snapshot, which is
+    read straight into categorical codes and float32 arrays, so label
+    strings are never materialised per row.
+    """
+    caminho_csv = caminho_csv or CSV_PADRAO
+    if usar_snapshot:
+        df, df_num = _carregar_snapshot(caminho_csv, cache or FeatureCache(DIRETORIO_SNAPSHOT), compacto)
+    else:
+        df, df_num = _processar_csv(caminho_csv, compacto)
+    # fresh copies, like every call used to return
+    return (df, df_num, list(ORDEM_NIVEIS), list(ORDEM_NIVEIS_NUM), dict(CORES_OBESIDADE),
+            dict(CORES_OBESIDADE_NUM), dict(CORES_OBESIDADE_NUM_AJUSTADA))
+
+
+def processar(df):
+    """``(df, df_num)`` from the raw CSV frame: ``ESPEC_ROTULOS`` applied by label_mapping.traduzir."""
+    return traduzir(df, ESPEC_ROTULOS, numerico=True)
+
+
+def _processar_csv(caminho_csv, compacto):
+    df, df_num = processar(pd.read_csv(caminho_csv))
+    if compacto:
+        df, df_num = compactar(df), compactar(df_num)
+    return df, df_num
+
+
+# ------------------------------------------------------------
+# Layout compacto
+# ------------------------------------------------------------
+def compactar(df, tolerancia=TOLERANCIA_FLOAT32):
+    """Copy of ``df`` with compact dtypes.
+
+    - text columns become ``category`` (existing categoricals are kept, with
+      their order); their codes are int8 up to 127 labels
+    - integer columns (binary flags, ordinal and label codes of ``df_num``)
+      are downcast to the smallest integer type, int8 for this dataset
+    - float columns become float32 when every value is within float32 range
+      and off by at most ``tolerancia`` relative error; otherwise they stay
+      float64
+    """
+    colunas = {}
+    for nome, serie in df.items():
+        if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(serie):
+            colunas[nome] = serie
+        elif not pd.api.types.is_numeric_dtype(serie):
+            colunas[nome] = serie.astype('category')
+        elif pd.api.types.is_integer_dtype(serie):
+            colunas[nome] = pd.to_numeric(serie, downcast='integer')
+        elif _cabe_em_float32(serie.to_numpy(dtype=np.float64), tolerancia):
+            colunas[nome] = serie.astype(np.float32)
+        else:
+            colunas[nome] = serie
+    return pd.DataFrame(colunas, index=df.index)
+
+
+def _cabe_em_float32(valores, tolerancia):
+    finitos = valores[np.isfinite(valores)]
+    if not len(finitos):
+        return True
+    if np.abs(finitos).max() > np.finfo(np.float32).max:
+        return False
+    erro = np.abs(finitos.astype(np.float32).astype(np.float64) - finitos)
+    return bool((erro <= tolerancia * np.abs(finitos)).all())
+
+
+def relatorio_memoria(antes, depois):
+    """Per-column dtype and memory (deep, bytes) of ``antes`` vs ``depois`` = ``compactar(antes)``.
+
+    The last row, ``'total'``, sums every column.
+    """
+    bytes_antes = antes.memory_usage(deep=True, index=False)
+    bytes_depois = depois.memory_usage(deep=True, index=False)
+    relatorio = pd.DataFrame({
+        'dtype_antes': antes.dtypes.astype(str),
+        'dtype_depois': depois.dtypes.astype(str),
+        'bytes_antes': bytes_antes,
+        'bytes_depois': bytes_depois,
+    })
+    relatorio.loc['total'] = ['', '', int(bytes_antes.sum()), int(bytes_depois.sum())]
+    relatorio['reducao'] = 1 - relatorio['bytes_depois'] / relatorio['bytes_antes']
+    return relatorio
+
+
+# ------------------------------------------------------------
+# Snapshot
+# ------------------------------------------------------------
+def chave_snapshot(caminho_csv, cache=None, compacto=False):
+    """Snapshot key of ``caminho_csv``: its content hash plus every mapping definition."""
+    definicoes = {
+        'formato': FORMATO_SNAPSHOT,
+        'compacto': bool(compacto),
+        'tolerancia_float32': TOLERANCIA_FLOAT32 if compacto else None,
+        'espec': ESPEC_ROTULOS,
     }
+    return (cache or FeatureCache(DIRETORIO_SNAPSHOT)).chave(caminho_csv, **definicoes)
+
+
+def _carregar_snapshot(caminho_csv, cache, compacto=False):
+    chave = chave_snapshot(caminho_csv, cache, compacto)
+    entrada = cache.ler(chave, mmap=False)
+    if entrada is not None:
+        meta = entrada['meta']
+        return (_de_colunas(entrada['arrays'], meta['df'], 'df'),
+                _de_colunas(entrada['arrays'], meta['df_num'], 'df_num'))
 
-    cores_obesidade_num_ajustada = dict(zip(ordem_niveis, cores_obesidade_num.values()))
+    df, df_num = _processar_csv(caminho_csv, compacto)
+    arrays, meta = {}, {}
+    for nome, quadro in (('df', df), ('df_num', df_num)):
+        colunas, meta[nome] = _para_colunas(quadro, nome)
+        arrays.update(colunas)
+    meta['csv'] = os.path.abspath(caminho_csv)
+    try:
+        cache.gravar(chave, arrays=arrays, meta=meta)
+    except OSError:
+        # read-only deployments still get the processed frames
+        pass
+    return df, df_num
 
-    # ------------------------------------------------------------
-    # 🔧 Ajuste final: garantir df_num 100% numérico
-    # ------------------------------------------------------------
 
-    # Remover colunas que contém texto e não têm versão numérica
-        # Converter qualquer coluna categórica restante para códigos numéricos
-    df_num = df_num.apply(
-        lambda col: col.astype('category').cat.codes
-        if col.dtype == 'category' or col.dtype == 'object'
-        else col
-    )
+def _para_colunas(quadro, prefixo):
+    # One array per column; text and categorical columns become integer codes
+    # plus their categories (JSON), so nothing is pickled.
+    arrays, colunas = {}, []
+    for i, (nome, serie) in enumerate(quadro.items()):
+        descricao = {'nome': nome, 'dtype': str(serie.dtype)}
+        if isinstance(serie.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(serie):
+            categorica = serie.astype('category')
+            descricao['categorias'] = categorica.cat.categories.tolist()
+            descricao['ordenada'] = bool(categorica.cat.ordered)
+            arrays[f'{prefixo}_{i}'] = categorica.cat.codes.to_numpy()
+        else:
+            arrays[f'{prefixo}_{i}'] = serie.to_numpy()
+        colunas.append(descricao)
+    return arrays, {'colunas': colunas}
 
-    # Garantir que todas são numéricas
-    df_num = df_num.apply(pd.to_numeric, errors='coerce')
 
-    # ------------------------------------------------------------
-    # 📌 Final
-    # ------------------------------------------------------------
-    return df, df_num, ordem_niveis, ordem_niveis_num, cores_obesidade, cores_obesidade_num, cores_obesidade_num_ajustada
-    
+def _de_colunas(arrays, meta, prefixo):
+    dados = {}
+    for i, descricao in enumerate(meta['colunas']):
+        valores = arrays[f'{prefixo}_{i}']
+        if 'categorias' in descricao and descricao['dtype'] == 'category':
+            valores = pd.Categorical.from_codes(valores, categories=descricao['categorias'],
+                                                ordered=descricao['ordenada'])
+        elif 'categorias' in descricao:
+            # code -1 (missing) picks the NaN appended after the categories
+            categorias = np.array(descricao['categorias'] + [np.nan], dtype=object)
+            valores = pd.array(categorias[valores], dtype=descricao['dtype'])
+        dados[descricao['nome']] = valores
+    return pd.DataFrame(dados)
 
 
+__all__ = ["CSV_PADRAO", "ESPEC_EXPLORACAO", "ESPEC_ROTULOS", "MTRANS_MAP", "chave_snapshot", "compactar",
+           "load_data", "processar", "relatorio_memoria"]
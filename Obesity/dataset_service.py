@@ -0,0 +1,157 @@
+"""Process-wide cache of the datasets used by the Streamlit pages.
+
+Streamlit re-executes a page script on every interaction of every session,
+so reading and processing the CSVs at the top of a page repeats that work
+for each rerun. `servico` (a module-level DatasetService) builds each named
+dataset once per process, when first asked for, and serves it to all
+sessions and pages:
+
+    from dataset_service import servico
+    df_num = servico.obter('df_numerico')
+
+A dataset is a factory plus the source files it reads. Every ``obter``
+compares the sources' size and mtime with those seen at build time and
+rebuilds on change, so editing a CSV is picked up without a restart.
+Concurrent first requests wait for a single build.
+
+Callers get copies: with pandas Copy-on-Write (always on from pandas 3,
+opt-in on pandas 2) DataFrames are shallow copies, since a write copies only
+the touched column and never reaches the shared data; without it they are
+deep copies, which makes every ``obter`` pay a full copy. Lists and dicts
+are copied. Treat them as read-only all the same. ``metricas()`` reports hits, misses, rebuilds,
+build time and memory per dataset.
+"""
+import os
+import threading
+import time
+
+import pandas as pd
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+CSV_OBESIDADE = os.path.join(BASE, 'Obesity.csv')
+# pandas 2 only has Copy-on-Write when enabled; checked first so pandas 3 does
+# not warn about the deprecated option
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+
+class DatasetService:
+    """Named datasets built once per process and rebuilt when their source files change."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._fabricas = {}
+        self._entradas = {}
+        self._travas = {}
+        self._metricas = {}
+
+    def registrar(self, nome, fabrica, fontes=()):
+        """Declare ``nome``: ``fabrica()`` builds it from the files in ``fontes``."""
+        with self._trava:
+            self._fabricas[nome] = (fabrica, tuple(fontes))
+            self._travas.setdefault(nome, threading.Lock())
+            self._metricas.setdefault(nome, {'acertos': 0, 'falhas': 0, 'reconstrucoes': 0,
+                                             'segundos_construcao': 0.0, 'ultima_construcao': None,
+                                             'bytes': None})
+            self._entradas.pop(nome, None)
+
+    def registrado(self, nome):
+        return nome in self._fabricas
+
+    def obter(self, nome):
+        """View of dataset ``nome``, built (or rebuilt after a source change) on demand."""
+        if nome not in self._fabricas:
+            raise KeyError(f'dataset {nome!r} is not registered')
+        fabrica, fontes = self._fabricas[nome]
+        marca = _marca(fontes)
+        entrada = self._entradas.get(nome)
+        metricas = self._metricas[nome]
+        if entrada is None or entrada[1] != marca:
+            with self._travas[nome]:
+                entrada = self._entradas.get(nome)
+                # another session may have built it while this one waited
+                if entrada is None or entrada[1] != marca:
+                    reconstrucao = entrada is not None
+                    inicio = time.perf_counter()
+                    valor = fabrica()
+                    segundos = time.perf_counter() - inicio
+                    entrada = (valor, marca)
+                    self._entradas[nome] = entrada
+                    with self._trava:
+                        metricas['falhas'] += 1
+                        metricas['reconstrucoes'] += reconstrucao
+                        metricas['segundos_construcao'] += segundos
+                        metricas['ultima_construcao'] = time.time()
+                        metricas['bytes'] = _tamanho(valor)
+                    return _visao(valor)
+        with self._trava:
+            metricas['acertos'] += 1
+        return _visao(entrada[0])
+
+    def metricas(self):
+        """``{nome: {'acertos', 'falhas', 'reconstrucoes', 'segundos_construcao', 'ultima_construcao', 'bytes'}}``."""
+        with self._trava:
+            return {nome: dict(m) for nome, m in self._metricas.items()}
+
+    def invalidar(self, nome=None):
+        """Drop ``nome`` (default: every dataset); the next ``obter`` rebuilds it."""
+        with self._trava:
+            if nome is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(nome, None)
+
+
+def _marca(fontes):
+    marca = []
+    for caminho in fontes:
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            marca.append((caminho, None, None))
+        else:
+            marca.append((caminho, info.st_size, info.st_mtime_ns))
+    return tuple(marca)
+
+
+def _visao(valor):
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy(deep=not _COPY_ON_WRITE)
+    if isinstance(valor, tuple):
+        return tuple(_visao(v) for v in valor)
+    if isinstance(valor, (list, dict)):
+        return valor.copy()
+    return valor
+
+
+def _tamanho(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, tuple):
+        tamanhos = [t for t in (_tamanho(v) for v in valor) if t is not None]
+        return sum(tamanhos) if tamanhos else None
+    return None
+
+
+def _load_data():
+    from data_loader import load_data
+
+    return load_data(CSV_OBESIDADE)
+
+
+def _matriz(nome):
+    import model_matrix
+
+    return getattr(model_matrix, nome)(CSV_OBESIDADE)
+
+
+servico = DatasetService()
+# raw Obesity.csv
+servico.registrar('obesity_csv', lambda: pd.read_csv(CSV_OBESIDADE), fontes=[CSV_OBESIDADE])
+# data_loader.load_data() tuple: (df, df_num, ordem_niveis, ...)
+servico.registrar('load_data', _load_data, fontes=[CSV_OBESIDADE])
+# numeric modelling tables (model_matrix), derived from Obesity.csv
+servico.registrar('df_numerico', lambda: _matriz('matriz_numerica'), fontes=[CSV_OBESIDADE])
+servico.registrar('df_modelo', lambda: _matriz('matriz_modelo'), fontes=[CSV_OBESIDADE])
+
+
+__all__ = ["CSV_OBESIDADE", "DatasetService", "servico"]
@@ -0,0 +1,146 @@
+"""Precompiled preprocessing for dict inputs.
+
+Once fitted, the ``ColumnTransformer`` built by
+``ObesityPipeline.construir_pipeline`` is nothing more than lookup tables
+(``OrdinalEncoder``/``OneHotEncoder``) and an affine map (``MinMaxScaler``).
+`CompiledPreprocessor` copies those tables into plain Python dicts and NumPy
+vectors so a record (or list of records) becomes a feature vector without
+building a pandas DataFrame. Output is identical to
+``ColumnTransformer.transform``.
+
+Only NumPy is imported here; `to_dict`/`from_dict` give a JSON-friendly form
+so the compiled tables can be saved next to an artifact.
+"""
+import numpy as np
+
+
+class CompiledPreprocessor:
+    """Feature encoder compiled from a fitted ``ColumnTransformer``.
+
+    ``etapas`` is a list of ``(tipo, colunas, tabela)`` entries in the same
+    order as the transformer outputs:
+
+    - ``('ordinal', cols, {'mapas': [...], 'desconhecido': float})``
+    - ``('onehot', cols, {'mapas': [...], 'larguras': [...]})`` where each map
+      sends a category to its output offset (dropped categories are absent)
+    - ``('minmax', cols, {'escala': [...], 'deslocamento': [...]})``, also used
+      for ``'passthrough'`` columns (unit scale, zero offset)
+    """
+
+    def __init__(self, etapas):
+        self.etapas = etapas
+        self.colunas = [c for _, cols, _ in etapas for c in cols]
+        # output column ranges of the affine (MinMaxScaler) steps, built once
+        self._afins = []
+        pos = 0
+        for tipo, cols, tabela in etapas:
+            largura = sum(tabela['larguras']) if tipo == 'onehot' else len(cols)
+            if tipo == 'minmax':
+                self._afins.append((pos, pos + largura,
+                                    np.asarray(tabela['escala'], dtype=np.float64),
+                                    np.asarray(tabela['deslocamento'], dtype=np.float64)))
+            pos += largura
+        self.n_saida = pos
+
+    @classmethod
+    def from_column_transformer(cls, transformador):
+        """Compile a fitted ``ColumnTransformer``.
+
+        Raises ``ValueError`` when it contains a step this module cannot
+        reproduce exactly; callers then keep using the sklearn path.
+        """
+        etapas = []
+        for nome, estimador, colunas in transformador.transformers_:
+            if estimador == 'drop' or nome == 'remainder':
+                continue
+            colunas = list(colunas)
+            tipo = type(estimador).__name__
+            if estimador == 'passthrough' or (tipo == 'FunctionTransformer' and estimador.func is None):
+                # 'passthrough' (fitted as an identity FunctionTransformer):
+                # x * 1 + 0 is exact in float64
+                etapas.append(('minmax', colunas, {'escala': [1.0] * len(colunas),
+                                                   'deslocamento': [0.0] * len(colunas)}))
+            elif tipo == 'OrdinalEncoder':
+                if not np.isnan(getattr(estimador, 'encoded_missing_value', np.nan)):
+                    raise ValueError('OrdinalEncoder with encoded_missing_value is not supported')
+                desconhecido = estimador.unknown_value if estimador.handle_unknown == 'use_encoded_value' else None
+                mapas = [{_chave(c): float(i) for i, c in enumerate(cats)} for cats in estimador.categories_]
+                etapas.append(('ordinal', colunas, {'mapas': mapas, 'desconhecido': desconhecido}))
+            elif tipo == 'OneHotEncoder':
+                if estimador.handle_unknown != 'ignore':
+                    raise ValueError('only OneHotEncoder(handle_unknown="ignore") is supported')
+                drop_idx = estimador.drop_idx_ if estimador.drop_idx_ is not None else [None] * len(colunas)
+                mapas, larguras = [], []
+                for cats, descartada in zip(estimador.categories_, drop_idx):
+                    mantidas = [c for i, c in enumerate(cats) if descartada is None or i != descartada]
+                    mapas.append({_chave(c): j for j, c in enumerate(mantidas)})
+                    larguras.append(len(mantidas))
+                etapas.append(('onehot', colunas, {'mapas': mapas, 'larguras': larguras}))
+            elif tipo == 'MinMaxScaler':
+                if estimador.clip:
+                    raise ValueError('MinMaxScaler(clip=True) is not supported')
+                etapas.append(('minmax', colunas, {'escala': estimador.scale_.tolist(),
+                                                   'deslocamento': estimador.min_.tolist()}))
+            else:
+                raise ValueError(f'cannot compile transformer {nome!r} of type {tipo}')
+        return cls(etapas)
+
+    def to_dict(self):
+        return {'etapas': [[tipo, list(cols), tabela] for tipo, cols, tabela in self.etapas]}
+
+    @classmethod
+    def from_dict(cls, dados):
+        return cls([(tipo, list(cols), tabela) for tipo, cols, tabela in dados['etapas']])
+
+    def transform(self, registros, defaults=None):
+        """Encode a dict or a list of dicts into a 2-D float64 array.
+
+        Missing keys are filled from ``defaults`` (as ``prever`` does); unknown
+        categories follow the fitted encoders (ordinal -> unknown value,
+        one-hot -> all zeros).
+        """
+        if isinstance(registros, dict):
+            registros = [registros]
+        defaults = defaults or {}
+        X = np.zeros((len(registros), self.n_saida), dtype=np.float64)
+        for linha, registro in enumerate(registros):
+            self._preencher(X[linha], registro, defaults)
+        for inicio, fim, escala, deslocamento in self._afins:
+            X[:, inicio:fim] *= escala
+            X[:, inicio:fim] += deslocamento
+        return X
+
+    def _preencher(self, saida, registro, defaults):
+        pos = 0
+        for tipo, cols, tabela in self.etapas:
+            if tipo == 'ordinal':
+                for col, mapa in zip(cols, tabela['mapas']):
+                    valor = registro[col] if col in registro else defaults.get(col)
+                    codigo = mapa.get(_chave(valor))
+                    if codigo is None:
+                        if tabela['desconhecido'] is None:
+                            raise ValueError(f'Found unknown category {valor!r} in column {col!r}')
+                        codigo = tabela['desconhecido']
+                    saida[pos] = codigo
+                    pos += 1
+            elif tipo == 'onehot':
+                for col, mapa, largura in zip(cols, tabela['mapas'], tabela['larguras']):
+                    valor = registro[col] if col in registro else defaults.get(col)
+                    desloc = mapa.get(_chave(valor))
+                    if desloc is not None:
+                        saida[pos + desloc] = 1.0
+                    pos += largura
+            else:
+                for col in cols:
+                    valor = registro[col] if col in registro else defaults.get(col)
+                    saida[pos] = np.nan if valor is None else float(valor)
+                    pos += 1
+
+
+def _chave(valor):
+    # Categories are matched by their string form so JSON round-trips (which
+    # only keep string keys) behave like the in-memory tables.
+    return None if valor is None else str(valor)
+
+
+__all__ = ["CompiledPreprocessor"]
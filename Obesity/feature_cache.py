@@ -0,0 +1,157 @@
+"""Content-addressed on-disk cache of encoded feature matrices.
+
+Training on the same CSV with the same column configuration always produces
+the same split and the same encoded matrices. `FeatureCache` stores them
+under a key derived from the CSV content hash and the configuration, so a
+repeat run skips CSV parsing and encoder fitting:
+
+    <diretorio>/<chave>/
+        meta.json          configuration, defaults, array dtypes/shapes
+        <array>.npy        encoded X/y (memory-mapped on reuse)
+        <objeto>.joblib    small fitted objects (e.g. the preprocessor)
+
+Entries are written to a temporary directory and renamed into place, so a
+crashed write is never read back; an entry that disappears or is replaced
+while being read is a miss. When the total size exceeds
+``max_bytes`` the least recently used entries are removed.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+DIRETORIO_PADRAO = os.environ.get(
+    'OBESITY_FEATURE_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'features'))
+MAX_BYTES_PADRAO = 512 * 1024 * 1024
+META = 'meta.json'
+
+# (caminho, tamanho, mtime_ns) -> sha256, so a file is hashed once per process
+_HASHES = {}
+
+
+def hash_arquivo(caminho, bloco=1 << 20):
+    """SHA-256 of a file's content (memoised on path, size and mtime)."""
+    info = os.stat(caminho)
+    marca = (os.path.abspath(caminho), info.st_size, info.st_mtime_ns)
+    if marca not in _HASHES:
+        h = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for parte in iter(lambda: f.read(bloco), b''):
+                h.update(parte)
+        _HASHES[marca] = h.hexdigest()
+    return _HASHES[marca]
+
+
+class FeatureCache:
+    """Directory of cache entries, each a set of ``.npy`` arrays plus metadata.
+
+    Parameters
+    - diretorio: cache root (default ``Obesity/.cache/features`` or
+      ``$OBESITY_FEATURE_CACHE``)
+    - max_bytes: total size above which least recently used entries are evicted
+    """
+
+    def __init__(self, diretorio=None, max_bytes=MAX_BYTES_PADRAO):
+        self.diretorio = diretorio or DIRETORIO_PADRAO
+        self.max_bytes = max_bytes
+
+    def chave(self, caminho_csv, **config):
+        """Key for ``caminho_csv``'s content plus a JSON-serialisable configuration."""
+        texto = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(f'{hash_arquivo(caminho_csv)}\n{texto}'.encode('utf-8')).hexdigest()[:32]
+
+    def ler(self, chave, mmap=True):
+        """Entry ``chave`` as ``{'arrays', 'objetos', 'meta'}`` or None on a miss."""
+        pasta = os.path.join(self.diretorio, chave)
+        try:
+            with open(os.path.join(pasta, META), encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = {nome: np.load(os.path.join(pasta, f'{nome}.npy'), mmap_mode='r' if mmap else None)
+                      for nome in meta['arrays']}
+            objetos = {}
+            if meta['objetos']:
+                import joblib
+
+                objetos = {nome: joblib.load(os.path.join(pasta, f'{nome}.joblib')) for nome in meta['objetos']}
+        except (OSError, ValueError, EOFError, KeyError, pickle.UnpicklingError):
+            # missing, partial, or removed by a concurrent gravar (JSONDecodeError is a ValueError)
+            return None
+        try:
+            # directory mtime records the last use for eviction
+            os.utime(pasta)
+        except OSError:
+            # read-only cache: eviction order just stays by creation time
+            pass
+        return {'arrays': arrays, 'objetos': objetos, 'meta': meta['meta']}
+
+    def gravar(self, chave, arrays, objetos=None, meta=None):
+        """Store ``arrays`` (name -> ndarray), ``objetos`` (name -> picklable) and ``meta``."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = tempfile.mkdtemp(prefix=f'.{chave}-', dir=self.diretorio)
+        try:
+            descricao = {}
+            for nome, arr in arrays.items():
+                arr = np.ascontiguousarray(arr)
+                if arr.dtype == object:
+                    # object arrays are pickled inside the .npy and cannot be mmapped
+                    arr = arr.astype(str)
+                np.save(os.path.join(temporario, f'{nome}.npy'), arr)
+                descricao[nome] = {'dtype': str(arr.dtype), 'shape': list(arr.shape)}
+            if objetos:
+                import joblib
+
+                for nome, objeto in objetos.items():
+                    joblib.dump(objeto, os.path.join(temporario, f'{nome}.joblib'))
+            with open(os.path.join(temporario, META), 'w', encoding='utf-8') as f:
+                json.dump({'arrays': descricao, 'objetos': sorted(objetos or {}), 'meta': meta or {},
+                           'criado': time.time()}, f, ensure_ascii=False, indent=2, default=str)
+            destino = os.path.join(self.diretorio, chave)
+            if os.path.isdir(destino):
+                shutil.rmtree(destino, ignore_errors=True)
+            os.replace(temporario, destino)
+        except BaseException:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+        self.despejar(manter=chave)
+
+    def entradas(self):
+        """``[(chave, bytes, ultimo_uso)]`` of complete entries, oldest use first."""
+        if not os.path.isdir(self.diretorio):
+            return []
+        resultado = []
+        for nome in os.listdir(self.diretorio):
+            pasta = os.path.join(self.diretorio, nome)
+            if nome.startswith('.') or not os.path.exists(os.path.join(pasta, META)):
+                continue
+            tamanho = sum(e.stat().st_size for e in os.scandir(pasta) if e.is_file())
+            resultado.append((nome, tamanho, os.stat(pasta).st_mtime))
+        return sorted(resultado, key=lambda e: e[2])
+
+    def tamanho(self):
+        return sum(t for _, t, _ in self.entradas())
+
+    def despejar(self, manter=None):
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        entradas = self.entradas()
+        total = sum(t for _, t, _ in entradas)
+        removidas = []
+        for chave, tamanho, _ in entradas:
+            if total <= self.max_bytes:
+                break
+            if chave == manter:
+                continue
+            shutil.rmtree(os.path.join(self.diretorio, chave), ignore_errors=True)
+            total -= tamanho
+            removidas.append(chave)
+        return removidas
+
+    def limpar(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+
+__all__ = ["FeatureCache", "hash_arquivo"]
@@ -0,0 +1,66 @@
+"""Cross-validation folds encoded once and shared by many model fits.
+
+Hyperparameter search and k-fold evaluation fit many classifiers on the same
+folds. `codificar_folds` fits the ObesityPipeline preprocessor on each
+training fold once per encoder setting and keeps the encoded matrices, so
+every candidate model reuses them instead of re-encoding.
+"""
+import json
+
+import numpy as np
+
+
+class FoldCodificado:
+    """Encoded train/validation matrices of one fold for one encoder setting."""
+
+    __slots__ = ('indice', 'X_treino', 'y_treino', 'X_validacao', 'y_validacao', 'segundos_codificacao')
+
+    def __init__(self, indice, X_treino, y_treino, X_validacao, y_validacao, segundos_codificacao):
+        self.indice = indice
+        self.X_treino = X_treino
+        self.y_treino = y_treino
+        self.X_validacao = X_validacao
+        self.y_validacao = y_validacao
+        self.segundos_codificacao = segundos_codificacao
+
+
+def chave_encoder(parametros_encoders):
+    """Stable, hashable key for an encoder settings dict."""
+    return json.dumps(parametros_encoders or {}, sort_keys=True, default=str)
+
+
+def dividir_folds(y, n_folds=5, random_state=4242):
+    """Stratified (train_idx, val_idx) pairs."""
+    from sklearn.model_selection import StratifiedKFold
+
+    divisor = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    return list(divisor.split(np.zeros(len(y)), y))
+
+
+def codificar_folds(pipeline_obj, X, y, divisoes, configuracoes_encoder=({},)):
+    """Encode every fold once per encoder setting.
+
+    Returns ``{chave_encoder(cfg): [FoldCodificado, ...]}``. Matrices are
+    float32 (what the forest uses internally) to halve the cache size.
+    """
+    import time
+
+    y = np.asarray(y)
+    cache = {}
+    for cfg in configuracoes_encoder:
+        chave = chave_encoder(cfg)
+        if chave in cache:
+            continue
+        folds = []
+        for indice, (treino, validacao) in enumerate(divisoes):
+            inicio = time.perf_counter()
+            preprocessador = pipeline_obj.construir_preprocessador(cfg)
+            X_treino = preprocessador.fit_transform(X.iloc[treino]).astype(np.float32)
+            X_validacao = preprocessador.transform(X.iloc[validacao]).astype(np.float32)
+            folds.append(FoldCodificado(indice, X_treino, y[treino], X_validacao, y[validacao],
+                                        time.perf_counter() - inicio))
+        cache[chave] = folds
+    return cache
+
+
+__all__ = ["FoldCodificado", "chave_encoder", "dividir_folds", "codificar_folds"]
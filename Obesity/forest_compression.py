@@ -0,0 +1,311 @@
+"""Compress a fitted random forest to a latency or size budget.
+
+`comprimir` builds a grid of cheaper models from the forest of a trained
+ObesityPipeline and measures each one on held-out rows:
+
+- ``subconjunto``: the ``k`` trees with the best individual accuracy
+- ``poda``: every tree (or a subset) cut at a maximum depth; the cut nodes
+  predict their own class distribution (FlatForest.reduzir)
+- ``destilacao``: a single decision tree or a small forest fitted to the
+  forest's own predictions on the training reservoir plus synthetic rows
+
+Each candidate reports accuracy, the accuracy lost against the original
+forest, agreement with it, forest size and the latency of the forest step
+(preprocessing is the same for every candidate and is not included). The
+candidates that no cheaper candidate beats on accuracy form the frontier;
+the cheapest one within the tolerance and budgets is returned as a new
+ObesityPipeline (see `aplicar`) ready for ``salvar``.
+
+``df_validacao`` is split in two stratified halves: one ranks the trees, the
+other is used for every reported number, so tree selection is not scored on
+the rows that chose it.
+"""
+import time
+
+import numpy as np
+
+from forest_engine import FlatForest
+
+SUBCONJUNTOS_PADRAO = (1, 3, 5, 10, 20, 50)
+PROFUNDIDADES_PADRAO = (4, 6, 8, 10, 12, 15)
+DESTILACAO_PADRAO = (
+    {'n_estimators': 1, 'max_depth': 6},
+    {'n_estimators': 1, 'max_depth': 8},
+    {'n_estimators': 1, 'max_depth': 10},
+    {'n_estimators': 1, 'max_depth': 12},
+    {'n_estimators': 10, 'max_depth': 8},
+    {'n_estimators': 10, 'max_depth': 12},
+)
+
+
+class FlatForestClassifier:
+    """Prediction-only classifier backed by a FlatForest.
+
+    Used as the ``'classificador'`` step of a compressed pipeline so that
+    ``prever``/``salvar``/``carregar`` work unchanged. It implements the
+    scikit-learn estimator API a fitted Pipeline step needs without
+    importing scikit-learn; it cannot be refitted.
+    """
+
+    _estimator_type = 'classifier'
+
+    def __init__(self, floresta, descricao=None):
+        self.floresta = floresta
+        self.descricao = descricao or {}
+
+    @property
+    def classes_(self):
+        return self.floresta.classes
+
+    def get_params(self, deep=True):
+        return {'floresta': self.floresta, 'descricao': self.descricao}
+
+    def set_params(self, **parametros):
+        for nome, valor in parametros.items():
+            if nome not in ('floresta', 'descricao'):
+                raise ValueError(f'invalid parameter {nome!r} for FlatForestClassifier')
+            setattr(self, nome, valor)
+        return self
+
+    def fit(self, X, y=None):
+        raise TypeError('FlatForestClassifier is inference-only and cannot be fitted; '
+                        'compress a newly trained pipeline instead')
+
+    def predict_proba(self, X):
+        return self.floresta.predict_proba(X)
+
+    def predict(self, X):
+        return self.floresta.predict(X)
+
+    def score(self, X, y, sample_weight=None):
+        from sklearn.metrics import accuracy_score
+
+        return accuracy_score(y, self.predict(X), sample_weight=sample_weight)
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    def __sklearn_tags__(self):
+        # scikit-learn >= 1.6 asks every step for its tags
+        from sklearn.utils import ClassifierTags, Tags, TargetTags
+
+        return Tags(estimator_type='classifier', target_tags=TargetTags(required=True),
+                    classifier_tags=ClassifierTags())
+
+    def __repr__(self):
+        return f'FlatForestClassifier(n_trees={self.floresta.n_trees}, descricao={self.descricao!r})'
+
+
+def floresta_do_classificador(classificador):
+    """FlatForest of a RandomForestClassifier or FlatForestClassifier, else None."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    if isinstance(classificador, FlatForestClassifier):
+        return classificador.floresta
+    if isinstance(classificador, RandomForestClassifier):
+        return FlatForest.from_sklearn(classificador)
+    return None
+
+
+def comprimir(pipeline_obj, df_validacao, max_perda=0.01, max_latencia_ms=None, max_bytes=None,
+              subconjuntos=SUBCONJUNTOS_PADRAO, profundidades=PROFUNDIDADES_PADRAO,
+              destilacao=DESTILACAO_PADRAO, n_sinteticas=4, repeticoes=300, random_state=4242):
+    """Build and measure compressed candidates of ``pipeline_obj``'s forest.
+
+    Returns ``{'professor', 'candidatos', 'fronteira', 'escolhido',
+    'pipeline', 'segundos'}``. ``escolhido`` is the candidate with the lowest
+    single-row latency whose accuracy loss is at most ``max_perda`` and that
+    fits ``max_latencia_ms``/``max_bytes`` (None when nothing fits);
+    ``pipeline`` is it applied to ``pipeline_obj``. Candidates keep their
+    FlatForest under ``'floresta'``; drop that key before writing JSON.
+    """
+    from sklearn.model_selection import train_test_split
+
+    inicio = time.perf_counter()
+    pipeline_obj._exigir_modelo()
+    professor = floresta_do_classificador(pipeline_obj.pipeline.named_steps['classificador'])
+    if professor is None:
+        raise ValueError('compression needs a random forest (modelo="floresta")')
+
+    X_val = df_validacao.drop(columns=pipeline_obj.target)
+    y_val = df_validacao[pipeline_obj.target].to_numpy()
+    X_sel, X_av, y_sel, y_av = train_test_split(X_val, y_val, test_size=0.5, stratify=y_val,
+                                                random_state=random_state)
+    X_sel = pipeline_obj._preprocessar(pipeline_obj._alinhar(X_sel.copy()))
+    X_av = pipeline_obj._preprocessar(pipeline_obj._alinhar(X_av.copy()))
+    rotulos_professor = professor.predict(X_av)
+
+    def medir(tipo, parametros, floresta):
+        y_pred = floresta.predict(X_av)
+        return {
+            'tipo': tipo,
+            'parametros': parametros,
+            'n_arvores': floresta.n_trees,
+            'max_depth': floresta.max_depth,
+            'nos': int(len(floresta.value)),
+            'bytes': floresta.nbytes,
+            **_latencia(floresta, X_av, repeticoes),
+            'acuracia': float((y_pred == y_av).mean()),
+            'concordancia': float((y_pred == rotulos_professor).mean()),
+            'floresta': floresta,
+        }
+
+    referencia = medir('original', {}, professor)
+    candidatos = []
+
+    # trees ranked by their own accuracy on the selection half
+    acuracias = [float((professor.reduzir(arvores=[i]).predict(X_sel) == y_sel).mean())
+                 for i in range(professor.n_trees)]
+    ordem = np.argsort(acuracias, kind='stable')[::-1]
+    tamanhos = [k for k in subconjuntos if k < professor.n_trees] + [professor.n_trees]
+    for k in tamanhos:
+        arvores = sorted(ordem[:k].tolist())
+        if k < professor.n_trees:
+            candidatos.append(medir('subconjunto', {'arvores': k}, professor.reduzir(arvores=arvores)))
+        for profundidade in profundidades:
+            if profundidade < professor.max_depth:
+                candidatos.append(medir('poda', {'arvores': k, 'max_depth': profundidade},
+                                        professor.reduzir(arvores=arvores, max_depth=profundidade)))
+
+    if destilacao:
+        X_base = _dados_destilacao(pipeline_obj, X_sel)
+        X_dest = _aumentar(X_base, pipeline_obj, n_sinteticas, random_state)
+        y_dest = professor.predict(X_dest)
+        for parametros in destilacao:
+            aluno = _destilar(X_dest, y_dest, professor.classes, parametros, random_state)
+            candidatos.append(medir('destilacao', dict(parametros), aluno))
+
+    for candidato in candidatos:
+        candidato['perda'] = referencia['acuracia'] - candidato['acuracia']
+    _marcar_fronteira(candidatos)
+    elegiveis = [c for c in candidatos
+                 if c['perda'] <= max_perda
+                 and (max_latencia_ms is None or c['latencia_ms'] <= max_latencia_ms)
+                 and (max_bytes is None or c['bytes'] <= max_bytes)]
+    escolhido = min(elegiveis, key=lambda c: (c['latencia_ms'], c['bytes'])) if elegiveis else None
+    return {
+        'professor': referencia,
+        'candidatos': candidatos,
+        'fronteira': sorted((c for c in candidatos if c['fronteira']), key=lambda c: c['latencia_ms']),
+        'escolhido': escolhido,
+        'pipeline': aplicar(pipeline_obj, escolhido) if escolhido is not None else None,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def aplicar(pipeline_obj, candidato):
+    """New ObesityPipeline that predicts with ``candidato``'s forest (NumPy engine)."""
+    from sklearn.pipeline import Pipeline
+
+    from incremental_training import registro_lote
+
+    novo = pipeline_obj.nova_configuracao(motor='numpy')
+    descricao = {'tipo': candidato['tipo'], **candidato['parametros']}
+    novo.pipeline = Pipeline(steps=[('preprocessamento', pipeline_obj.pipeline.named_steps['preprocessamento']),
+                                    ('classificador', FlatForestClassifier(candidato['floresta'], descricao))])
+    novo.defaults = dict(pipeline_obj.defaults)
+    novo.expected_columns = list(pipeline_obj.expected_columns)
+    historico = [dict(r) for r in pipeline_obj.historico_arvores]
+    ultimo = historico[-1] if historico else {'linhas': 0, 'hash_dados': None}
+    historico.append({**registro_lote(0, candidato['n_arvores'], 'comprimir', candidato['tipo'],
+                                      linhas=ultimo['linhas'], hash_dados=ultimo['hash_dados']),
+                      'parametros': candidato['parametros']})
+    novo.historico_arvores = historico
+    novo.reservatorio = pipeline_obj.carregar_reservatorio()
+    novo.linhas_vistas = pipeline_obj.linhas_vistas
+    novo.segundos_treino = pipeline_obj.segundos_treino
+    novo._preparar_inferencia()
+    return novo
+
+
+def _latencia(floresta, X, repeticoes):
+    linha = X[:1]
+    floresta.predict_proba(linha)  # warm-up
+    tempos = np.empty(repeticoes)
+    for i in range(repeticoes):
+        t = time.perf_counter()
+        floresta.predict_proba(linha)
+        tempos[i] = time.perf_counter() - t
+    t = time.perf_counter()
+    floresta.predict_proba(X)
+    return {
+        'latencia_ms': float(np.percentile(tempos, 50) * 1e3),
+        'latencia_p95_ms': float(np.percentile(tempos, 95) * 1e3),
+        'lote_us_por_linha': float((time.perf_counter() - t) / len(X) * 1e6),
+    }
+
+
+def _dados_destilacao(pipeline_obj, X_sel):
+    # training rows when available (reservoir), else the selection half
+    reservatorio = pipeline_obj.carregar_reservatorio()
+    if reservatorio is None or not len(reservatorio):
+        return X_sel
+    return pipeline_obj._preprocessar(pipeline_obj._alinhar(reservatorio.drop(columns=pipeline_obj.target)))
+
+
+def _aumentar(X, pipeline_obj, n_sinteticas, random_state):
+    """Real rows plus ``n_sinteticas`` copies with numeric features resampled.
+
+    Each synthetic row takes a real row and replaces every numeric feature,
+    with probability 1/2, by that feature's value in another random row, so
+    the student sees the forest's decisions between the training points.
+    """
+    if n_sinteticas <= 0:
+        return X
+    rng = np.random.default_rng(random_state)
+    numericas = _posicoes_numericas(pipeline_obj)
+    copias = X[rng.integers(0, len(X), size=len(X) * n_sinteticas)]
+    for j in numericas:
+        trocar = rng.random(len(copias)) < 0.5
+        copias[trocar, j] = X[rng.integers(0, len(X), size=int(trocar.sum())), j]
+    return np.vstack([X, copias])
+
+
+def _posicoes_numericas(pipeline_obj):
+    compilado = pipeline_obj.preprocessamento_compilado
+    if compilado is None:
+        return []
+    posicoes, pos = [], 0
+    for tipo, cols, tabela in compilado.etapas:
+        largura = sum(tabela['larguras']) if tipo == 'onehot' else len(cols)
+        if tipo == 'minmax':
+            posicoes.extend(range(pos, pos + largura))
+        pos += largura
+    return posicoes
+
+
+def _destilar(X, y, classes, parametros, random_state):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    parametros = dict(parametros)
+    n_arvores = parametros.pop('n_estimators', 1)
+    if n_arvores == 1:
+        aluno = DecisionTreeClassifier(random_state=random_state, **parametros).fit(X, y)
+        floresta = FlatForest.from_trees([aluno.tree_], aluno.classes_)
+    else:
+        aluno = RandomForestClassifier(n_estimators=n_arvores, random_state=random_state, **parametros).fit(X, y)
+        floresta = FlatForest.from_sklearn(aluno)
+    return _alinhar_classes(floresta, classes)
+
+
+def _alinhar_classes(floresta, classes):
+    # a student that never saw a class has fewer value columns than the forest
+    if np.array_equal(floresta.classes, classes):
+        return floresta
+    posicao = {c: j for j, c in enumerate(classes)}
+    value = np.zeros((len(floresta.value), len(classes)))
+    value[:, [posicao[c] for c in floresta.classes]] = floresta.value
+    arrays = {**floresta.arrays(), 'value': value, 'classes': np.asarray(classes)}
+    return FlatForest.from_arrays(arrays, max_depth=floresta.max_depth)
+
+
+def _marcar_fronteira(candidatos):
+    # on the frontier: more accurate than every candidate that is at least as fast
+    melhor = -np.inf
+    for candidato in sorted(candidatos, key=lambda c: (c['latencia_ms'], -c['acuracia'])):
+        candidato['fronteira'] = candidato['acuracia'] > melhor
+        melhor = max(melhor, candidato['acuracia'])
+
+
+__all__ = ["FlatForestClassifier", "aplicar", "comprimir", "floresta_do_classificador"]
@@ -0,0 +1,244 @@
+"""Flattened NumPy inference engine for fitted random forests.
+
+`FlatForest` copies the node arrays of every tree in a fitted
+``RandomForestClassifier`` into a handful of flat NumPy arrays (feature,
+threshold, left, right and normalised leaf class counts) and evaluates all
+trees at once with a fixed number of vectorised gather steps. Results are
+identical to ``RandomForestClassifier.predict_proba``/``predict``: inputs are
+cast to float32 like sklearn does, thresholds are kept as float64 and the
+per-tree probabilities are accumulated in tree order before dividing.
+
+Only NumPy is imported here so the engine can be used by processes that do
+not load scikit-learn.
+"""
+import numpy as np
+
+# Names of the arrays that fully describe a FlatForest (see `arrays()`)
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots', 'classes')
+
+# Rows evaluated together by predict_proba; bounds the (rows x trees) temporaries
+_LINHAS_POR_BLOCO = 4096
+
+
+class FlatForest:
+    """Random forest flattened into contiguous node arrays.
+
+    Every node ``n`` owns two *slots*, ``2n`` (left) and ``2n + 1`` (right).
+    ``feature`` and ``threshold`` hold the split of node ``n`` in both of its
+    slots and ``children[2n + d]`` is the slot of the child taken for
+    decision ``d`` (0 = ``x <= threshold``, 1 = otherwise). Walking a tree is
+    then ``slot = children[slot + (x[feature[slot]] > threshold[slot])]``,
+    a single gather per step. Leaves are self-loops (threshold is +inf and
+    both children point back to the leaf) so every sample takes exactly
+    ``max_depth`` steps without branching on whether it reached a leaf.
+    ``value`` holds the normalised class distribution of each node.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, classes, max_depth=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        if max_depth is None:
+            max_depth = _max_depth(children, roots)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_sklearn(cls, floresta):
+        """Export a fitted ``RandomForestClassifier`` (single output)."""
+        if not hasattr(floresta, 'estimators_'):
+            raise ValueError('forest must be fitted before it can be exported')
+        if getattr(floresta, 'n_outputs_', 1) != 1:
+            raise ValueError('only single-output forests are supported')
+        return cls.from_trees([est.tree_ for est in floresta.estimators_], floresta.classes_)
+
+    @classmethod
+    def from_trees(cls, arvores, classes):
+        """Build from a sequence of sklearn ``Tree`` objects sharing ``classes``."""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        deslocamento = 0
+        max_depth = 0
+        for tree in arvores:
+            n = tree.node_count
+            ids = np.arange(n, dtype=np.intp)
+            esquerda = tree.children_left.astype(np.intp)
+            direita = tree.children_right.astype(np.intp)
+            folha = esquerda == -1
+            esquerda = np.where(folha, ids, esquerda) + deslocamento
+            direita = np.where(folha, ids, direita) + deslocamento
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizador = value.sum(axis=1, keepdims=True)
+            normalizador[normalizador == 0.0] = 1.0
+
+            features.append(np.repeat(np.where(folha, 0, tree.feature), 2))
+            thresholds.append(np.repeat(np.where(folha, np.inf, tree.threshold), 2))
+            children.append(2 * np.stack([esquerda, direita], axis=1).ravel())
+            values.append(value / normalizador)
+            roots.append(2 * deslocamento)
+            deslocamento += n
+            max_depth = max(max_depth, int(tree.max_depth))
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=np.asarray(classes),
+            max_depth=max_depth,
+        )
+
+    def reduzir(self, arvores=None, max_depth=None):
+        """New FlatForest keeping only ``arvores`` (tree indices) cut at ``max_depth``.
+
+        Internal nodes at depth ``max_depth`` become leaves that predict their
+        own (normalised) class distribution, i.e. what the tree would predict
+        had it stopped growing there. Unreachable nodes are dropped.
+        """
+        esquerda = self.children[0::2] >> 1
+        direita = self.children[1::2] >> 1
+        feature = self.feature[0::2]
+        threshold = self.threshold[0::2]
+        raizes = self.roots >> 1 if arvores is None else (np.asarray(self.roots)[list(arvores)] >> 1)
+        novo_id = np.empty(len(esquerda), dtype=np.intp)
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        deslocamento = 0
+        profundidade_max = 0
+        for raiz in raizes:
+            # breadth-first walk; `corte` marks nodes that end up as leaves
+            niveis, cortes = [], []
+            fronteira = np.asarray([raiz], dtype=np.intp)
+            profundidade = 0
+            while fronteira.size:
+                folha = esquerda[fronteira] == fronteira
+                if max_depth is not None and profundidade >= max_depth:
+                    folha = np.ones_like(folha)
+                niveis.append(fronteira)
+                cortes.append(folha)
+                internos = fronteira[~folha]
+                fronteira = np.stack([esquerda[internos], direita[internos]], axis=1).ravel()
+                profundidade += 1
+            nos = np.concatenate(niveis)
+            corte = np.concatenate(cortes)
+            ids = np.arange(len(nos), dtype=np.intp) + deslocamento
+            novo_id[nos] = ids
+            filhos_esq = np.where(corte, ids, novo_id[esquerda[nos]])
+            filhos_dir = np.where(corte, ids, novo_id[direita[nos]])
+
+            features.append(np.repeat(np.where(corte, 0, feature[nos]), 2))
+            thresholds.append(np.repeat(np.where(corte, np.inf, threshold[nos]), 2))
+            children.append(2 * np.stack([filhos_esq, filhos_dir], axis=1).ravel())
+            values.append(self.value[nos])
+            roots.append(2 * deslocamento)
+            deslocamento += len(nos)
+            profundidade_max = max(profundidade_max, len(niveis) - 1)
+
+        return FlatForest(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=self.classes,
+            max_depth=profundidade_max,
+        )
+
+    @property
+    def left(self):
+        """Left child node id of every node (leaves point to themselves)."""
+        return self.children[0::2] // 2
+
+    @property
+    def right(self):
+        """Right child node id of every node (leaves point to themselves)."""
+        return self.children[1::2] // 2
+
+    # ------------------------------------------------------------------
+    # Serialisation helpers
+    # ------------------------------------------------------------------
+    def arrays(self):
+        """Return the arrays that describe this forest, keyed by name."""
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, arrays, max_depth=None):
+        return cls(*(arrays[name] for name in ARRAY_NAMES), max_depth=max_depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return int(sum(arr.nbytes for arr in self.arrays().values()))
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    def apply(self, X):
+        """Return the leaf node id reached by every (sample, tree) pair."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[0] == 1:
+            # Single row: gather straight from the row, no offsets needed
+            x = X[0]
+            slot = self.roots
+            for _ in range(self.max_depth):
+                slot = self.children.take(slot + (x.take(self.feature.take(slot)) > self.threshold.take(slot)))
+            return (slot >> 1).reshape(1, -1)
+
+        n_amostras, n_features = X.shape
+        # Offsets turn a per-row feature index into a flat index into X
+        base = (np.arange(n_amostras, dtype=np.intp) * n_features)[:, None]
+        plano = X.ravel()
+        slot = np.broadcast_to(self.roots, (n_amostras, len(self.roots)))
+        for _ in range(self.max_depth):
+            x = plano.take(base + self.feature.take(slot))
+            slot = self.children.take(slot + (x > self.threshold.take(slot)))
+        return slot >> 1
+
+    def predict_proba(self, X, dtype=np.float64):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[0] == 1:
+            # Sum over the leading tree axis accumulates in tree order,
+            # exactly like RandomForestClassifier's ``proba += tree_proba``.
+            proba = self.value.take(self.apply(X)[0], axis=0).sum(axis=0, keepdims=True)
+        else:
+            proba = np.zeros((X.shape[0], self.value.shape[1]), dtype=np.float64)
+            # Bound the (rows x trees) temporaries of `apply` on large inputs
+            for inicio in range(0, X.shape[0], _LINHAS_POR_BLOCO):
+                bloco = proba[inicio:inicio + _LINHAS_POR_BLOCO]
+                for folhas in self.apply(X[inicio:inicio + _LINHAS_POR_BLOCO]).T:
+                    bloco += self.value.take(folhas, axis=0)
+        proba /= len(self.roots)
+        return proba.astype(dtype, copy=False)
+
+    def predict_codes(self, X):
+        """Class indices into ``classes`` (argmax of ``predict_proba``)."""
+        return self.predict_proba(X).argmax(axis=1)
+
+    def predict(self, X):
+        return self.classes.take(self.predict_codes(X))
+
+
+def _max_depth(children, roots):
+    """Depth of the deepest leaf, found by walking the self-loop encoding."""
+    fronteira = np.asarray(roots, dtype=np.intp)
+    profundidade = 0
+    while True:
+        internos = fronteira[children[fronteira] != fronteira]
+        if internos.size == 0:
+            return profundidade
+        fronteira = np.concatenate([children[internos], children[internos + 1]])
+        profundidade += 1
+
+
+__all__ = ["FlatForest"]
@@ -0,0 +1,170 @@
+"""Parallel hyperparameter search for ObesityPipeline.
+
+Candidates are sampled from a space of model and encoder settings: forest
+settings (``'floresta'``) or, for ``modelo='hgb'`` pipelines, gradient
+boosting settings (``'hgb'``; the encoder settings do not apply to its
+encoding). Every CV fold is encoded once per encoder setting (fold_encoding)
+and handed to the worker processes when the pool starts, so each candidate
+only pays for fitting and scoring its model. Two modes:
+
+- ``'aleatorio'``: randomized search, every candidate on all rows
+- ``'halving'``: successive halving; all candidates start on a fraction of
+  each training fold and only the best ``1/fator`` advance to more rows
+
+The winner is retrained with ``ObesityPipeline.treinar`` so it can be saved
+with ``salvar`` like any other pipeline.
+"""
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fold_encoding import chave_encoder, codificar_folds, dividir_folds
+
+ESPACO_PADRAO = {
+    'floresta': {
+        'n_estimators': [50, 100, 200, 300],
+        'max_depth': [None, 8, 12, 16, 24],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 'log2', 0.5],
+        'class_weight': ['balanced', None],
+    },
+    'hgb': {
+        'learning_rate': [0.05, 0.1, 0.2],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [10, 20, 40],
+        'l2_regularization': [0.0, 0.1, 1.0],
+    },
+    'encoders': {
+        'nominais_drop': ['first', None],
+        'escalonar_numericas': [True, False],
+    },
+}
+
+# Encoded folds of the current search, installed in each worker by _inicializar
+_FOLDS = None
+
+
+def _inicializar(folds):
+    global _FOLDS
+    _FOLDS = folds
+
+
+def _avaliar(tarefa):
+    """Fit one candidate on one fold; returns (candidato, fold, acuracia, segundos)."""
+    # the unfitted classifier arrives pickled, so every task fits its own copy
+    candidato, chave, indice_fold, modelo, fracao, random_state = tarefa
+    fold = _FOLDS[chave][indice_fold]
+    n = len(fold.y_treino)
+    linhas = slice(None)
+    if fracao < 1.0:
+        # same fixed subsample for every candidate of a round
+        linhas = np.random.default_rng(random_state + indice_fold).permutation(n)[:max(1, int(n * fracao))]
+    inicio = time.perf_counter()
+    modelo.fit(fold.X_treino[linhas], fold.y_treino[linhas])
+    acuracia = float((modelo.predict(fold.X_validacao) == fold.y_validacao).mean())
+    return candidato, indice_fold, acuracia, time.perf_counter() - inicio
+
+
+def amostrar_candidatos(espaco, n_candidatos, random_state=4242, modelo='floresta'):
+    """Sample distinct (model parameters, parametros_encoders) pairs.
+
+    The model parameters come from ``espaco['hgb']`` for ``modelo='hgb'``
+    (with encoder settings left empty) and from ``espaco['floresta']`` otherwise.
+    """
+    rng = random.Random(random_state)
+    espaco_modelo = espaco['hgb'] if modelo == 'hgb' else espaco['floresta']
+    grade_modelo = [dict(zip(espaco_modelo, v)) for v in itertools.product(*espaco_modelo.values())]
+    grade_encoders = [{}] if modelo == 'hgb' else \
+        [dict(zip(espaco['encoders'], v)) for v in itertools.product(*espaco['encoders'].values())]
+    todos = list(itertools.product(range(len(grade_modelo)), range(len(grade_encoders))))
+    escolhidos = rng.sample(todos, min(n_candidatos, len(todos)))
+    return [(grade_modelo[i], grade_encoders[j]) for i, j in escolhidos]
+
+
+def buscar(pipeline_obj, df, n_candidatos=20, n_folds=3, modo='aleatorio', fator=3, espaco=None,
+           n_jobs=None, random_state=4242, verbose=True):
+    """Run the search for ``pipeline_obj``'s column configuration on ``df``.
+
+    Returns ``{'melhor': ObesityPipeline, 'parametros': {...}, 'resultados': [...],
+    'segundos': float}``; ``resultados`` is sorted by mean CV accuracy. The
+    model parameters are under ``'floresta'`` / ``'parametros_floresta'``, or
+    ``'hgb'`` / ``'parametros_hgb'`` for a ``modelo='hgb'`` pipeline.
+    """
+    if modo not in ('aleatorio', 'halving'):
+        raise ValueError("modo must be 'aleatorio' or 'halving'")
+    inicio = time.perf_counter()
+    espaco = {**ESPACO_PADRAO, **(espaco or {})}
+    hgb = pipeline_obj.modelo == 'hgb'
+    nome_modelo = 'hgb' if hgb else 'floresta'
+    X = df.drop(columns=pipeline_obj.target)
+    y = df[pipeline_obj.target].to_numpy()
+
+    candidatos = amostrar_candidatos(espaco, n_candidatos, random_state, pipeline_obj.modelo)
+    divisoes = dividir_folds(y, n_folds, random_state)
+    folds = codificar_folds(pipeline_obj, X, y, divisoes, [enc for _, enc in candidatos])
+
+    if modo == 'aleatorio':
+        rodadas = [1.0]
+    else:
+        n_rodadas = max(1, int(np.ceil(np.log(max(len(candidatos), 1)) / np.log(fator))) + 1)
+        rodadas = [float(fator) ** (r - n_rodadas + 1) for r in range(n_rodadas)]
+
+    notas = {}
+    vivos = list(range(len(candidatos)))
+    with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count() or 1,
+                             initializer=_inicializar, initargs=(folds,)) as pool:
+        for r, fracao in enumerate(rodadas):
+            tarefas = []
+            for c in vivos:
+                parametros, encoders = candidatos[c]
+                # built like the final model (the instance's own settings merged
+                # in), so the winner retrained below is the configuration scored
+                if hgb:
+                    classificador = pipeline_obj.construir_classificador(parametros_hgb=parametros)
+                else:
+                    classificador = pipeline_obj.construir_classificador(parametros_floresta={**parametros,
+                                                                                             'n_jobs': 1})
+                for f in range(n_folds):
+                    tarefas.append((c, chave_encoder(encoders), f, classificador, fracao, random_state))
+            por_candidato = {c: [] for c in vivos}
+            for c, _, acuracia, segundos in pool.map(_avaliar, tarefas):
+                por_candidato[c].append((acuracia, segundos))
+            for c, valores in por_candidato.items():
+                notas[c] = {
+                    'acuracia_media': float(np.mean([a for a, _ in valores])),
+                    'acuracia_desvio': float(np.std([a for a, _ in valores])),
+                    'segundos_ajuste': float(sum(s for _, s in valores)),
+                    'fracao_linhas': fracao,
+                    'rodada': r,
+                }
+            if verbose:
+                melhor = max(vivos, key=lambda c: notas[c]['acuracia_media'])
+                print(f"rodada {r}: {len(vivos)} candidatos, {fracao:.0%} das linhas, "
+                      f"melhor acuracia {notas[melhor]['acuracia_media']:.4f}")
+            if r < len(rodadas) - 1:
+                vivos = sorted(vivos, key=lambda c: -notas[c]['acuracia_media'])[:max(1, len(vivos) // fator)]
+
+    # Final ranking: candidates that reached the last round first
+    ordem = sorted(notas, key=lambda c: (-notas[c]['rodada'], -notas[c]['acuracia_media']))
+    chave_modelo = f'parametros_{nome_modelo}'
+    resultados = [{chave_modelo: candidatos[c][0], 'parametros_encoders': candidatos[c][1], **notas[c]}
+                  for c in ordem]
+    vencedor = resultados[0]
+    melhor = pipeline_obj.nova_configuracao(**{chave_modelo: {**getattr(pipeline_obj, chave_modelo),
+                                                              **vencedor[chave_modelo]}},
+                                            parametros_encoders={**pipeline_obj.parametros_encoders,
+                                                                 **vencedor['parametros_encoders']})
+    melhor.treinar(df, verbose=verbose)
+    return {
+        'melhor': melhor,
+        'parametros': {nome_modelo: vencedor[chave_modelo], 'encoders': vencedor['parametros_encoders']},
+        'resultados': resultados,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+__all__ = ["ESPACO_PADRAO", "amostrar_candidatos", "buscar"]
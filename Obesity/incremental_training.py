@@ -0,0 +1,168 @@
+"""Warm-start forest growth for newly labelled rows.
+
+`treinar_incremental` keeps the fitted preprocessor of an ObesityPipeline and
+appends ``n_arvores_extra`` trees to its RandomForestClassifier with
+``warm_start``. The new trees are trained either on the new rows only
+(``dados='novos'``) or on a reservoir sample that represents every row the
+model has seen so far (``dados='reservatorio'``). Training cost therefore
+scales with the new data (or the fixed reservoir size), not with the full
+history.
+
+The reservoir holds raw training rows and is saved inside the pipeline's
+artifacts, so it is only kept when training with ``manter_reservatorio=True``.
+Without it, only ``dados='novos'`` is possible and no rows are retained.
+
+``warm_start`` does not support ``class_weight='balanced'`` (sklearn warns and
+would weight each batch by its own class balance), so the new trees use
+fixed ``pesos_balanceados`` computed from the reservoir, or from the new rows
+when there is no reservoir.
+
+Every tree batch is recorded in ``historico_arvores`` with the tree index
+range, data source, row count and a content hash of the rows it saw.
+"""
+import datetime
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+TAMANHO_RESERVATORIO = 10_000
+
+
+def hash_linhas(df):
+    """Content hash of a DataFrame's rows (order-sensitive)."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def registro_lote(inicio, fim, origem, dados, df=None, linhas=None, hash_dados=None):
+    """Lineage entry of a tree batch; pass ``df`` or its precomputed ``linhas``/``hash_dados``."""
+    if df is not None:
+        linhas, hash_dados = len(df), hash_linhas(df)
+    return {
+        'arvores': [int(inicio), int(fim)],
+        'origem': origem,
+        'dados': dados,
+        'linhas': int(linhas),
+        'hash_dados': hash_dados,
+        'quando': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def pesos_balanceados(contagens):
+    """``class_weight='balanced'`` as a fixed dict, from ``{classe: linhas}`` counts."""
+    total = sum(contagens.values())
+    return {classe: total / (len(contagens) * n) for classe, n in contagens.items()}
+
+
+def resumo_treino(treino, random_state=4242, capacidade=TAMANHO_RESERVATORIO):
+    """Initial reservoir, row count and content hash of a training frame (features + target)."""
+    return {
+        'reservatorio': treino.sample(n=min(len(treino), capacidade), random_state=random_state).reset_index(drop=True),
+        'linhas': int(len(treino)),
+        'hash_dados': hash_linhas(treino),
+    }
+
+
+def atualizar_reservatorio(reservatorio, novos, linhas_vistas, capacidade=TAMANHO_RESERVATORIO, random_state=4242):
+    """Reservoir sampling (algorithm R) of ``novos`` into ``reservatorio``.
+
+    After the update every row seen so far (``linhas_vistas`` before plus the
+    new ones) had the same probability of being kept. Returns the new
+    reservoir (a fresh DataFrame) and the updated ``linhas_vistas``.
+    """
+    novos = novos.reset_index(drop=True)
+    if reservatorio is None:
+        reservatorio = novos.iloc[:0]
+    reservatorio = reservatorio.reset_index(drop=True)
+
+    # Fill free slots first
+    livres = max(0, capacidade - len(reservatorio))
+    reservatorio = pd.concat([reservatorio, novos.iloc[:livres]], ignore_index=True)
+    restantes = novos.iloc[livres:]
+    vistos = linhas_vistas + min(livres, len(novos))
+    if len(restantes):
+        rng = np.random.default_rng(random_state + linhas_vistas)
+        # row k of `restantes` is the (vistos + k + 1)-th row seen
+        sorteio = rng.integers(0, vistos + np.arange(1, len(restantes) + 1))
+        aceitos = np.flatnonzero(sorteio < capacidade)
+        # later rows overwrite earlier ones in the same slot: keep the last
+        posicoes, primeira = np.unique(sorteio[aceitos][::-1], return_index=True)
+        selecao = np.arange(len(reservatorio))
+        selecao[posicoes] = len(reservatorio) + aceitos[::-1][primeira]
+        # select rows (instead of assigning values) so column dtypes are kept
+        reservatorio = pd.concat([reservatorio, restantes], ignore_index=True).iloc[selecao].reset_index(drop=True)
+    return reservatorio, linhas_vistas + len(novos)
+
+
+def treinar_incremental(pipeline_obj, df_novo, n_arvores_extra=50, dados='reservatorio', artefato=None,
+                        capacidade=TAMANHO_RESERVATORIO, random_state=4242):
+    """Add ``n_arvores_extra`` trees to ``pipeline_obj`` (see module docstring).
+
+    When ``artefato`` is given it is loaded first with ``carregar``.
+    Raises ValueError if the rows used for the new trees do not contain every
+    class the forest knows (their predictions would not line up); the
+    reservoir, which covers the whole history, avoids that.
+    """
+    if dados not in ('novos', 'reservatorio'):
+        raise ValueError("dados must be 'novos' or 'reservatorio'")
+    if n_arvores_extra < 1:
+        raise ValueError('n_arvores_extra must be a positive integer')
+    if artefato is not None:
+        pipeline_obj.carregar(artefato)
+    pipeline_obj._exigir_modelo()
+
+    colunas = list(pipeline_obj.expected_columns) + [pipeline_obj.target]
+    faltando = [c for c in colunas if c not in df_novo.columns]
+    if faltando:
+        raise ValueError(f'df_novo is missing columns: {faltando}')
+    df_novo = df_novo[colunas]
+
+    reservatorio = pipeline_obj.carregar_reservatorio()
+    if reservatorio is None:
+        if dados == 'reservatorio':
+            raise ValueError("the pipeline keeps no reservoir; train it with manter_reservatorio=True "
+                             "or use dados='novos'")
+        vistas = pipeline_obj.linhas_vistas + len(df_novo)
+    else:
+        reservatorio, vistas = atualizar_reservatorio(reservatorio, df_novo, pipeline_obj.linhas_vistas,
+                                                      capacidade, random_state)
+    treino = reservatorio if dados == 'reservatorio' else df_novo
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    classificador = pipeline_obj.pipeline.named_steps['classificador']
+    if not isinstance(classificador, RandomForestClassifier):
+        dica = ("; directory artifacts keep it only when saved with salvar(..., formato='mmap', incluir_sklearn=True)"
+                if type(classificador).__name__ == 'FlatForestClassifier' else '')
+        raise ValueError(f'incremental growth needs a random forest, not {type(classificador).__name__}{dica}')
+    y = treino[pipeline_obj.target].to_numpy()
+    classes_treino = np.unique(y)
+    if not np.array_equal(classes_treino, classificador.classes_):
+        raise ValueError(
+            f'rows used for the new trees have classes {list(classes_treino)} but the forest was trained on '
+            f"{list(classificador.classes_)}; use dados='reservatorio' or add rows of the missing classes")
+
+    X = pipeline_obj.pipeline.named_steps['preprocessamento'].transform(treino[pipeline_obj.expected_columns])
+    inicio = len(classificador.estimators_)
+    class_weight = pesos = classificador.class_weight
+    if isinstance(pesos, str):
+        # balanced over every row seen (the reservoir) rather than this batch
+        base = (reservatorio if reservatorio is not None else treino)[pipeline_obj.target]
+        pesos = pesos_balanceados(base.value_counts().to_dict())
+    classificador.set_params(warm_start=True, n_estimators=inicio + n_arvores_extra, class_weight=pesos)
+    try:
+        classificador.fit(X, y)
+    finally:
+        classificador.set_params(warm_start=False, class_weight=class_weight)
+
+    pipeline_obj.reservatorio = reservatorio
+    pipeline_obj.linhas_vistas = vistas
+    pipeline_obj.historico_arvores.append(registro_lote(inicio, len(classificador.estimators_), 'incremental',
+                                                        dados, treino))
+    # new trees: refresh the flat forest and drop memoised predictions
+    pipeline_obj._preparar_inferencia()
+    return pipeline_obj.historico_arvores[-1]
+
+
+__all__ = ["TAMANHO_RESERVATORIO", "atualizar_reservatorio", "hash_linhas", "pesos_balanceados", "registro_lote",
+           "resumo_treino", "treinar_incremental"]
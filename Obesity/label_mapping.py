@@ -0,0 +1,104 @@
+"""Table-driven translation of raw CSV columns into labelled and numeric frames.
+
+A mapping spec is a dict keyed by raw column name; each rule says what the
+column becomes:
+
+    {'CAEC': {'nome': 'Comer Entre Refeições',      # renamed column
+              'valores': {'no': 'Nunca', ...},       # raw value -> label
+              'desconhecidos': 'manter',             # unmapped values: 'manter' or 'nulo' (default)
+              'ordem': ['Nunca', 'Às vezes', ...]},  # ordered Categorical, numbered by position
+     'SMOKE': {'nome': 'Fuma', 'valores': {...},
+               'codigos': {'Sim': 1, 'Não': 0}}}     # numeric value of each label
+
+``traduzir`` applies a spec in one pass per column: the column is factorized
+once and every translation (label, category position, numeric code) is
+computed for its few distinct values and gathered back with a single
+integer index, instead of mapping and re-hashing the full column at each
+step. In the numeric frame, ordered columns are their category position,
+columns with ``codigos`` their code and any other text column its
+alphabetical category code (-1 for missing), the same as
+``astype('category').cat.codes``. Numeric columns without a rule pass
+through unchanged, and rules for columns absent from the frame are ignored.
+"""
+import numpy as np
+import pandas as pd
+
+
+def derivar(espec, alteracoes=None, **padrao):
+    """Copy of ``espec`` with ``padrao`` set on every rule and ``alteracoes[coluna]`` merged into it.
+
+    A value of ``None`` in ``alteracoes`` removes that key from the rule.
+    """
+    novo = {}
+    for coluna, regra in espec.items():
+        regra = {**regra, **padrao, **(alteracoes or {}).get(coluna, {})}
+        novo[coluna] = {chave: valor for chave, valor in regra.items() if valor is not None}
+    return novo
+
+
+def traduzir(df, espec, numerico=False):
+    """``df`` translated by ``espec``; with ``numerico=True``, ``(df, df_num)``."""
+    rotulos, numeros = {}, {}
+    for origem, serie in df.items():
+        regra = espec.get(origem, {})
+        nome = regra.get('nome', origem)
+        if not {'valores', 'ordem', 'codigos'} & regra.keys():
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                rotulos[nome], numeros[nome] = serie.array, serie.cat.codes.to_numpy()
+                continue
+            if pd.api.types.is_numeric_dtype(serie):
+                rotulos[nome] = numeros[nome] = serie.array
+                continue
+        rotulos[nome], numeros[nome] = _traduzir_coluna(serie, regra, numerico)
+    rotulado = pd.DataFrame(rotulos, index=df.index)
+    if not numerico:
+        return rotulado
+    return rotulado, pd.DataFrame(numeros, index=df.index)
+
+
+def _traduzir_coluna(serie, regra, numerico):
+    # codigos indexes `unicos`; -1 (missing) picks the slot appended at the end
+    # of every lookup table below
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, unicos = serie.cat.codes.to_numpy(), np.asarray(serie.cat.categories, dtype=object)
+    else:
+        # the plain ndarray (no copy for object and python-backed 'str' columns)
+        # hashes faster than the Series
+        codigos, unicos = pd.factorize(np.asarray(serie))
+        unicos = np.asarray(unicos, dtype=object)
+    valores = regra.get('valores')
+    if valores is not None:
+        manter = regra.get('desconhecidos', 'nulo') == 'manter'
+        unicos = np.array([valores.get(u, u if manter else np.nan) for u in unicos] + [np.nan], dtype=object)
+    else:
+        unicos = np.append(unicos, np.nan)
+
+    if 'ordem' in regra:
+        posicao = {rotulo: i for i, rotulo in enumerate(regra['ordem'])}
+        tabela = np.array([posicao.get(u, -1) for u in unicos[:-1]] + [-1])
+        categorica = pd.Categorical.from_codes(tabela[codigos], categories=regra['ordem'], ordered=True)
+        return categorica, (categorica.codes if numerico else None)
+
+    rotulos = unicos[codigos]
+    if isinstance(serie.dtype, pd.StringDtype):
+        # keep the string dtype pandas gives mapped text ('str' from pandas 3)
+        rotulos = pd.array(rotulos, dtype=serie.dtype)
+    if not numerico:
+        return rotulos, None
+
+    if 'codigos' in regra:
+        tabela = np.array([regra['codigos'].get(u, np.nan) for u in unicos[:-1]] + [np.nan], dtype=np.float64)
+        numeros = tabela[codigos]
+        if not np.isnan(numeros).any():
+            numeros = numeros.astype(np.int64)
+        return rotulos, numeros
+
+    # only labels that occur (categorical input may carry unused categories)
+    ocorre = np.bincount(codigos + 1, minlength=len(unicos))[1:] > 0
+    categorias = sorted({u for u in unicos[:-1][ocorre] if not pd.isna(u)})
+    posicao = {rotulo: i for i, rotulo in enumerate(categorias)}
+    tabela = np.array([posicao.get(u, -1) for u in unicos[:-1]] + [-1])
+    return rotulos, pd.Categorical.from_codes(tabela[codigos], categories=categorias).codes
+
+
+__all__ = ["derivar", "traduzir"]
@@ -0,0 +1,133 @@
+"""Numeric model matrices derived from Obesity.csv on demand.
+
+``matriz_numerica`` is the encoding of the notebook's ``df_numerico``
+(exported as ``df_numerico.csv``): snake_case Portuguese column names,
+ordinal columns as their position in ``ORDEM_ORDINAIS`` and nominal columns
+one-hot encoded with the first (alphabetical) category dropped, all
+float64. ``matriz_modelo`` is its ``df_modelo`` subset (``COLUNAS_MODELO``).
+
+The matrix is written once per source content as one ``.npy`` per column
+(see feature_cache), keyed by the CSV hash and the definitions below, and
+later calls memory-map it, so editing the CSV or the encoding re-derives it
+and nothing is parsed twice:
+
+    from model_matrix import matriz_numerica
+    df_num = matriz_numerica()          # Obesity/Obesity.csv
+
+Frames built from the cache share its read-only mapped arrays (with
+pandas Copy-on-Write a write copies the touched column); ``copy()`` them
+before writing in place with older pandas.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_cache import FeatureCache
+from label_mapping import traduzir
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+CSV_PADRAO = os.path.join(BASE, 'Obesity.csv')
+DIRETORIO_PADRAO = os.environ.get('OBESITY_MODEL_MATRIX', os.path.join(BASE, '.cache', 'matrizes'))
+# Bump when the encoding changes in a way the definitions below do not capture
+FORMATO = 1
+
+COLUNAS = {
+    'Gender': 'sexo',
+    'Age': 'idade',
+    'Height': 'altura',
+    'Weight': 'peso',
+    'family_history': 'historico_familiar',
+    'FAVC': 'alimentos_caloricos',
+    'FCVC': 'vegetais',
+    'NCP': 'refeicoes_principais',
+    'CAEC': 'entre_refeicoes',
+    'SMOKE': 'fuma',
+    'CH2O': 'agua',
+    'SCC': 'monitora_calorias',
+    'FAF': 'atividade_fisica',
+    'TUE': 'dispositivos_tecnologicos',
+    'CALC': 'alcool',
+    'MTRANS': 'meio_transporte',
+    'Obesity': 'obesidade'
+}
+
+ORDEM_ORDINAIS = {
+    'CAEC': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'CALC': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'Obesity': ['Insufficient_Weight', 'Normal_Weight', 'Overweight_Level_I', 'Overweight_Level_II',
+                'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']
+}
+
+COLUNAS_NOMINAIS = ['Gender', 'family_history', 'FAVC', 'SMOKE', 'SCC', 'MTRANS']
+
+COLUNAS_MODELO = ['idade', 'altura', 'peso', 'vegetais', 'entre_refeicoes', 'agua', 'atividade_fisica',
+                  'dispositivos_tecnologicos', 'alcool', 'historico_familiar_yes', 'alimentos_caloricos_yes',
+                  'monitora_calorias_yes', 'obesidade', 'meio_transporte_Walking']
+
+ESPEC = {coluna: {'nome': nome, **({'ordem': ORDEM_ORDINAIS[coluna]} if coluna in ORDEM_ORDINAIS else {})}
+         for coluna, nome in COLUNAS.items()}
+
+
+def codificar(df):
+    """Model matrix (float64 DataFrame) of a raw Obesity.csv frame.
+
+    Raises ValueError when an ordinal column has a value outside its order.
+    """
+    rotulos, numeros = traduzir(df, ESPEC, numerico=True)
+    colunas = {}
+    for origem, serie in df.items():
+        nome = ESPEC.get(origem, {}).get('nome', origem)
+        if origem in ORDEM_ORDINAIS:
+            fora = (numeros[nome].to_numpy() < 0) & serie.notna().to_numpy()
+            if fora.any():
+                raise ValueError(f'{origem}: values outside {ORDEM_ORDINAIS[origem]}: '
+                                 f'{sorted(serie[fora].unique().tolist())}')
+        if origem not in COLUNAS_NOMINAIS:
+            colunas[nome] = numeros[nome].to_numpy(dtype=np.float64)
+    for origem in COLUNAS_NOMINAIS:
+        nome = COLUNAS[origem]
+        # traduzir numbers nominal columns by their alphabetical category (-1
+        # when missing, all zeros here); the first category is the dropped one
+        codigos = numeros[nome].to_numpy()
+        categorias = sorted(rotulos[nome].dropna().unique())
+        for i, categoria in enumerate(categorias[1:], start=1):
+            colunas[f'{nome}_{categoria}'] = (codigos == i).astype(np.float64)
+    return pd.DataFrame(colunas, index=df.index)
+
+
+def chave(caminho_csv=None, cache=None):
+    """Cache key of ``caminho_csv``'s matrix: its content hash plus the encoding definitions."""
+    return (cache or FeatureCache(DIRETORIO_PADRAO)).chave(
+        caminho_csv or CSV_PADRAO, formato=FORMATO, espec=ESPEC, nominais=COLUNAS_NOMINAIS)
+
+
+def matriz_numerica(caminho_csv=None, cache=None):
+    """``df_numerico`` of ``caminho_csv`` (default ``Obesity/Obesity.csv``), memory-mapped from the cache.
+
+    ``cache`` is a FeatureCache (default: one under ``Obesity/.cache/matrizes``).
+    """
+    caminho_csv = caminho_csv or CSV_PADRAO
+    cache = cache or FeatureCache(DIRETORIO_PADRAO)
+    chave_matriz = chave(caminho_csv, cache)
+    entrada = cache.ler(chave_matriz)
+    if entrada is None:
+        matriz = codificar(pd.read_csv(caminho_csv))
+        arrays = {f'coluna_{i}': matriz[nome].to_numpy() for i, nome in enumerate(matriz.columns)}
+        try:
+            cache.gravar(chave_matriz, arrays=arrays,
+                         meta={'colunas': list(matriz.columns), 'csv': os.path.abspath(caminho_csv)})
+        except OSError:
+            # read-only deployments still get the matrix
+            return matriz
+        entrada = cache.ler(chave_matriz)
+    colunas = entrada['meta']['colunas']
+    return pd.DataFrame({nome: entrada['arrays'][f'coluna_{i}'] for i, nome in enumerate(colunas)}, copy=False)
+
+
+def matriz_modelo(caminho_csv=None, cache=None):
+    """``df_modelo``: the ``COLUNAS_MODELO`` columns of ``matriz_numerica``."""
+    return matriz_numerica(caminho_csv, cache)[COLUNAS_MODELO]
+
+
+__all__ = ["COLUNAS_MODELO", "chave", "codificar", "matriz_modelo", "matriz_numerica"]
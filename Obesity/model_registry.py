@@ -0,0 +1,260 @@
+"""File-based registry of versioned pipeline artifacts.
+
+Layout of a registry root::
+
+    registro.json               index: models, their versions and metadata
+    <nome>/<versao>/...         artifact written by ObesityPipeline.salvar
+
+Every version records how it was built (training-data hash, column
+configuration, forest/encoder settings, library versions, training time
+and its per-stage report),
+its artifact size and a predict latency measured at registration. One
+version per model is *active*; ``resolver`` finds it (or any version) from
+the index alone, without deserialising any artifact, and ``ativar`` switches
+the active version, which makes rollback a metadata update.
+
+ObesityPipeline uses it through ``registrar(nome)`` and
+``carregar('registro:<nome>[@<versao>]')``.
+"""
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import time
+
+import numpy as np
+
+from artifact_store import tamanho_artefato
+
+RAIZ_PADRAO = os.environ.get('OBESITY_MODEL_REGISTRY',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modelos'))
+INDICE = 'registro.json'
+PREFIXO = 'registro:'
+FORMATOS = {'joblib': 'pipeline.pkl', 'mmap': 'pipeline_mmap'}
+
+
+def eh_referencia(caminho):
+    return isinstance(caminho, str) and caminho.startswith(PREFIXO)
+
+
+def separar_referencia(referencia):
+    """``'registro:nome@v2'`` -> ``('nome', 'v2')``; the version is optional."""
+    nome, _, versao = referencia[len(PREFIXO):].partition('@')
+    return nome, versao or None
+
+
+class ModelRegistry:
+    """Versioned artifacts under ``raiz`` (default ``Obesity/modelos`` or ``$OBESITY_MODEL_REGISTRY``)."""
+
+    def __init__(self, raiz=None):
+        self.raiz = raiz or RAIZ_PADRAO
+        self._indice = None
+        self._marca = None
+
+    # ----- index -----
+    def _caminho_indice(self):
+        return os.path.join(self.raiz, INDICE)
+
+    def _ler(self):
+        # the parsed index is reused until the file changes
+        try:
+            info = os.stat(self._caminho_indice())
+        except FileNotFoundError:
+            return {'modelos': {}}
+        marca = (info.st_mtime_ns, info.st_size)
+        if marca != self._marca:
+            with open(self._caminho_indice(), encoding='utf-8') as f:
+                self._indice = json.load(f)
+            self._marca = marca
+        return self._indice
+
+    def _gravar(self, indice):
+        temporario = self._caminho_indice() + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(temporario, self._caminho_indice())
+        self._marca = None
+
+    @contextlib.contextmanager
+    def _bloqueio(self):
+        """Exclusive lock around read-modify-write of the index (POSIX only)."""
+        os.makedirs(self.raiz, exist_ok=True)
+        with open(os.path.join(self.raiz, '.lock'), 'w') as f:
+            try:
+                import fcntl
+            except ImportError:
+                fcntl = None
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+            # released when the file is closed
+
+    # ----- queries -----
+    def modelos(self):
+        return sorted(self._ler()['modelos'])
+
+    def versoes(self, nome):
+        """Metadata of every version of ``nome``, oldest first."""
+        modelo = self._modelo(nome)
+        return [self._completo(m) for m in modelo['versoes'].values()]
+
+    def resolver(self, nome, versao=None):
+        """Metadata of ``versao`` (default: the active version), with an absolute ``caminho``."""
+        modelo = self._modelo(nome)
+        versao = versao or modelo.get('ativa')
+        if versao not in modelo['versoes']:
+            raise KeyError(f'{nome!r} has no version {versao!r}')
+        return self._completo(modelo['versoes'][versao])
+
+    def escolher(self, nome, max_latencia_ms=None, max_bytes=None, metrica='acuracia'):
+        """Best version by ``metrica`` among those within the latency/size budgets."""
+        candidatas = [m for m in self.versoes(nome)
+                      if (max_latencia_ms is None or m['latencia']['registro_p50_ms'] <= max_latencia_ms)
+                      and (max_bytes is None or m['bytes'] <= max_bytes)]
+        if not candidatas:
+            raise LookupError(f'no version of {nome!r} fits the budget')
+        return max(candidatas, key=lambda m: _metrica(m, metrica))
+
+    def _modelo(self, nome):
+        modelos = self._ler()['modelos']
+        if nome not in modelos:
+            raise KeyError(f'model {nome!r} is not registered in {self.raiz}')
+        return modelos[nome]
+
+    def _completo(self, meta):
+        return {**meta, 'caminho': os.path.join(self.raiz, meta['artefato'])}
+
+    # ----- updates -----
+    def registrar(self, pipeline_obj, nome, formato='mmap', ativar=True, metricas=None, medir_latencia=True):
+        """Save ``pipeline_obj`` as a new version of ``nome`` and return its metadata."""
+        if formato not in FORMATOS:
+            raise ValueError(f'formato must be one of {sorted(FORMATOS)}')
+        pipeline_obj._exigir_modelo()
+        with self._bloqueio():
+            indice = self._ler()
+            modelo = indice['modelos'].setdefault(nome, {'ativa': None, 'versoes': {}})
+            numero = 1 + max((int(v[1:]) for v in modelo['versoes']), default=0)
+            versao = f'v{numero}'
+            relativo = os.path.join(nome, versao, FORMATOS[formato])
+            destino = os.path.join(self.raiz, relativo)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            pipeline_obj.salvar(destino, formato=formato)
+
+            meta = {
+                'nome': nome,
+                'versao': versao,
+                'criado': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'artefato': relativo,
+                'formato': formato,
+                'bytes': tamanho_artefato(destino),
+                **descrever(pipeline_obj),
+                'latencia': medir_latencia_predicao(pipeline_obj) if medir_latencia else None,
+                'metricas': metricas or {},
+            }
+            modelo['versoes'][versao] = meta
+            if ativar or modelo['ativa'] is None:
+                modelo['ativa'] = versao
+            self._gravar(indice)
+        return self._completo(meta)
+
+    def ativar(self, nome, versao):
+        """Make ``versao`` the active version of ``nome`` (e.g. to roll back)."""
+        with self._bloqueio():
+            indice = self._ler()
+            modelo = indice['modelos'].get(nome)
+            if modelo is None or versao not in modelo['versoes']:
+                raise KeyError(f'{nome!r} has no version {versao!r}')
+            modelo['ativa'] = versao
+            self._gravar(indice)
+
+    def remover(self, nome, versao):
+        """Delete a version that is not active."""
+        with self._bloqueio():
+            indice = self._ler()
+            modelo = indice['modelos'].get(nome)
+            if modelo is None or versao not in modelo['versoes']:
+                raise KeyError(f'{nome!r} has no version {versao!r}')
+            if modelo['ativa'] == versao:
+                raise ValueError(f'{nome}@{versao} is active; activate another version first')
+            meta = modelo['versoes'].pop(versao)
+            self._gravar(indice)
+        shutil.rmtree(os.path.dirname(os.path.join(self.raiz, meta['artefato'])), ignore_errors=True)
+
+
+def descrever(pipeline_obj):
+    """Build metadata of a fitted ObesityPipeline (no artifact I/O)."""
+    import sklearn
+
+    historico = pipeline_obj.historico_arvores or [{}]
+    classificador = pipeline_obj.pipeline.named_steps['classificador']
+    return {
+        'hash_dados': historico[0].get('hash_dados'),
+        'linhas_treino': historico[0].get('linhas'),
+        'historico_arvores': pipeline_obj.historico_arvores,
+        'colunas': {
+            'target': pipeline_obj.target,
+            'col_ordinais': pipeline_obj.col_ordinais,
+            'ordem_ordinais': dict(zip(pipeline_obj.col_ordinais, pipeline_obj.ordem_ordinais)),
+            'col_nominais': pipeline_obj.col_nominais,
+            'col_numericas': pipeline_obj.col_numericas,
+        },
+        'classes': [str(c) for c in pipeline_obj.classes_],
+        'modelo': type(classificador).__name__,
+        'parametros_classificador': {k: v for k, v in classificador.get_params().items()
+                                     if isinstance(v, (str, int, float, bool, type(None)))},
+        'parametros_encoders': {**pipeline_obj.PARAMETROS_ENCODERS_PADRAO, **pipeline_obj.parametros_encoders},
+        'segundos_treino': pipeline_obj.segundos_treino,
+        'relatorio_treino': pipeline_obj.relatorio_treino,
+        'versoes': {'sklearn': sklearn.__version__, 'numpy': np.__version__,
+                    'python': platform.python_version()},
+    }
+
+
+def medir_latencia_predicao(pipeline_obj, repeticoes=200, linhas_lote=1000):
+    """Single-record p50/p95 latency (ms) and batch cost per row (µs) of ``prever``.
+
+    The prediction cache, if active, is set aside while timing: the same
+    record repeated would otherwise measure cache hits.
+    """
+    cache, pipeline_obj.cache = pipeline_obj.cache, None
+    try:
+        return _medir(pipeline_obj, repeticoes, linhas_lote)
+    finally:
+        pipeline_obj.cache = cache
+
+
+def _medir(pipeline_obj, repeticoes, linhas_lote):
+    registro = dict(pipeline_obj.defaults)
+    pipeline_obj.prever(registro)  # warm-up
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        pipeline_obj.prever(registro)
+        tempos.append(time.perf_counter() - inicio)
+    latencia = {
+        'motor': pipeline_obj.motor,
+        'registro_p50_ms': float(np.percentile(tempos, 50) * 1e3),
+        'registro_p95_ms': float(np.percentile(tempos, 95) * 1e3),
+    }
+    reservatorio = pipeline_obj.carregar_reservatorio()
+    if reservatorio is not None and len(reservatorio):
+        lote = reservatorio.drop(columns=pipeline_obj.target).sample(n=linhas_lote, replace=True, random_state=0)
+        inicio = time.perf_counter()
+        pipeline_obj.prever_lote(lote)
+        latencia['lote_us_por_linha'] = float((time.perf_counter() - inicio) / linhas_lote * 1e6)
+    return latencia
+
+
+def _metrica(meta, metrica):
+    # versions registered without metricas fall back to the held-out
+    # evaluation of their training report
+    metricas = meta.get('metricas') or {}
+    if metrica not in metricas:
+        metricas = ((meta.get('relatorio_treino') or {}).get('avaliacao')) or {}
+    return metricas.get(metrica, float('-inf'))
+
+
+__all__ = ["ModelRegistry", "PREFIXO", "descrever", "eh_referencia", "medir_latencia_predicao",
+           "separar_referencia"]
@@ -0,0 +1,74 @@
+"""Inference-only runtime for saved obesity pipelines.
+
+Loads a directory artifact written by ``ObesityPipeline.salvar(caminho,
+formato='mmap')`` and predicts with the compiled preprocessing tables and the
+memory-mapped flattened forest. It imports only the standard library, NumPy
+and the small engine modules of this folder: no pandas, no scikit-learn, no
+joblib. Use it in scoring workers or pages that only need ``carregar`` +
+``prever``; training and evaluation stay in obesity_pipeline.py.
+
+    from obesity_inference import ObesityInference
+    modelo = ObesityInference('Obesity/pipeline_obesidade_mmap')
+    modelo.prever({'Age': 25, 'Height': 1.7, 'Weight': 70, ...})
+"""
+import numpy as np
+
+from artifact_store import carregar_floresta, ler_manifesto
+from fast_preprocess import CompiledPreprocessor
+
+
+class ObesityInference:
+    """Predict from a directory artifact without the training stack.
+
+    Parameters
+    - caminho: artifact directory written by ``salvar(..., formato='mmap')``
+    - mmap: memory-map the forest arrays (default) instead of reading them
+    """
+
+    def __init__(self, caminho, mmap=True):
+        manifesto = ler_manifesto(caminho)
+        compilado = manifesto.get('preprocessamento_compilado')
+        if compilado is None:
+            raise ValueError(f'{caminho} has no compiled preprocessing; load it with ObesityPipeline.carregar')
+        self.caminho = caminho
+        self.defaults = manifesto.get('defaults', {})
+        self.expected_columns = manifesto.get('expected_columns', [])
+        self.preprocessamento = CompiledPreprocessor.from_dict(compilado)
+        self.floresta = carregar_floresta(caminho, manifesto, mmap=mmap)
+
+    @property
+    def classes_(self):
+        return self.floresta.classes
+
+    def transformar(self, registros):
+        """Encode a dict or list of dicts (missing keys take the saved defaults)."""
+        return self.preprocessamento.transform(_como_lista(registros), self.defaults)
+
+    def prever(self, registros):
+        """Labels for a dict or a list of dicts, same as ``ObesityPipeline.prever``."""
+        return self.floresta.predict(self.transformar(registros))
+
+    def prever_com_probabilidades(self, registros, top_k=3, dtype=np.float64):
+        """Labels, class probabilities and top-k classes from one forest pass."""
+        proba = self.floresta.predict_proba(self.transformar(registros))
+        top_k = max(1, min(int(top_k), proba.shape[1]))
+        ordem_top = np.argsort(-proba, axis=1, kind='stable')[:, :top_k]
+        return {
+            'rotulos': self.classes_.take(ordem_top[:, 0]),
+            'probabilidades': proba.astype(dtype, copy=False),
+            'classes': self.classes_,
+            'top_k': self.classes_.take(ordem_top),
+            'top_k_probabilidades': np.take_along_axis(proba, ordem_top, axis=1).astype(dtype, copy=False),
+        }
+
+
+def _como_lista(registros):
+    if isinstance(registros, dict):
+        return [registros]
+    registros = list(registros)
+    if not all(isinstance(r, dict) for r in registros):
+        raise TypeError('registros must be a dict or an iterable of dicts')
+    return registros
+
+
+__all__ = ["ObesityInference"]
@@ -1,13 +1,12 @@
 import os
-import pickle
+import time
+import numpy as np
 import pandas as pd
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OrdinalEncoder, OneHotEncoder, MinMaxScaler
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
-import joblib
+
+# Training/evaluation dependencies (sklearn estimators, metrics, joblib,
+# pickle) are imported inside the methods that use them so that processes
+# which only load an artifact and predict do not pay for them at import time.
+# See obesity_inference.py for a runtime that does not import sklearn at all.
 
 class ObesityPipeline:
     """Lightweight wrapper around an sklearn Pipeline for the obesity dataset.
@@ -18,49 +17,281 @@ class ObesityPipeline:
     - col_nominais: list of nominal column names
     - col_numericas: list of numeric column names
     - target: name of the target column in the dataframe (default: 'Obesity')
+    - motor: inference engine used by prever/prever_lote, one of MOTORES.
+      'sklearn' runs the fitted Pipeline; 'numpy' keeps the sklearn
+      preprocessing but evaluates the forest with forest_engine.FlatForest
+      (identical results, far less per-call overhead; random forests only,
+      other models always use sklearn).
+    - modelo: classifier family, one of MODELOS. 'floresta' is a
+      RandomForestClassifier on one-hot nominals and scaled numerics; 'hgb' is
+      a HistGradientBoostingClassifier that takes nominals as native
+      categorical features (ordinal codes, no one-hot) and bins numerics
+      itself (no scaling).
+    - parametros_floresta: RandomForestClassifier kwargs over PARAMETROS_FLORESTA_PADRAO
+    - parametros_hgb: HistGradientBoostingClassifier kwargs over PARAMETROS_HGB_PADRAO
+    - parametros_encoders: encoder settings over PARAMETROS_ENCODERS_PADRAO
+      (see construir_preprocessador)
     """
 
-    def __init__(self, col_ordinais, ordem_ordinais, col_nominais, col_numericas, target='Obesity'):
+    MOTORES = ('sklearn', 'numpy')
+    MODELOS = ('floresta', 'hgb')
+    PARAMETROS_FLORESTA_PADRAO = {'random_state': 4242, 'class_weight': 'balanced'}
+    PARAMETROS_HGB_PADRAO = {'random_state': 4242, 'class_weight': 'balanced', 'max_iter': 200}
+    PARAMETROS_ENCODERS_PADRAO = {'nominais_drop': 'first', 'escalonar_numericas': True}
+
+    def __init__(self, col_ordinais, ordem_ordinais, col_nominais, col_numericas, target='Obesity', motor='sklearn',
+                 parametros_floresta=None, parametros_encoders=None, modelo='floresta', parametros_hgb=None):
         self.col_ordinais = list(col_ordinais) if col_ordinais is not None else []
         # create categories list for OrdinalEncoder in same order as col_ordinais
         self.ordem_ordinais = [ordem_ordinais.get(col) for col in self.col_ordinais] if ordem_ordinais else []
         self.col_nominais = list(col_nominais) if col_nominais is not None else []
         self.col_numericas = list(col_numericas) if col_numericas is not None else []
         self.target = target
-        self.pipeline = None
+        self.parametros_floresta = dict(parametros_floresta or {})
+        self.parametros_encoders = dict(parametros_encoders or {})
+        if modelo not in self.MODELOS:
+            raise ValueError(f'modelo must be one of {self.MODELOS}, got {modelo!r}')
+        self.modelo = modelo
+        self.parametros_hgb = dict(parametros_hgb or {})
+        self._pipeline = None
+        # callable that loads the sklearn Pipeline on first use (mmap artifacts)
+        self._carregador_pipeline = None
+        # fitted ColumnTransformer, also available without the full pipeline
+        self._preprocessador = None
         self.model = None
         # defaults collected during training (col -> default value)
         self.defaults = {}
         # expected input columns order for prediction
         self.expected_columns = self.col_ordinais + self.col_nominais + self.col_numericas
+        if motor not in self.MOTORES:
+            raise ValueError(f'motor must be one of {self.MOTORES}, got {motor!r}')
+        self.motor = motor
+        # flattened forest used when motor == 'numpy' (built after fit/load)
+        self.floresta_plana = None
+        # lookup-table version of the fitted preprocessor for dict inputs
+        self.preprocessamento_compilado = None
+        # optional prediction memoisation (see ativar_cache)
+        self.cache = None
+        # lineage of tree batches and the sample of seen rows used by treinar_incremental
+        self.historico_arvores = []
+        self.reservatorio = None
+        self.linhas_vistas = 0
+        self._carregador_reservatorio = None
+        # wall time of the last treinar/treinar_csv call, its per-stage cost report
+        # (training_report) and the registry entry of a loaded model
+        self.segundos_treino = None
+        self.relatorio_treino = None
+        self.versao_registro = None
 
-    def construir_pipeline(self):
+    @property
+    def pipeline(self):
+        # Directory artifacts defer reading the sklearn Pipeline until needed
+        if self._pipeline is None and self._carregador_pipeline is not None:
+            self._pipeline = self._carregador_pipeline()
+            self._carregador_pipeline = None
+        return self._pipeline
+
+    @pipeline.setter
+    def pipeline(self, valor):
+        self._pipeline = valor
+        self._carregador_pipeline = None
+
+    @property
+    def classes_(self):
+        if self.floresta_plana is not None:
+            return self.floresta_plana.classes
+        return self.pipeline.classes_
+
+    def _exigir_modelo(self):
+        if self._pipeline is None and self._carregador_pipeline is None and self.floresta_plana is None:
+            raise RuntimeError('Pipeline not fitted or loaded.')
+
+    def construir_preprocessador(self, parametros_encoders=None):
+        """Unfitted ColumnTransformer for the configured columns.
+
+        ``parametros_encoders`` (merged over ``self.parametros_encoders``):
+        - nominais_drop: ``drop`` of the OneHotEncoder ('first' or None)
+        - escalonar_numericas: MinMaxScaler on numeric columns (True) or passthrough
+
+        With ``modelo='hgb'`` nominals are ordinal-coded (unknown -> -1, which
+        the booster treats as missing) and numerics pass through unchanged;
+        the encoder settings above do not apply.
+        """
+        from sklearn.compose import ColumnTransformer
+        from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder
+
+        parametros = {**self.PARAMETROS_ENCODERS_PADRAO, **self.parametros_encoders, **(parametros_encoders or {})}
         transformers = []
+        hgb = self.modelo == 'hgb'
         if self.col_ordinais:
             # Allow unknown ordinal categories during transform by using a special encoded value
             transformers.append(('ordinais', OrdinalEncoder(categories=self.ordem_ordinais,
                                                             handle_unknown='use_encoded_value',
                                                             unknown_value=-1), self.col_ordinais))
-        if self.col_nominais:
+        if self.col_nominais and hgb:
+            # native categorical features: category codes, no one-hot expansion
+            transformers.append(('nominais', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1),
+                                 self.col_nominais))
+        elif self.col_nominais:
             # Ignore unknown categories at transform time
-            transformers.append(('nominais', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore'), self.col_nominais))
+            transformers.append(('nominais', OneHotEncoder(drop=parametros['nominais_drop'], sparse_output=False,
+                                                           handle_unknown='ignore'), self.col_nominais))
         if self.col_numericas:
-            transformers.append(('numericas', MinMaxScaler(), self.col_numericas))
+            # the booster bins numerics itself, so scaling would change nothing
+            escala = MinMaxScaler() if parametros['escalonar_numericas'] and not hgb else 'passthrough'
+            transformers.append(('numericas', escala, self.col_numericas))
+
+        return ColumnTransformer(transformers=transformers, remainder='drop')
+
+    def construir_classificador(self, parametros_floresta=None, parametros_hgb=None):
+        """Unfitted classifier for ``self.modelo`` (given parameters merged over the instance's)."""
+        if self.modelo == 'hgb':
+            from sklearn.ensemble import HistGradientBoostingClassifier
+
+            # nominal codes follow the ordinal columns in the preprocessor output
+            inicio = len(self.col_ordinais)
+            categoricas = list(range(inicio, inicio + len(self.col_nominais))) or None
+            return HistGradientBoostingClassifier(**{'categorical_features': categoricas,
+                                                     **self.PARAMETROS_HGB_PADRAO, **self.parametros_hgb,
+                                                     **(parametros_hgb or {})})
+        from sklearn.ensemble import RandomForestClassifier
 
-        preprocessor = ColumnTransformer(transformers=transformers, remainder='drop')
+        return RandomForestClassifier(**{**self.PARAMETROS_FLORESTA_PADRAO, **self.parametros_floresta,
+                                         **(parametros_floresta or {})})
+
+    def construir_pipeline(self):
+        from sklearn.pipeline import Pipeline
 
         self.pipeline = Pipeline(steps=[
-            ('preprocessamento', preprocessor),
-            ('classificador', RandomForestClassifier(random_state=4242, test_size=0.3, class_weight='balanced'))
+            ('preprocessamento', self.construir_preprocessador()),
+            ('classificador', self.construir_classificador())
         ])
 
-    def treinar(self, df, test_size=0.3, random_state=4242, class_weight='balanced'):
-        self.construir_pipeline()
-        # Prepare feature matrix and target
-        X = df.drop(columns=self.target)
-        y = df[self.target]
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
-        self.pipeline.fit(X_train, y_train)
+    def nova_configuracao(self, **kwargs):
+        """Unfitted ObesityPipeline with the same column configuration (kwargs override)."""
+        config = dict(
+            col_ordinais=self.col_ordinais,
+            ordem_ordinais=dict(zip(self.col_ordinais, self.ordem_ordinais)),
+            col_nominais=self.col_nominais,
+            col_numericas=self.col_numericas,
+            target=self.target,
+            motor=self.motor,
+            parametros_floresta=self.parametros_floresta,
+            parametros_encoders=self.parametros_encoders,
+            modelo=self.modelo,
+            parametros_hgb=self.parametros_hgb,
+        )
+        config.update(kwargs)
+        return ObesityPipeline(**config)
+
+    def buscar_hiperparametros(self, df, **kwargs):
+        """Parallel randomized / successive-halving search over model and encoder settings.
+
+        Each CV fold is encoded once per encoder setting and reused by every
+        candidate; ``modelo='hgb'`` pipelines search the booster's settings.
+        Returns a dict with ``melhor`` (an ObesityPipeline trained with the
+        best settings, ready for ``salvar``), ``parametros`` and the
+        per-candidate ``resultados``. See hyperparameter_search.buscar for the
+        keyword arguments.
+        """
+        from hyperparameter_search import buscar
+        return buscar(self, df, **kwargs)
+
+    def comprimir(self, df_validacao, max_perda=0.01, max_latencia_ms=None, max_bytes=None, **kwargs):
+        """Smaller forests (tree subsets, depth pruning, distillation) measured on held-out rows.
+
+        Returns the accuracy/latency/size of every candidate, the frontier and,
+        under ``'pipeline'``, a new ObesityPipeline with the cheapest
+        candidate that loses at most ``max_perda`` accuracy and fits the
+        budgets. See forest_compression.comprimir.
+        """
+        from forest_compression import comprimir
+        return comprimir(self, df_validacao, max_perda=max_perda, max_latencia_ms=max_latencia_ms,
+                         max_bytes=max_bytes, **kwargs)
+
+    def validar_cruzado(self, df, n_folds=5, **kwargs):
+        """Stratified k-fold evaluation of this configuration, folds in parallel processes.
+
+        Does not fit ``self``. Returns per-fold metrics and timings, mean/std
+        accuracy and the confusion matrix merged over folds (see
+        cross_validation.validar_cruzado for the keyword arguments).
+        """
+        from cross_validation import validar_cruzado
+        return validar_cruzado(self, df, n_folds=n_folds, **kwargs)
+
+    def treinar(self, df, test_size=0.3, random_state=4242, class_weight='balanced', verbose=True,
+                relatorio=False, medir_memoria=True, manter_reservatorio=False):
+        """Fit on a random split of ``df`` and return the held-out ``(X_test, y_test)``.
+
+        The wall time, CPU time and peak memory of every stage (split, encoder
+        fit, model fit, training summary, inference setup, evaluation), the
+        test metrics (training_report.avaliar) and the model size/depth
+        statistics are kept in ``relatorio_treino`` (see training_report) and saved next to the
+        artifact by ``salvar``. ``relatorio=True`` also returns that report as
+        a third value; ``medir_memoria`` selects how memory is measured
+        (training_report.RelatorioTreino).
+
+        ``manter_reservatorio=True`` keeps a sample of up to
+        TAMANHO_RESERVATORIO raw training rows for ``treinar_incremental``
+        (see incremental_training). The sample is saved inside every artifact,
+        so it is off by default: artifacts then carry no training rows.
+        """
+        from sklearn.model_selection import train_test_split
+
+        from incremental_training import resumo_treino
+        from training_report import RelatorioTreino, avaliar, estatisticas_modelo
+
+        medicao = RelatorioTreino(medir_memoria=medir_memoria)
+        with medicao.medir():
+            inicio = time.perf_counter()
+            with medicao.etapa('dividir'):
+                self.construir_pipeline()
+                # Prepare feature matrix and target
+                X = df.drop(columns=self.target)
+                y = df[self.target]
+                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size,
+                                                                    random_state=random_state)
+            # the two steps of Pipeline.fit, run separately so each one is measured
+            with medicao.etapa('ajustar_encoders'):
+                X_codificado = self.pipeline.named_steps['preprocessamento'].fit_transform(X_train)
+            with medicao.etapa('ajustar_modelo'):
+                self.pipeline.named_steps['classificador'].fit(X_codificado, y_train)
+            with medicao.etapa('resumo_treino'):
+                self.defaults = self._calcular_defaults(X_train)
+                # record expected columns order for building input rows later
+                self.expected_columns = [c for c in (self.col_ordinais + self.col_nominais + self.col_numericas)
+                                         if c in X_train.columns]
+                self._registrar_treino(resumo_treino(
+                    X_train[self.expected_columns].assign(**{self.target: y_train}), random_state),
+                    manter_reservatorio)
+            with medicao.etapa('preparar_inferencia'):
+                self._preparar_inferencia()
+            self.segundos_treino = time.perf_counter() - inicio
+            with medicao.etapa('avaliar'):
+                y_pred = self.pipeline.predict(X_test)
+        medicao.dados = {'linhas_treino': int(len(X_train)), 'linhas_teste': int(len(X_test)),
+                         'colunas_entrada': len(self.expected_columns),
+                         'colunas_codificadas': int(X_codificado.shape[1])}
+        medicao.avaliacao = avaliar(y_test, y_pred)
+        medicao.modelo = estatisticas_modelo(self.pipeline.named_steps['classificador'])
+        self.relatorio_treino = medicao.como_dict()
+        if verbose:
+            self._imprimir_avaliacao(y_test, y_pred)
+        if relatorio:
+            return X_test, y_test, self.relatorio_treino
+        return X_test, y_test
+
+    def _imprimir_avaliacao(self, y_test, y_pred):
+        from sklearn.metrics import accuracy_score, classification_report
+
+        from training_report import formatar
+
+        print(f"Acurácia: {accuracy_score(y_test, y_pred):.4f}")
+        print("\nRelatório de Classificação:")
+        print(classification_report(y_test, y_pred, zero_division=0))
+        print(formatar(self.relatorio_treino))
+
+    def _calcular_defaults(self, X_train):
         # compute sensible defaults from training set to allow partial inputs at predict time
         defaults = {}
         for col in self.col_numericas:
@@ -79,58 +310,496 @@ class ObesityPipeline:
                         defaults[col] = cats[0] if cats else None
                     else:
                         defaults[col] = None
-        self.defaults = defaults
-        # record expected columns order for building input rows later
-        self.expected_columns = [c for c in (self.col_ordinais + self.col_nominais + self.col_numericas) if c in X_train.columns]
-        y_pred = self.pipeline.predict(X_test)
-        print(f"Acurácia: {accuracy_score(y_test, y_pred):.4f}")
-        print("\nRelatório de Classificação:")
-        print(classification_report(y_test, y_pred, zero_division=0))
+        return defaults
+
+    def _registrar_treino(self, resumo, manter_reservatorio=False):
+        # resumo: incremental_training.resumo_treino of the training rows; the
+        # reservoir (raw rows) is only kept, and so saved, when asked for
+        from incremental_training import registro_lote
+
+        classificador = self.pipeline.named_steps['classificador']
+        # forests count trees; boosters count iterations
+        n_arvores = len(getattr(classificador, 'estimators_', ())) or getattr(classificador, 'n_iter_', 0)
+        self.historico_arvores = [registro_lote(0, n_arvores, 'treinar', 'treino', linhas=resumo['linhas'],
+                                                hash_dados=resumo['hash_dados'])]
+        self.reservatorio = resumo['reservatorio'] if manter_reservatorio else None
+        self.linhas_vistas = resumo['linhas']
+        self._carregador_reservatorio = None
+
+    def treinar_csv(self, caminho_csv, test_size=0.3, random_state=4242, verbose=True, cache=None,
+                    relatorio=False, medir_memoria=True, manter_reservatorio=False):
+        """``treinar`` on a CSV file, reusing encoded matrices from the feature cache.
+
+        The split, fitted preprocessor, encoded X/y, defaults and initial
+        reservoir are stored in a FeatureCache keyed by the CSV content and
+        the column/encoder configuration. A repeat run memory-maps them and
+        only fits the forest: no CSV parsing and no encoding. Produces the
+        same model as ``treinar(pd.read_csv(caminho_csv))``. ``cache`` is a
+        FeatureCache (default: ``FeatureCache()``). Returns the encoded test
+        matrix and its labels (plus ``relatorio_treino`` when ``relatorio=True``;
+        the cache lookup or encoding is its ``'cache'`` stage). ``manter_reservatorio``
+        is the same as in ``treinar``.
+        """
+        from sklearn.pipeline import Pipeline
+
+        from feature_cache import FeatureCache
+        from training_report import RelatorioTreino, avaliar, estatisticas_modelo
+
+        medicao = RelatorioTreino(medir_memoria=medir_memoria)
+        with medicao.medir():
+            inicio = time.perf_counter()
+            with medicao.etapa('cache'):
+                cache = cache or FeatureCache()
+                chave = cache.chave(caminho_csv, target=self.target, col_ordinais=self.col_ordinais,
+                                    ordem_ordinais=self.ordem_ordinais, col_nominais=self.col_nominais,
+                                    col_numericas=self.col_numericas,
+                                    parametros_encoders={**self.PARAMETROS_ENCODERS_PADRAO,
+                                                         **self.parametros_encoders},
+                                    modelo=self.modelo,
+                                    test_size=test_size, random_state=random_state)
+                entrada = cache.ler(chave)
+                acerto = entrada is not None
+                if entrada is None:
+                    entrada = self._codificar_para_cache(cache, chave, caminho_csv, test_size, random_state)
+                arrays, objetos, meta = entrada['arrays'], entrada['objetos'], entrada['meta']
+
+            with medicao.etapa('ajustar_modelo'):
+                classificador = self.construir_classificador()
+                # labels as object, like the Series treinar fits on
+                classificador.fit(arrays['X_treino'], arrays['y_treino'].astype(object))
+            with medicao.etapa('resumo_treino'):
+                self.pipeline = Pipeline(steps=[('preprocessamento', objetos['preprocessador']),
+                                                ('classificador', classificador)])
+                self.defaults = meta['defaults']
+                self.expected_columns = meta['expected_columns']
+                self._registrar_treino({'reservatorio': objetos['reservatorio'], **meta['treino']},
+                                       manter_reservatorio)
+            with medicao.etapa('preparar_inferencia'):
+                self._preparar_inferencia()
+            self.segundos_treino = time.perf_counter() - inicio
+            X_test, y_test = arrays['X_teste'], arrays['y_teste'].astype(object)
+            with medicao.etapa('avaliar'):
+                y_pred = classificador.predict(X_test)
+        medicao.dados = {'linhas_treino': int(len(arrays['X_treino'])), 'linhas_teste': int(len(X_test)),
+                         'colunas_entrada': len(self.expected_columns),
+                         'colunas_codificadas': int(arrays['X_treino'].shape[1]),
+                         'cache': 'acerto' if acerto else 'falha'}
+        medicao.avaliacao = avaliar(y_test, y_pred)
+        medicao.modelo = estatisticas_modelo(classificador)
+        self.relatorio_treino = medicao.como_dict()
+        if verbose:
+            self._imprimir_avaliacao(y_test, y_pred)
+        if relatorio:
+            return X_test, y_test, self.relatorio_treino
         return X_test, y_test
 
+    def treinar_fora_de_memoria(self, caminho_csv, linhas_por_arvore=10_000, linhas_por_bloco=100_000, **kwargs):
+        """Fit on a CSV file larger than memory, reading it in blocks.
+
+        Encoders are fitted from streamed category sets and min/max, and each
+        tree is fitted on its own reservoir sample of at most
+        ``linhas_por_arvore`` training rows, so peak memory does not depend on
+        the file size. Returns ``(X_test, y_test)`` of a test-row sample like
+        ``treinar``. See out_of_core_training.treinar_fora_de_memoria.
+        """
+        from out_of_core_training import treinar_fora_de_memoria
+        return treinar_fora_de_memoria(self, caminho_csv, linhas_por_arvore=linhas_por_arvore,
+                                       linhas_por_bloco=linhas_por_bloco, **kwargs)
+
+    def _codificar_para_cache(self, cache, chave, caminho_csv, test_size, random_state):
+        from sklearn.model_selection import train_test_split
+
+        from incremental_training import resumo_treino
+
+        df = pd.read_csv(caminho_csv)
+        X = df.drop(columns=self.target)
+        y = df[self.target]
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+        preprocessador = self.construir_preprocessador()
+        # the forest works in float32 internally, so caching float32 gives the same
+        # trees; the booster bins float64 values, so its matrices stay float64
+        dtype = np.float32 if self.modelo == 'floresta' else np.float64
+        X_treino = preprocessador.fit_transform(X_train).astype(dtype)
+        X_teste = preprocessador.transform(X_test).astype(dtype)
+        expected_columns = [c for c in (self.col_ordinais + self.col_nominais + self.col_numericas)
+                            if c in X_train.columns]
+        resumo = resumo_treino(X_train[expected_columns].assign(**{self.target: y_train}), random_state)
+        reservatorio = resumo.pop('reservatorio')
+        meta = {
+            'csv': os.path.abspath(caminho_csv),
+            'defaults': {k: (v.item() if isinstance(v, np.generic) else v)
+                         for k, v in self._calcular_defaults(X_train).items()},
+            'expected_columns': expected_columns,
+            'treino': resumo,
+        }
+        cache.gravar(chave, arrays={'X_treino': X_treino, 'y_treino': y_train.to_numpy(),
+                                    'X_teste': X_teste, 'y_teste': y_test.to_numpy()},
+                     objetos={'preprocessador': preprocessador, 'reservatorio': reservatorio}, meta=meta)
+        # read back so first and repeat runs train on identical inputs
+        return cache.ler(chave)
+
+    def treinar_incremental(self, df_novo, n_arvores_extra=50, dados='reservatorio', artefato=None, **kwargs):
+        """Grow the fitted forest with trees trained on newly labelled rows.
+
+        Keeps the fitted preprocessor and adds ``n_arvores_extra`` trees with
+        ``warm_start``, trained on ``df_novo`` (``dados='novos'``) or on the
+        reservoir sample of all rows seen so far (``dados='reservatorio'``,
+        which needs a pipeline trained with ``manter_reservatorio=True``).
+        Loads ``artefato`` first when given. Returns the ``historico_arvores``
+        entry of the new batch. See incremental_training.treinar_incremental.
+        """
+        from incremental_training import treinar_incremental
+        return treinar_incremental(self, df_novo, n_arvores_extra=n_arvores_extra, dados=dados,
+                                   artefato=artefato, **kwargs)
+
+    def carregar_reservatorio(self):
+        """Reservoir sample of seen rows (read lazily from directory artifacts)."""
+        if self.reservatorio is None and self._carregador_reservatorio is not None:
+            self.reservatorio = self._carregador_reservatorio()
+            self._carregador_reservatorio = None
+        return self.reservatorio
+
     def prever(self, df_novo):
-        if self.pipeline is None:
-            raise RuntimeError('Pipeline not fitted or loaded.')
-        # Accept dict/Series/DataFrame inputs. Build a DataFrame with expected columns and fill missing with defaults.
-        if isinstance(df_novo, dict):
-            df_tmp = pd.DataFrame([df_novo])
-        elif isinstance(df_novo, pd.Series):
-            df_tmp = pd.DataFrame([df_novo.to_dict()])
+        self._exigir_modelo()
+        # Accept dict/list of dicts/Series/DataFrame inputs. Build a DataFrame with expected columns and fill missing with defaults.
+        registros = _como_registros(df_novo)
+        if registros is not None:
+            if not registros:
+                return np.empty(0, dtype=self.classes_.dtype)
+            if self.cache is not None:
+                return self._prever_registros_com_cache(registros)
+            return self._prever_registros(registros)
+        if isinstance(df_novo, pd.DataFrame):
+            if not len(df_novo):
+                return np.empty(0, dtype=self.classes_.dtype)
+            return self._prever_df(df_novo.copy())
+        raise TypeError('df_novo must be a dict, a list of dicts, pandas.Series or pandas.DataFrame')
+
+    def _prever_registros(self, registros):
+        if self.preprocessamento_compilado is not None:
+            # Fast path: records go straight to a feature matrix, no DataFrame
+            return self._prever_matriz(self.preprocessamento_compilado.transform(registros, self.defaults))
+        return self._prever_df(pd.DataFrame(registros))
+
+    def _prever_registros_com_cache(self, registros):
+        from prediction_cache import chave_canonica
+
+        chaves = [chave_canonica(r, self.expected_columns, self.defaults) for r in registros]
+        rotulos = np.empty(len(registros), dtype=self.classes_.dtype)
+        faltantes = []
+        for i, chave in enumerate(chaves):
+            rotulo = self.cache.get(chave, None)
+            if rotulo is None:
+                faltantes.append(i)
+            else:
+                rotulos[i] = rotulo
+        if faltantes:
+            # Score all misses together, then remember them
+            novos = self._prever_registros([registros[i] for i in faltantes])
+            for i, rotulo in zip(faltantes, novos):
+                rotulos[i] = rotulo
+                self.cache.put(chaves[i], rotulo)
+        return rotulos
+
+    def _prever_df(self, df_tmp):
+        df_tmp = self._alinhar(df_tmp)
+        if self._usa_floresta_plana():
+            return self.floresta_plana.predict(self._preprocessar(df_tmp))
+        return self.pipeline.predict(df_tmp)
+
+    def prever_lote(self, df, chunk_size=100_000):
+        """Score a large DataFrame in fixed-size chunks without copying it.
+
+        Column alignment (which expected columns exist, which need defaults)
+        is resolved once for the whole frame; each chunk then only slices the
+        rows it needs. Returns a ``pandas.Categorical`` whose codes are the
+        smallest integer dtype able to hold the class indices.
+
+        The gain is peak memory (about a quarter of ``prever``'s above the
+        input frame at the default ``chunk_size``); throughput is the same as
+        ``prever`` within run-to-run noise, since each chunk adds only one
+        more preprocessing and forest dispatch. Smaller chunks lower memory
+        further at some cost in speed.
+        """
+        self._exigir_modelo()
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError('df must be a pandas.DataFrame')
+
+        classes = self.classes_
+        codigos = np.empty(len(df), dtype=np.min_scalar_type(max(len(classes) - 1, 0)))
+        for inicio, fim, bloco in self._blocos_alinhados(df, chunk_size):
+            # argmax of predict_proba is exactly what predict() takes from classes_
+            codigos[inicio:fim] = self._predict_proba(bloco).argmax(axis=1)
+
+        return pd.Categorical.from_codes(codigos, categories=classes)
+
+    def prever_com_probabilidades(self, df_novo, top_k=3, dtype=np.float64, chunk_size=100_000):
+        """Labels, class probabilities and top-k classes from one forest pass.
+
+        Accepts the same inputs as ``prever``. Labels are the argmax of the
+        probabilities (exactly what ``predict`` returns), so no separate
+        ``predict`` pass is needed. ``dtype=np.float32`` halves the memory of
+        the probability matrix; labels and rankings are still computed from
+        the float64 probabilities, chunk by chunk for DataFrames.
+
+        Returns a dict with ``rotulos`` (n,), ``probabilidades`` (n, n_classes),
+        ``classes``, ``top_k`` (n, k labels) and ``top_k_probabilidades`` (n, k).
+        """
+        self._exigir_modelo()
+        classes = self.classes_
+        top_k = max(1, min(int(top_k), len(classes)))
+
+        registros = _como_registros(df_novo)
+        if registros is not None:
+            blocos, n = [], len(registros)
+            if self.preprocessamento_compilado is not None and registros:
+                proba = self._predict_proba_matriz(self.preprocessamento_compilado.transform(registros, self.defaults))
+                blocos = [(0, n, proba)]
+            elif registros:
+                proba = self._predict_proba(self._alinhar(pd.DataFrame(registros)))
+                blocos = [(0, n, proba)]
         elif isinstance(df_novo, pd.DataFrame):
-            df_tmp = df_novo.copy()
+            blocos = ((inicio, fim, self._predict_proba(bloco))
+                      for inicio, fim, bloco in self._blocos_alinhados(df_novo, chunk_size))
+            n = len(df_novo)
         else:
-            raise TypeError('df_novo must be a dict, pandas.Series or pandas.DataFrame')
+            raise TypeError('df_novo must be a dict, a list of dicts, pandas.Series or pandas.DataFrame')
 
-        # Ensure all expected columns exist and fill missing with defaults
+        probabilidades = np.empty((n, len(classes)), dtype=dtype)
+        ordem_top = np.empty((n, top_k), dtype=np.intp)
+        for inicio, fim, proba in blocos:
+            probabilidades[inicio:fim] = proba
+            # stable sort keeps argmax's tie-break (lowest class index first)
+            ordem_top[inicio:fim] = np.argsort(-proba, axis=1, kind='stable')[:, :top_k]
+
+        return {
+            'rotulos': classes.take(ordem_top[:, 0]),
+            'probabilidades': probabilidades,
+            'classes': classes,
+            'top_k': classes.take(ordem_top),
+            'top_k_probabilidades': np.take_along_axis(probabilidades, ordem_top, axis=1),
+        }
+
+    def prever_stream(self, registros, batch_size=256, tempo_ocioso=None):
+        """Lazily yield one prediction per record of an (unbounded) iterable.
+
+        Records (dicts or Series) are grouped into batches of ``batch_size`` and
+        scored with ``prever``, so defaults filling, the compiled fast path and
+        the optional cache all apply. Memory is bounded by the batch size.
+
+        With ``tempo_ocioso`` (seconds), the source is read by a background
+        thread and a partial batch is flushed as soon as no new record has
+        arrived for that long, which bounds latency when the source is slow.
+        """
+        self._exigir_modelo()
+        if batch_size < 1:
+            raise ValueError('batch_size must be a positive integer')
+        lotes = _lotes(registros, batch_size) if tempo_ocioso is None \
+            else _lotes_com_ocioso(registros, batch_size, tempo_ocioso)
+        for lote in lotes:
+            yield from self.prever([r.to_dict() if isinstance(r, pd.Series) else r for r in lote])
+
+    def _alinhar(self, df_tmp):
+        # Ensure all expected columns exist (defaults) in the proper order
         for col in self.expected_columns:
             if col not in df_tmp.columns:
                 df_tmp[col] = self.defaults.get(col, None)
+        return df_tmp[self.expected_columns]
 
-        # Keep only expected columns in the proper order
-        df_tmp = df_tmp[self.expected_columns]
+    def _blocos_alinhados(self, df, chunk_size):
+        """Yield ``(inicio, fim, bloco)`` aligned row chunks of ``df`` without copying it."""
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be a positive integer')
+        # Resolve column positions and defaults once for the whole frame
+        presentes = [c for c in self.expected_columns if c in df.columns]
+        posicoes = [df.columns.get_loc(c) for c in presentes]
+        faltantes = {c: self.defaults.get(c, None) for c in self.expected_columns if c not in df.columns}
 
-        return self.pipeline.predict(df_tmp)
+        for inicio in range(0, len(df), chunk_size):
+            fim = min(inicio + chunk_size, len(df))
+            bloco = df.iloc[inicio:fim, posicoes]
+            if faltantes:
+                bloco = bloco.assign(**faltantes)[self.expected_columns]
+            yield inicio, fim, bloco
+
+    def ativar_cache(self, max_itens=10_000, ttl=None):
+        """Memoise record predictions (dict/Series/list of dicts inputs).
+
+        Entries are keyed by the canonical feature tuple after defaults are
+        filled in, bounded to ``max_itens`` (LRU eviction) and expire after
+        ``ttl`` seconds when given. DataFrame inputs are not cached. The cache
+        is cleared whenever the pipeline is retrained or ``carregar`` loads an
+        artifact.
+        """
+        from prediction_cache import PredictionCache
+        self.cache = PredictionCache(max_itens=max_itens, ttl=ttl)
+        return self.cache
+
+    def desativar_cache(self):
+        self.cache = None
+
+    def usar_motor(self, motor):
+        """Switch the inference engine ('sklearn' or 'numpy') in place."""
+        if motor not in self.MOTORES:
+            raise ValueError(f'motor must be one of {self.MOTORES}, got {motor!r}')
+        self.motor = motor
+        self._preparar_motor()
+
+    def _preparar_inferencia(self):
+        # Called after fit/load: drop memoised predictions of the previous
+        # model, compile the preprocessor and prepare the engine
+        if self.cache is not None:
+            self.cache.limpar()
+        self.preprocessamento_compilado = None
+        self.floresta_plana = None
+        self._preprocessador = None
+        if self.pipeline is not None:
+            from fast_preprocess import CompiledPreprocessor
+            self._preprocessador = self.pipeline.named_steps['preprocessamento']
+            try:
+                self.preprocessamento_compilado = CompiledPreprocessor.from_column_transformer(self._preprocessador)
+            except ValueError:
+                # unsupported transformer: keep using the sklearn path
+                pass
+        self._preparar_motor()
+
+    def _preparar_motor(self):
+        # Export the fitted forest to flat arrays once, after fit or load
+        # (directory artifacts already come with a memory-mapped one).
+        # Other models have no flat form and keep the sklearn path.
+        if self.motor == 'numpy' and self.floresta_plana is None and self.pipeline is not None:
+            from forest_compression import floresta_do_classificador
+            self.floresta_plana = floresta_do_classificador(self.pipeline.named_steps['classificador'])
+
+    def _usa_floresta_plana(self):
+        return self.motor == 'numpy' and self.floresta_plana is not None
+
+    def _preprocessar(self, df_alinhado):
+        if self._preprocessador is None:
+            self._preprocessador = self.pipeline.named_steps['preprocessamento']
+        return self._preprocessador.transform(df_alinhado)
+
+    def _prever_matriz(self, X):
+        # X is already encoded by the preprocessor
+        if self._usa_floresta_plana():
+            return self.floresta_plana.predict(X)
+        return self.pipeline.named_steps['classificador'].predict(X)
+
+    def _predict_proba_matriz(self, X):
+        # X is already encoded by the preprocessor
+        if self._usa_floresta_plana():
+            return self.floresta_plana.predict_proba(X)
+        return self.pipeline.named_steps['classificador'].predict_proba(X)
 
-    def salvar(self, caminho='pipeline_obesidade.pkl'):
-        # Save pipeline together with defaults and expected columns
-        payload = {
+    def _predict_proba(self, df_alinhado):
+        if self._usa_floresta_plana():
+            return self.floresta_plana.predict_proba(self._preprocessar(df_alinhado))
+        return self.pipeline.predict_proba(df_alinhado)
+
+    def salvar(self, caminho='pipeline_obesidade.pkl', formato='joblib', incluir_sklearn=False):
+        """Save the pipeline with its defaults and expected columns.
+
+        ``formato='joblib'`` writes a single file (default). ``formato='mmap'``
+        writes an artifact directory (see artifact_store) whose forest arrays
+        are memory-mapped by ``carregar`` and shared between processes. The
+        forest is stored once, as those arrays; ``incluir_sklearn=True`` also
+        stores the fitted sklearn Pipeline, which ``treinar_incremental`` needs
+        to grow the forest after loading the directory.
+        The training report, when there is one, is also written next to the
+        artifact as ``<nome>.relatorio.json`` (training_report.caminho_relatorio).
+        """
+        if formato == 'mmap':
+            self._salvar_diretorio(caminho, incluir_sklearn)
+        elif formato == 'joblib':
+            import joblib
+
+            joblib.dump(self._payload(), caminho)
+        else:
+            raise ValueError(f"formato must be 'joblib' or 'mmap', got {formato!r}")
+        self._salvar_relatorio(caminho)
+
+    def _salvar_relatorio(self, caminho):
+        from training_report import caminho_relatorio, salvar_relatorio
+
+        if self.relatorio_treino is not None:
+            salvar_relatorio(self.relatorio_treino, caminho_relatorio(caminho))
+
+    def _payload(self):
+        # Save pipeline together with defaults, expected columns and the
+        # training lineage used by treinar_incremental
+        return {
             'pipeline': self.pipeline,
             'defaults': self.defaults,
             'expected_columns': self.expected_columns,
+            'historico_arvores': self.historico_arvores,
+            'reservatorio': self.carregar_reservatorio(),
+            'linhas_vistas': self.linhas_vistas,
+            'segundos_treino': self.segundos_treino,
+            'relatorio_treino': self.relatorio_treino,
         }
-        joblib.dump(payload, caminho)
+
+    def _salvar_diretorio(self, caminho, incluir_sklearn=False):
+        from artifact_store import salvar_diretorio
+        from forest_compression import floresta_do_classificador
+
+        floresta = self.floresta_plana
+        if floresta is None:
+            classificador = self.pipeline.named_steps['classificador']
+            floresta = floresta_do_classificador(classificador)
+            if floresta is None:
+                raise ValueError(f"formato='mmap' stores a random forest; use formato='joblib' for "
+                                 f"{type(classificador).__name__}")
+        reservatorio = self.carregar_reservatorio()
+        salvar_diretorio(caminho, floresta, pipeline=self.pipeline if incluir_sklearn else None,
+                         preprocessador=self.pipeline.named_steps['preprocessamento'],
+                         compilado=self.preprocessamento_compilado, defaults=self.defaults,
+                         expected_columns=self.expected_columns,
+                         extras={'historico_arvores': self.historico_arvores, 'linhas_vistas': self.linhas_vistas,
+                                 'segundos_treino': self.segundos_treino,
+                                 'relatorio_treino': self.relatorio_treino},
+                         anexos={'reservatorio': reservatorio} if reservatorio is not None else None)
 
     def salvar_pickle(self, caminho='pipeline_obesidade_pickle.pkl'):
         """Save pipeline using the pickle module (alternative to joblib)."""
-        payload = {
-            'pipeline': self.pipeline,
-            'defaults': self.defaults,
-            'expected_columns': self.expected_columns,
-        }
+        import pickle
+
         with open(caminho, 'wb') as f:
-            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self._payload(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._salvar_relatorio(caminho)
+
+    def registrar(self, nome, formato=None, ativar=True, metricas=None, registro=None):
+        """Save this pipeline as a new version of ``nome`` in the model registry.
+
+        Records training-data hash, column configuration, library versions,
+        training time, artifact size and a measured predict latency (see
+        model_registry). ``formato`` defaults to 'mmap' for random forests
+        (compressed ones included) and 'joblib' otherwise. The new version becomes active unless
+        ``ativar=False``. Load it back with ``carregar('registro:<nome>')``.
+        """
+        from forest_compression import floresta_do_classificador
+        from model_registry import ModelRegistry
+
+        if formato is None:
+            floresta = self.floresta_plana or floresta_do_classificador(self.pipeline.named_steps['classificador'])
+            formato = 'mmap' if floresta is not None else 'joblib'
+
+        return (registro or ModelRegistry()).registrar(self, nome, formato=formato, ativar=ativar,
+                                                       metricas=metricas)
+
+    def carregar(self, caminho='pipeline_obesidade.pkl', registro=None):
+        """Load a ``salvar`` artifact: a joblib file, an mmap directory or a registry reference.
+
+        ``'registro:<nome>'`` loads the active version of ``nome``,
+        ``'registro:<nome>@<versao>'`` a specific one; only the registry index
+        is read to find it.
+        """
+        self.versao_registro = None
+        if isinstance(caminho, str) and caminho.startswith('registro:'):
+            from model_registry import ModelRegistry, separar_referencia
+
+            self.versao_registro = (registro or ModelRegistry()).resolver(*separar_referencia(caminho))
+            caminho = self.versao_registro['caminho']
 
-    def carregar(self, caminho='pipeline_obesidade.pkl'):
         # Apply compatibility shim for sklearn internal symbols before loading
         try:
             from compat import ensure_sklearn_remainder
@@ -141,26 +810,174 @@ class ObesityPipeline:
         except Exception:
             pass
 
+        if os.path.isdir(caminho):
+            self._carregar_diretorio(caminho)
+            return
+
+        import joblib
+
         payload = joblib.load(caminho)
         # Support both legacy files that only contain the pipeline and our payload dict
         if isinstance(payload, dict) and 'pipeline' in payload:
             self.pipeline = payload.get('pipeline')
             self.defaults = payload.get('defaults', {})
             self.expected_columns = payload.get('expected_columns', self.expected_columns)
+            self.historico_arvores = payload.get('historico_arvores', [])
+            self.reservatorio = payload.get('reservatorio')
+            self.linhas_vistas = payload.get('linhas_vistas', 0)
+            self.segundos_treino = payload.get('segundos_treino')
+            self.relatorio_treino = payload.get('relatorio_treino')
         else:
             # older files: payload is the pipeline object
             self.pipeline = payload
+            self.historico_arvores, self.reservatorio, self.linhas_vistas = [], None, 0
+            self.relatorio_treino = None
+        self._carregador_reservatorio = None
+        self._preparar_inferencia()
 
+    def _carregar_diretorio(self, caminho):
+        # Memory-mapped layout written by salvar(formato='mmap'): the forest
+        # arrays are shared through the page cache and the sklearn objects are
+        # only deserialised when something actually needs them. Predictions
+        # use the mapped forest (motor 'numpy'); with motor 'sklearn' the
+        # first prediction would read a private copy of every tree.
+        from artifact_store import (ARQUIVO_PIPELINE, ARQUIVO_PREPROCESSAMENTO, carregar_floresta,
+                                    carregar_joblib, ler_manifesto)
+        from fast_preprocess import CompiledPreprocessor
 
-if __name__ == "__main__":
+        manifesto = ler_manifesto(caminho)
+        if self.cache is not None:
+            self.cache.limpar()
+        self.pipeline = None
+        if manifesto.get('tem_pipeline'):
+            self._carregador_pipeline = lambda: carregar_joblib(caminho, ARQUIVO_PIPELINE)
+        elif manifesto.get('tem_preprocessamento'):
+            # no sklearn copy of the forest: the fitted preprocessor plus the mapped one
+            self._carregador_pipeline = lambda: _pipeline_plano(
+                carregar_joblib(caminho, ARQUIVO_PREPROCESSAMENTO), self.floresta_plana)
+        self._preprocessador = None
+        if manifesto.get('tem_preprocessamento'):
+            self._preprocessador = _PreprocessadorPreguicoso(caminho, ARQUIVO_PREPROCESSAMENTO, carregar_joblib)
+        self.defaults = manifesto.get('defaults', {})
+        self.expected_columns = manifesto.get('expected_columns', self.expected_columns)
+        compilado = manifesto.get('preprocessamento_compilado')
+        self.preprocessamento_compilado = CompiledPreprocessor.from_dict(compilado) if compilado else None
+        self.floresta_plana = carregar_floresta(caminho, manifesto)
+        self.motor = 'numpy'
+        self.historico_arvores = manifesto.get('historico_arvores', [])
+        self.linhas_vistas = manifesto.get('linhas_vistas', 0)
+        self.segundos_treino = manifesto.get('segundos_treino')
+        self.relatorio_treino = manifesto.get('relatorio_treino')
+        self.reservatorio = None
+        self._carregador_reservatorio = None
+        if 'reservatorio' in manifesto.get('anexos', []):
+            self._carregador_reservatorio = lambda: carregar_joblib(caminho, 'reservatorio.joblib')
+
+
+def _pipeline_plano(preprocessador, floresta):
+    from sklearn.pipeline import Pipeline
+
+    from forest_compression import FlatForestClassifier
+
+    return Pipeline(steps=[('preprocessamento', preprocessador), ('classificador', FlatForestClassifier(floresta))])
+
+
+class _PreprocessadorPreguicoso:
+    """Reads the fitted ColumnTransformer of a directory artifact on first transform."""
+
+    def __init__(self, caminho, arquivo, carregador):
+        self._args = (caminho, arquivo)
+        self._carregador = carregador
+        self._transformador = None
+
+    def transform(self, X):
+        if self._transformador is None:
+            self._transformador = self._carregador(*self._args)
+        return self._transformador.transform(X)
+
+
+def _como_registros(df_novo):
+    # dict/Series -> [dict]; list/tuple of dicts unchanged; anything else -> None
+    if isinstance(df_novo, dict):
+        return [df_novo]
+    if isinstance(df_novo, pd.Series):
+        return [df_novo.to_dict()]
+    if isinstance(df_novo, (list, tuple)) and all(isinstance(r, dict) for r in df_novo):
+        return list(df_novo)
+    return None
+
+
+def _lotes(registros, tamanho):
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _lotes_com_ocioso(registros, tamanho, tempo_ocioso):
+    # A reader thread feeds a bounded queue; the consumer flushes a partial
+    # batch whenever the queue stays empty for `tempo_ocioso` seconds.
+    import queue
+    import threading
+
+    fila = queue.Queue(maxsize=2 * tamanho)
+    parar = threading.Event()
+    fim = object()
+
+    def _colocar(item):
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _ler():
+        try:
+            for registro in registros:
+                if not _colocar((registro, None)):
+                    return
+            _colocar((fim, None))
+        except BaseException as e:  # re-raised in the consumer
+            _colocar((fim, e))
+
+    leitor = threading.Thread(target=_ler, name='prever_stream-leitor', daemon=True)
+    leitor.start()
+    lote = []
+    try:
+        while True:
+            try:
+                item, erro = fila.get(timeout=tempo_ocioso if lote else None)
+            except queue.Empty:
+                yield lote
+                lote = []
+                continue
+            if item is fim:
+                if lote:
+                    yield lote
+                if erro is not None:
+                    raise erro
+                return
+            lote.append(item)
+            if len(lote) == tamanho:
+                yield lote
+                lote = []
+    finally:
+        parar.set()
+
+
+def _treinar_padrao(usar_cache=True):
     # Train a default pipeline using the local CSV file (columns must match dataset)
     base = os.path.dirname(__file__)
     csv_path = os.path.join(base, 'Obesity.csv')
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file not found at {csv_path}")
 
-    df = pd.read_csv(csv_path)
-
     # Default column names aligned with the provided dataset
     col_ordinais = ['CAEC', 'CALC']
     ordem_ordinais = {
@@ -171,6 +988,46 @@ if __name__ == "__main__":
     col_numericas = ['Age', 'Height', 'Weight', 'FCVC', 'FAF', 'CH2O', 'TUE']
 
     pipeline = ObesityPipeline(col_ordinais, ordem_ordinais, col_nominais, col_numericas)
-    X_test, y_test = pipeline.treinar(df)
+    if usar_cache:
+        # repeat runs reuse the encoded matrices (see feature_cache)
+        X_test, y_test = pipeline.treinar_csv(csv_path)
+    else:
+        X_test, y_test = pipeline.treinar(pd.read_csv(csv_path))
     pipeline.salvar()
     pipeline.salvar_pickle()
+    # new active version for the app (pages/5_Aplicativo.py)
+    versao = pipeline.registrar('pipeline_obesidade')
+    print(f"Registrado pipeline_obesidade {versao['versao']} em {versao['caminho']}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m obesity_pipeline',
+                                     description='Train the default pipeline or score a CSV file.')
+    sub = parser.add_subparsers(dest='comando')
+    treinar = sub.add_parser('treinar', help='train on Obesity.csv and save the artifacts (default)')
+    treinar.add_argument('--sem-cache', action='store_true', help='parse and encode the CSV again')
+    score = sub.add_parser('score', help='score a CSV file with a saved artifact')
+    score.add_argument('entrada', help='input CSV with the feature columns')
+    score.add_argument('saida', help='output CSV, one prediction per input row')
+    score.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    score.add_argument('--artefato', default='pipeline_obesidade.pkl', help='artifact written by salvar')
+    score.add_argument('--linhas-por-bloco', type=int, default=50_000)
+    # sklearn's compiled forest is the faster engine for large blocks
+    score.add_argument('--motor', choices=ObesityPipeline.MOTORES, default='sklearn')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'score':
+        from batch_scoring import pontuar_csv
+
+        resumo = pontuar_csv(args.entrada, args.saida, artefato=args.artefato, workers=args.workers,
+                             linhas_por_bloco=args.linhas_por_bloco, motor=args.motor)
+        print(f"{resumo['linhas']} linhas em {resumo['segundos']:.2f}s "
+              f"({resumo['linhas_por_segundo']:.0f} linhas/s) -> {args.saida}")
+    else:
+        _treinar_padrao(usar_cache=not getattr(args, 'sem_cache', False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Train a forest on a CSV file that does not fit in memory.
+
+`treinar_fora_de_memoria` never holds the file as one DataFrame. It reads
+the CSV in blocks of ``linhas_por_bloco`` rows:
+
+1. Statistics pass. Each row goes to the test side with probability
+   ``test_size``. Over the training rows it collects category counts,
+   numeric min/max, the content hash and three reservoir samples (algorithm
+   R): one of row positions per tree (``linhas_por_arvore``), the
+   incremental-training reservoir (incremental_training) and a test sample
+   (``linhas_teste``) from the test side.
+2. Encoders. The ColumnTransformer of ``construir_preprocessador`` is fitted
+   on a small frame holding exactly the observed categories and the
+   min/max of each numeric column. That gives the same categories and
+   scaling as fitting on all training rows.
+3. Sample passes. The file is read again and only the sampled rows are
+   encoded into one float32 matrix per tree. Each tree is then fitted with
+   ``warm_start`` on its own reservoir, bootstrapped by the forest as
+   usual. ``class_weight='balanced'`` becomes fixed weights from the
+   streamed class counts (incremental_training.pesos_balanceados), so every
+   tree is weighted by the whole training stream and not by its sample. ``arvores_por_passagem`` bounds how many of those matrices exist
+   at once, at the cost of one extra read of the file per group.
+
+Peak memory is one block plus ``arvores_por_passagem * linhas_por_arvore``
+encoded rows and the fixed-size reservoirs, so it does not grow with the
+file. When the file has no more training rows than ``linhas_por_arvore``,
+every tree sees all of them and the forest is an ordinary random forest.
+The result is a normal ObesityPipeline (salvar, registrar,
+treinar_incremental, ...). Random forests only. Numeric defaults are
+medians of the reservoir sample; categorical defaults are exact modes.
+"""
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from incremental_training import TAMANHO_RESERVATORIO, atualizar_reservatorio, pesos_balanceados
+
+LINHAS_POR_ARVORE = 10_000
+LINHAS_POR_BLOCO = 100_000
+LINHAS_TESTE = 10_000
+
+
+def treinar_fora_de_memoria(pipeline_obj, caminho_csv, linhas_por_arvore=LINHAS_POR_ARVORE,
+                            linhas_por_bloco=LINHAS_POR_BLOCO, test_size=0.3, linhas_teste=LINHAS_TESTE,
+                            arvores_por_passagem=None, random_state=4242, verbose=True, relatorio=False,
+                            medir_memoria=True, manter_reservatorio=False):
+    """Fit ``pipeline_obj`` on ``caminho_csv`` in bounded memory (see module docstring).
+
+    Returns ``(X_test, y_test)`` for the test reservoir, like ``treinar``,
+    plus ``relatorio_treino`` when ``relatorio=True``. The incremental-training
+    reservoir is kept on the pipeline only with ``manter_reservatorio=True``.
+    """
+    from sklearn.pipeline import Pipeline
+
+    from training_report import RelatorioTreino, avaliar, estatisticas_modelo
+
+    if pipeline_obj.modelo != 'floresta':
+        raise ValueError('out-of-core training builds a random forest one tree at a time (modelo="floresta")')
+    if linhas_por_arvore < 1 or linhas_por_bloco < 1:
+        raise ValueError('linhas_por_arvore and linhas_por_bloco must be positive integers')
+
+    classificador = pipeline_obj.construir_classificador()
+    n_arvores = classificador.n_estimators
+    grupo = min(arvores_por_passagem or n_arvores, n_arvores)
+    medicao = RelatorioTreino(medir_memoria=medir_memoria)
+    with medicao.medir():
+        inicio = time.perf_counter()
+        with medicao.etapa('estatisticas'):
+            estatisticas = _estatisticas(pipeline_obj, caminho_csv, linhas_por_arvore, linhas_por_bloco,
+                                         test_size, linhas_teste, n_arvores, random_state)
+        with medicao.etapa('ajustar_encoders'):
+            preprocessador = pipeline_obj.construir_preprocessador()
+            preprocessador.fit(_quadro_sintetico(pipeline_obj, estatisticas))
+
+        posicoes = estatisticas['posicoes']
+        class_weight = pesos = classificador.class_weight
+        if isinstance(pesos, str):
+            # sklearn does not support 'balanced' with warm_start
+            pesos = pesos_balanceados(estatisticas['contagem_classes'])
+        classificador.set_params(warm_start=True, class_weight=pesos)
+        for primeira in range(0, n_arvores, grupo):
+            arvores = range(primeira, min(primeira + grupo, n_arvores))
+            with medicao.etapa(f'amostras_{primeira}'):
+                amostras = _codificar_amostras(pipeline_obj, caminho_csv, preprocessador,
+                                               [posicoes[t] for t in arvores], linhas_por_bloco, test_size,
+                                               random_state)
+            with medicao.etapa(f'ajustar_modelo_{primeira}'):
+                for t, (X, y) in zip(arvores, amostras):
+                    _exigir_classes(y, estatisticas['classes'], t)
+                    classificador.set_params(n_estimators=t + 1)
+                    classificador.fit(X, y)
+            del amostras
+        classificador.set_params(warm_start=False, class_weight=class_weight)
+
+        with medicao.etapa('resumo_treino'):
+            pipeline_obj.pipeline = Pipeline(steps=[('preprocessamento', preprocessador),
+                                                    ('classificador', classificador)])
+            pipeline_obj.expected_columns = estatisticas['colunas']
+            pipeline_obj.defaults = _defaults(pipeline_obj, estatisticas)
+            pipeline_obj._registrar_treino({'reservatorio': estatisticas['reservatorio'],
+                                            'linhas': estatisticas['linhas_treino'],
+                                            'hash_dados': estatisticas['hash_dados']},
+                                           manter_reservatorio)
+        with medicao.etapa('preparar_inferencia'):
+            pipeline_obj._preparar_inferencia()
+        pipeline_obj.segundos_treino = time.perf_counter() - inicio
+
+        teste = estatisticas['teste']
+        X_test = teste[estatisticas['colunas']]
+        y_test = teste[pipeline_obj.target]
+        with medicao.etapa('avaliar'):
+            y_pred = pipeline_obj.pipeline.predict(X_test) if len(teste) else np.array([], dtype=object)
+    medicao.dados = {'linhas_treino': estatisticas['linhas_treino'], 'linhas_teste': estatisticas['linhas_teste'],
+                     'linhas_avaliadas': int(len(teste)), 'colunas_entrada': len(estatisticas['colunas']),
+                     'blocos': estatisticas['blocos'], 'linhas_por_arvore': int(linhas_por_arvore),
+                     'passagens': 1 + -(-n_arvores // grupo)}
+    if len(teste):
+        medicao.avaliacao = avaliar(y_test, y_pred)
+    medicao.modelo = estatisticas_modelo(classificador)
+    pipeline_obj.relatorio_treino = medicao.como_dict()
+    if verbose and len(teste):
+        pipeline_obj._imprimir_avaliacao(y_test, y_pred)
+    if relatorio:
+        return X_test, y_test, pipeline_obj.relatorio_treino
+    return X_test, y_test
+
+
+def _blocos(pipeline_obj, caminho_csv, linhas_por_bloco, test_size, random_state):
+    """Yield ``(bloco, teste)``: CSV blocks with the configured columns and their test mask.
+
+    The mask comes from its own generator, so every pass over the file sees
+    the same split.
+    """
+    colunas = pipeline_obj.col_ordinais + pipeline_obj.col_nominais + pipeline_obj.col_numericas
+    tipos = {c: 'float64' for c in pipeline_obj.col_numericas}
+    tipos.update({c: 'object' for c in pipeline_obj.col_ordinais + pipeline_obj.col_nominais + [pipeline_obj.target]})
+    rng = np.random.default_rng(random_state)
+    leitor = pd.read_csv(caminho_csv, usecols=colunas + [pipeline_obj.target], dtype=tipos,
+                         chunksize=linhas_por_bloco)
+    for bloco in leitor:
+        teste = rng.random(len(bloco)) < test_size
+        yield bloco[colunas + [pipeline_obj.target]].reset_index(drop=True), teste
+
+
+def _estatisticas(pipeline_obj, caminho_csv, linhas_por_arvore, linhas_por_bloco, test_size, linhas_teste,
+                  n_arvores, random_state):
+    categoricas = pipeline_obj.col_ordinais + pipeline_obj.col_nominais
+    contagens = {c: {} for c in categoricas}
+    minimos = {c: np.inf for c in pipeline_obj.col_numericas}
+    maximos = {c: -np.inf for c in pipeline_obj.col_numericas}
+    contagem_classes = {}
+    hash_dados = hashlib.sha256()
+    posicoes = [np.empty(0, dtype=np.int64) for _ in range(n_arvores)]
+    rng = np.random.default_rng(random_state + 1)
+    reservatorio = teste_amostra = None
+    vistas_treino = vistas_teste = blocos = 0
+
+    for bloco, teste in _blocos(pipeline_obj, caminho_csv, linhas_por_bloco, test_size, random_state):
+        blocos += 1
+        treino = bloco[~teste].reset_index(drop=True)
+        for coluna in categoricas:
+            for valor, n in treino[coluna].value_counts().items():
+                contagens[coluna][valor] = contagens[coluna].get(valor, 0) + int(n)
+        for coluna in pipeline_obj.col_numericas:
+            if treino[coluna].notna().any():
+                minimos[coluna] = min(minimos[coluna], float(treino[coluna].min()))
+                maximos[coluna] = max(maximos[coluna], float(treino[coluna].max()))
+        for classe, n in treino[pipeline_obj.target].value_counts().items():
+            contagem_classes[classe] = contagem_classes.get(classe, 0) + int(n)
+        # same bytes as incremental_training.hash_linhas over all training rows
+        hash_dados.update(pd.util.hash_pandas_object(treino, index=False).to_numpy().tobytes())
+        for t in range(n_arvores):
+            posicoes[t] = _amostrar_posicoes(posicoes[t], vistas_treino, len(treino), linhas_por_arvore, rng)
+        reservatorio, _ = atualizar_reservatorio(reservatorio, treino, vistas_treino, TAMANHO_RESERVATORIO,
+                                                 random_state)
+        teste_amostra, _ = atualizar_reservatorio(teste_amostra, bloco[teste], vistas_teste, linhas_teste,
+                                                  random_state)
+        vistas_treino += len(treino)
+        vistas_teste += int(teste.sum())
+
+    if not vistas_treino:
+        raise ValueError(f'{caminho_csv} has no training rows')
+    return {
+        'colunas': pipeline_obj.col_ordinais + pipeline_obj.col_nominais + pipeline_obj.col_numericas,
+        'contagens': contagens,
+        'minimos': minimos,
+        'maximos': maximos,
+        'classes': np.array(sorted(contagem_classes), dtype=object),
+        'contagem_classes': contagem_classes,
+        'hash_dados': hash_dados.hexdigest(),
+        'posicoes': [np.sort(p) for p in posicoes],
+        'reservatorio': reservatorio,
+        'teste': teste_amostra,
+        'linhas_treino': int(vistas_treino),
+        'linhas_teste': int(vistas_teste),
+        'blocos': blocos,
+    }
+
+
+def _amostrar_posicoes(posicoes, vistas, n_novas, capacidade, rng):
+    """Algorithm R over training-row positions ``vistas .. vistas + n_novas - 1``."""
+    livres = max(0, min(capacidade - len(posicoes), n_novas))
+    posicoes = np.concatenate([posicoes, np.arange(vistas, vistas + livres, dtype=np.int64)])
+    if n_novas > livres:
+        novas = np.arange(vistas + livres, vistas + n_novas, dtype=np.int64)
+        # row at position p replaces a random slot with probability capacidade / (p + 1)
+        sorteio = rng.integers(0, novas + 1)
+        aceitas = np.flatnonzero(sorteio < capacidade)
+        # later rows overwrite earlier ones in the same slot: keep the last
+        slots, primeira = np.unique(sorteio[aceitas][::-1], return_index=True)
+        posicoes[slots] = novas[aceitas[::-1][primeira]]
+    return posicoes
+
+
+def _quadro_sintetico(pipeline_obj, estatisticas):
+    # Smallest frame whose fit gives the encoders the streamed categories and ranges
+    valores = {}
+    for coluna in pipeline_obj.col_ordinais + pipeline_obj.col_nominais:
+        valores[coluna] = sorted(estatisticas['contagens'][coluna]) or [None]
+    for coluna in pipeline_obj.col_numericas:
+        minimo, maximo = estatisticas['minimos'][coluna], estatisticas['maximos'][coluna]
+        valores[coluna] = [minimo, maximo] if np.isfinite(minimo) else [np.nan]
+    linhas = max(len(v) for v in valores.values())
+    quadro = pd.DataFrame({c: [v[i % len(v)] for i in range(linhas)] for c, v in valores.items()})
+    for coluna in pipeline_obj.col_ordinais + pipeline_obj.col_nominais:
+        quadro[coluna] = quadro[coluna].astype(object)
+    return quadro[estatisticas['colunas']]
+
+
+def _codificar_amostras(pipeline_obj, caminho_csv, preprocessador, posicoes, linhas_por_bloco, test_size,
+                        random_state):
+    """Encoded ``(X, y)`` of the sampled training rows of each tree, in one pass over the file."""
+    colunas = pipeline_obj.col_ordinais + pipeline_obj.col_nominais + pipeline_obj.col_numericas
+    largura = None
+    matrizes, rotulos, preenchidas = [], [], [0] * len(posicoes)
+    inicio = 0
+    for bloco, teste in _blocos(pipeline_obj, caminho_csv, linhas_por_bloco, test_size, random_state):
+        treino = bloco[~teste]
+        fim = inicio + len(treino)
+        locais = [p[np.searchsorted(p, inicio):np.searchsorted(p, fim)] - inicio for p in posicoes]
+        usadas = np.unique(np.concatenate(locais)) if locais else np.empty(0, dtype=np.int64)
+        if len(usadas):
+            # encode only the rows some tree sampled
+            X_bloco = preprocessador.transform(treino.iloc[usadas][colunas]).astype(np.float32)
+            y_bloco = treino[pipeline_obj.target].to_numpy()[usadas]
+            if largura is None:
+                largura = X_bloco.shape[1]
+                matrizes = [np.empty((len(p), largura), dtype=np.float32) for p in posicoes]
+                rotulos = [np.empty(len(p), dtype=object) for p in posicoes]
+            for t, local in enumerate(locais):
+                linhas = np.searchsorted(usadas, local)
+                matrizes[t][preenchidas[t]:preenchidas[t] + len(local)] = X_bloco[linhas]
+                rotulos[t][preenchidas[t]:preenchidas[t] + len(local)] = y_bloco[linhas]
+                preenchidas[t] += len(local)
+        inicio = fim
+    return list(zip(matrizes, rotulos))
+
+
+def _exigir_classes(y, classes, arvore):
+    # warm_start keeps the first fit's classes_; a tree missing a class would misalign its votes
+    presentes = np.unique(y)
+    if len(presentes) != len(classes):
+        faltando = sorted(set(classes) - set(presentes))
+        raise ValueError(f'the sample of tree {arvore} has no rows of {faltando}; '
+                         f'increase linhas_por_arvore')
+
+
+def _defaults(pipeline_obj, estatisticas):
+    defaults = {}
+    reservatorio = estatisticas['reservatorio']
+    for coluna in pipeline_obj.col_numericas:
+        defaults[coluna] = float(reservatorio[coluna].median())
+    for coluna in pipeline_obj.col_ordinais + pipeline_obj.col_nominais:
+        contagem = estatisticas['contagens'][coluna]
+        # most frequent value, ties broken like Series.mode (sorted order)
+        defaults[coluna] = min(contagem, key=lambda v: (-contagem[v], v)) if contagem else None
+    return defaults
+
+
+__all__ = ["LINHAS_POR_ARVORE", "LINHAS_POR_BLOCO", "LINHAS_TESTE", "treinar_fora_de_memoria"]
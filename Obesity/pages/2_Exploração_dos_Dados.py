@@ -3,11 +3,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-
-
-# carregar os dados
-csv_path = "Obesity/Obesity.csv"
-df = pd.read_csv(csv_path)
+from data_loader import ESPEC_EXPLORACAO
+from dataset_service import CSV_OBESIDADE, servico
+from label_mapping import traduzir
 
 
 # paleta de cores para os níveis de obesidade
@@ -22,78 +20,21 @@ cores_obesidade = {
 }
 
 
-# traduzir as colunas para português - para usar na interface
-colunas_pt = {
-    'Gender': 'Gênero',
-    'Age': 'Idade',
-    'Height': 'Altura',
-    'Weight': 'Peso',
-    'family_history': 'Histórico Familiar',
-    'FAVC': 'Consumo de Alimentos com Alta Caloria',
-    'FCVC': 'Frequência de Consumo de Vegetais',
-    'NCP': 'Número de Refeições por Dia',
-    'CAEC': 'Comer Entre Refeições',
-    'SMOKE': 'Fuma',
-    'CH2O': 'Consumo de Água',
-    'SCC': 'Calorias Diárias Consumidas',
-    'FAF': 'Atividade Física',
-    'TUE': 'Uso de Dispositivos Tecnológicos',
-    'CALC': 'Consumo de Alcool',
-    'MTRANS': 'Meio de Transporte',
-    'Obesity': 'Obesidade'
-}
-
-df.rename(columns=colunas_pt, inplace=True)
-
-
-# traduzir os valores categóricos para português
-mapa_obesidade = {
-    'Insufficient_Weight': 'Abaixo do peso',
-    'Normal_Weight': 'Peso normal',
-    'Overweight_Level_I': 'Sobrepeso Tipo I',
-    'Overweight_Level_II': 'Sobrepeso Tipo II',
-    'Obesity_Type_I': 'Obesidade Tipo I',
-    'Obesity_Type_II': 'Obesidade Tipo II',
-    'Obesity_Type_III': 'Obesidade Tipo III'
-}
-
-if 'Obesidade' in df.columns:
-    df['Obesidade'] = df['Obesidade'].map(mapa_obesidade).fillna(df['Obesidade'])
-    ordem_niveis = [
-        'Abaixo do peso', 'Peso normal', 'Sobrepeso Tipo I', 'Sobrepeso Tipo II',
-        'Obesidade Tipo I', 'Obesidade Tipo II', 'Obesidade Tipo III'
-    ]
-    df['Obesidade'] = pd.Categorical(df['Obesidade'], categories=ordem_niveis, ordered=True)
-
-mapa_transporte = {
-    'Automobile': 'Automóvel',
-    'Bike': 'Bicicleta',
-    'Motorbike': 'Motocicleta',
-    'Public_Transportation': 'Transporte público',
-    'Walking': 'Caminhar'
-}
-
-if 'Meio de Transporte' in df.columns:
-    df['Meio de Transporte'] = df['Meio de Transporte'].map(mapa_transporte).fillna(df['Meio de Transporte'])
+# traduções de colunas e valores: a especificação única do data_loader
+# (nomes e rótulos próprios desta página em ESPEC_EXPLORACAO)
+ordem_niveis = ESPEC_EXPLORACAO['Obesity']['ordem']
 
-mapa_frequencia = {
-    'Always': 'Sempre',
-    'Frequently': 'Frequentemente',
-    'Sometimes': 'As vezes',
-    'no': 'Nunca'
-}
 
-for coluna in ['Comer Entre Refeições', 'Consumo de Alcool']:
-    if coluna in df.columns:
-        df[coluna] = df[coluna].map(mapa_frequencia).fillna(df[coluna])
+def preparar_dados():
+    # Obesity.csv traduzido para a interface
+    return traduzir(servico.obter('obesity_csv'), ESPEC_EXPLORACAO)
 
-mapa_sim_nao = {'yes': 'Sim', 'no': 'Não'}
-for coluna in ['Histórico Familiar', 'Consumo de Alimentos com Alta Caloria', 'Fuma', 'Calorias Diárias Consumidas']:
-    if coluna in df.columns:
-        df[coluna] = df[coluna].map(mapa_sim_nao).fillna(df[coluna])
 
-mapa_genero = {'Male': 'Masculino', 'Female': 'Feminino'}
-df['Gênero'] = df['Gênero'].map(mapa_genero).fillna(df['Gênero'])
+# carregar os dados: preparados uma vez por processo e compartilhados entre
+# sessões (dataset_service); refeitos só quando o CSV muda
+if not servico.registrado('exploracao'):
+    servico.registrar('exploracao', preparar_dados, fontes=[CSV_OBESIDADE])
+df = servico.obter('exploracao')
 
 
 # interface do Streamlit
@@ -108,7 +49,7 @@ def texto(text):
 
 texto('A maioria dos participantes é jovem, com idade média de 24,3 anos, o que pode influenciar a generalização do modelo para faixas etárias mais elevadas. A altura média é de 1,70 metros, com baixa variabilidade, enquanto o peso apresenta ampla dispersão, indicando perfis corporais bastante distintos. A distribuição das classes de obesidade é equilibrada.')
 st.markdown('---')
-colunas = [c for c in colunas_pt.values() if c.lower() != 'obesidade']
+colunas = [regra['nome'] for regra in ESPEC_EXPLORACAO.values() if regra['nome'].lower() != 'obesidade']
 coluna = st.selectbox("Escolha uma coluna para filtrar", colunas)
 
 explicacoes = {
@@ -5,13 +5,13 @@ import plotly.graph_objects as go
 import altair as alt
 import seaborn as sns
 import matplotlib.pyplot as plt
-from data_loader import load_data
+from dataset_service import servico
 
 st.set_page_config(page_title="Análise de Obesidade", layout="wide")
 st.title('Perfil e Comportamentos Relacionados à Obesidade')
 
-# Load cleaned data
-df, df_num, ordem_niveis, ordem_nives_num, cores_obesidade, cores_obesidade_num, cores_obesidade_num_ajustada = load_data()
+# Load cleaned data (data_loader.load_data, built once per process and shared by every session)
+df, df_num, ordem_niveis, ordem_nives_num, cores_obesidade, cores_obesidade_num, cores_obesidade_num_ajustada = servico.obter('load_data')
 
 # ------------------------------------------------------------
 # FUNÇÕES
@@ -8,6 +8,8 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 
+from dataset_service import servico
+
 # =========================
 # CONFIGURAÇÕES INICIAIS
 # =========================
@@ -29,9 +31,9 @@ def texto(text):
 # =========================
 # CARREGAMENTO DOS DADOS
 # =========================
-df = pd.read_csv(
-    "Obesity/df_numerico.csv"
-)
+# matriz numérica derivada do Obesity.csv (model_matrix), compartilhada entre
+# sessões (dataset_service)
+df = servico.obter('df_numerico')
 df_modelo = df.copy()
 
 # =========================
@@ -10,11 +10,11 @@ import plotly.express as px
 import json
 from obesity_pipeline import ObesityPipeline
 from data_loader import MTRANS_MAP
+from dataset_service import servico
 import pickle
 
-# Load dataset (used for examples / plots)
-DATA_CSV = 'Obesity/Obesity.csv'
-df = pd.read_csv(DATA_CSV)
+# Load dataset (used for examples / plots), shared by every session
+df = servico.obter('obesity_csv')
 
 # Pipeline feature configuration (must match the training script)
 col_ordinais = ['CAEC', 'CALC']
@@ -25,15 +25,24 @@ ordem_ordinais = {
 col_nominais = ['FAVC', 'SCC', 'MTRANS', 'family_history']
 col_numericas = ['Age', 'Height', 'Weight', 'FCVC', 'FAF', 'CH2O', 'TUE']
 
-# Create and load pipeline (show friendly message if missing)
-pipeline_obj = ObesityPipeline(col_ordinais, ordem_ordinais, col_nominais, col_numericas)
+# Create and load pipeline (show friendly message if missing).
+# The active version in the model registry is preferred; only the registry
+# index is read to find it, so switching versions needs no code change.
+pipeline_obj = ObesityPipeline(col_ordinais, ordem_ordinais, col_nominais, col_numericas, motor='numpy')
 try:
-    pipeline_obj.carregar('Obesity/pipeline_obesidade.pkl')
+    try:
+        pipeline_obj.carregar('registro:pipeline_obesidade')
+    except KeyError:
+        # nothing registered yet: file written by obesity_pipeline.py
+        pipeline_obj.carregar('Obesity/pipeline_obesidade.pkl')
 except Exception as e:
     st.warning(f"Não foi possível carregar o pipeline salvo: {e}")
 
 
 st.header("Classificador de Obesidade")
+if pipeline_obj.versao_registro:
+    st.caption(f"Modelo {pipeline_obj.versao_registro['nome']} {pipeline_obj.versao_registro['versao']} "
+               f"({pipeline_obj.versao_registro['criado']})")
 st.markdown("Preencha os dados abaixo para obter o nível de obesidade:")
 
 col1, col2 = st.columns(2)
@@ -56,48 +65,31 @@ with col2:
     alcool = st.radio("Com qual frequência faz uso de álcool", ["Nunca", "As vezes", "Frequentemente", "Sempre"])  # CALC
 
 
-# Montar DataFrame de entrada
-# Map user inputs to the CSV column names expected by the subset pipeline
-dados_usuario = pd.DataFrame([{
+# Montar registro de entrada
+# Map user inputs to the CSV column names expected by the subset pipeline.
+# A plain dict goes through the pipeline's precompiled preprocessing, so no
+# DataFrame is built per request.
+FREQUENCIA_MAP = {'Nunca': 'no', 'As vezes': 'Sometimes', 'Frequentemente': 'Frequently', 'Sempre': 'Always'}
+SIM_NAO_MAP = {'Não': 'no', 'Sim': 'yes'}
+
+dados_usuario = {
     'Age': idade,
     'Height': altura,
     'Weight': peso,
-    'family_history': historico_familiar,
+    'family_history': SIM_NAO_MAP[historico_familiar],
 
     'CH2O': float(agua),
     'FCVC': vegetais,
-    'FAVC': alimentos_caloricos,
-    'SCC': monitora_calorias,
-    'CAEC': entre_refeicoes,
-    'CALC': alcool,
+    'FAVC': SIM_NAO_MAP[alimentos_caloricos],
+    'SCC': SIM_NAO_MAP[monitora_calorias],
+    'CAEC': FREQUENCIA_MAP[entre_refeicoes],
+    'CALC': FREQUENCIA_MAP[alcool],
 
     'FAF': float(atividade_fisica),
     'TUE': float(dispositivos_tecnologicos),
-    'MTRANS': meio_transporte
-}])
-
-dados_usuario['CAEC'] = dados_usuario['CAEC'].replace({
-    'Nunca': 'no', 'As vezes': 'Sometimes', 'Frequentemente': 'Frequently', 'Sempre': 'Always'
-})
-
-dados_usuario['CALC'] = dados_usuario['CALC'].replace({
-    'Nunca': 'no', 'As vezes': 'Sometimes', 'Frequentemente': 'Frequently', 'Sempre': 'Always'
-})
-
-dados_usuario['family_history'] = dados_usuario['family_history'].replace({
-    'Não': 'no', 'Sim': 'yes'
-})
-
-dados_usuario['FAVC'] = dados_usuario['FAVC'].replace({
-    'Não': 'no', 'Sim': 'yes'
-})
-
-dados_usuario['SCC'] = dados_usuario['SCC'].replace({
-    'Não': 'no', 'Sim': 'yes'
-})
+    'MTRANS': MTRANS_MAP[meio_transporte]
+}
 
-dados_usuario['MTRANS'] = dados_usuario['MTRANS'].replace(MTRANS_MAP)
-    
 # Traduções: ajuste as chaves para os rótulos do seu modelo
 TRANSLATIONS = {
     "Insufficient_Weight": "Abaixo do Peso",
@@ -124,9 +116,10 @@ if st.button("Classificar"):
         try:            
             bmi = peso / (altura ** 2) if altura > 0 else None
             
-            # prever() já retorna um array-like de rótulos
-            pred = pipeline_obj.prever(dados_usuario)
-            label = pred[0]
+            # rótulo, probabilidades e top-3 em uma única avaliação da floresta
+            resultado = pipeline_obj.prever_com_probabilidades(dados_usuario, top_k=3)
+            label = resultado['rotulos'][0]
+            modelo_label = label
             if bmi is not None and bmi < 18.3:
                 label = "Insufficient_Weight"
             
@@ -146,6 +139,14 @@ if st.button("Classificar"):
             
             st.success(f"Nível de obesidade previsto: **{translated}**")
 
+            # confiança do modelo (a regra de IMC acima pode sobrepor o rótulo)
+            if label == modelo_label:
+                st.caption(f"Confiança do modelo: {resultado['top_k_probabilidades'][0][0]:.0%}")
+            st.caption("Classes mais prováveis segundo o modelo: " + ", ".join(
+                f"{TRANSLATIONS.get(c, c)} ({p:.0%})"
+                for c, p in zip(resultado['top_k'][0], resultado['top_k_probabilidades'][0])
+            ))
+
             # explicação adicional, se existir
             expl = EXPLANATIONS.get(label)
             if expl:
@@ -0,0 +1,108 @@
+"""Bounded LRU/TTL cache for ObesityPipeline predictions.
+
+Most features of the obesity form are small discrete scales or yes/no flags,
+so identical requests are common. `PredictionCache` memoises the predicted
+label per canonical feature tuple (see `chave_canonica`) with a maximum
+size (least recently used entries are evicted first), an optional time to
+live and hit/miss/eviction counters.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from numbers import Number
+
+_AUSENTE = object()
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with optional TTL.
+
+    Parameters
+    - max_itens: maximum number of cached predictions
+    - ttl: seconds an entry stays valid (None = no expiry)
+    - relogio: monotonic clock, injectable for tests
+    """
+
+    def __init__(self, max_itens=10_000, ttl=None, relogio=time.monotonic):
+        if max_itens < 1:
+            raise ValueError('max_itens must be a positive integer')
+        if ttl is not None and ttl <= 0:
+            raise ValueError('ttl must be positive or None')
+        self.max_itens = int(max_itens)
+        self.ttl = ttl
+        self._relogio = relogio
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is not _AUSENTE:
+                valor, expira_em = item
+                if expira_em is not None and self._relogio() >= expira_em:
+                    del self._itens[chave]
+                    self.expirations += 1
+                else:
+                    self._itens.move_to_end(chave)
+                    self.hits += 1
+                    return valor
+            self.misses += 1
+            return padrao
+
+    def put(self, chave, valor):
+        expira_em = None if self.ttl is None else self._relogio() + self.ttl
+        with self._lock:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.evictions += 1
+
+    def limpar(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'itens': len(self._itens),
+                'max_itens': self.max_itens,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / consultas if consultas else 0.0,
+            }
+
+
+def chave_canonica(registro, colunas, defaults):
+    """Feature tuple used as cache key.
+
+    Missing columns take the same defaults ``prever`` fills in, numbers are
+    normalised to float (so ``2`` and ``2.0`` share an entry) and missing
+    values (None/NaN) become None.
+    """
+    return tuple(_canonico(registro[c] if c in registro else defaults.get(c)) for c in colunas)
+
+
+def _canonico(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, Number) and not isinstance(valor, bool):
+        valor = float(valor)
+        return None if math.isnan(valor) else valor
+    return str(valor)
+
+
+__all__ = ["PredictionCache", "chave_canonica"]
@@ -0,0 +1,260 @@
+"""Local HTTP scoring service with asyncio micro-batching.
+
+The artifact is loaded once via ``ObesityPipeline.carregar``. Each request
+posts a JSON record (or a list of records) to ``/prever``; records from
+concurrent requests are queued and coalesced into a single vectorised
+``prever`` call whenever ``max_lote`` records are waiting or ``max_espera_ms``
+milliseconds have passed since the first one arrived.
+
+    python Obesity/scoring_server.py --artefato Obesity/pipeline_obesidade.pkl --porta 8080
+
+Endpoints:
+- ``POST /prever``: body ``{...}`` or ``[{...}, ...]``; answers
+  ``{"previsoes": [...]}``
+- ``GET /saude``: liveness plus batching counters
+
+Only the standard library is used for HTTP (HTTP/1.1 with keep-alive), so the
+service runs anywhere the pipeline itself runs.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from obesity_pipeline import ObesityPipeline
+
+_MOTIVOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class MicroBatcher:
+    """Coalesce records from concurrent callers into batched ``prever`` calls.
+
+    Parameters
+    - pipeline: a fitted/loaded ObesityPipeline
+    - max_lote: flush as soon as this many records are waiting
+    - max_espera_ms: flush at most this long after the first waiting record
+    """
+
+    def __init__(self, pipeline, max_lote=256, max_espera_ms=2.0):
+        if max_lote < 1:
+            raise ValueError('max_lote must be a positive integer')
+        if max_espera_ms < 0:
+            raise ValueError('max_espera_ms must be >= 0')
+        self.pipeline = pipeline
+        self.max_lote = int(max_lote)
+        self.max_espera = max_espera_ms / 1000.0
+        self.lotes = 0
+        self.registros = 0
+        self._fila = None
+        self._tarefa = None
+
+    async def iniciar(self):
+        self._fila = asyncio.Queue()
+        self._tarefa = asyncio.create_task(self._consumir())
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def prever(self, registros):
+        """Queue records and wait for their labels (same order)."""
+        loop = asyncio.get_running_loop()
+        futuros = [loop.create_future() for _ in registros]
+        for registro, futuro in zip(registros, futuros):
+            self._fila.put_nowait((registro, futuro))
+        return await asyncio.gather(*futuros)
+
+    async def _consumir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            itens = [await self._fila.get()]
+            limite = loop.time() + self.max_espera
+            while len(itens) < self.max_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    itens.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            # Drain whatever else is already queued, up to the batch size
+            while len(itens) < self.max_lote and not self._fila.empty():
+                itens.append(self._fila.get_nowait())
+            await self._executar(itens)
+
+    async def _executar(self, itens):
+        registros = [registro for registro, _ in itens]
+        try:
+            # Run the forest off the event loop so accepting requests continues
+            rotulos = await asyncio.to_thread(self.pipeline.prever, registros)
+        except Exception:
+            # One bad record fails the whole batch: score them one at a time so
+            # only the callers of the bad records get the error
+            rotulos = await asyncio.to_thread(self._prever_um_a_um, registros)
+        self.lotes += 1
+        self.registros += len(itens)
+        for (_, futuro), rotulo in zip(itens, rotulos):
+            if futuro.done():
+                continue
+            if isinstance(rotulo, Exception):
+                futuro.set_exception(rotulo)
+            else:
+                futuro.set_result(str(rotulo))
+
+    def _prever_um_a_um(self, registros):
+        resultados = []
+        for registro in registros:
+            try:
+                resultados.append(self.pipeline.prever([registro])[0])
+            except Exception as e:
+                resultados.append(e)
+        return resultados
+
+    def estatisticas(self):
+        return {
+            'lotes': self.lotes,
+            'registros': self.registros,
+            'media_por_lote': self.registros / self.lotes if self.lotes else 0.0,
+            'max_lote': self.max_lote,
+            'max_espera_ms': self.max_espera * 1000.0,
+        }
+
+
+class ScoringServer:
+    """Minimal asyncio HTTP/1.1 server in front of a MicroBatcher."""
+
+    def __init__(self, batcher, host='127.0.0.1', porta=8080, max_corpo=1 << 20):
+        self.batcher = batcher
+        self.host = host
+        self.porta = porta
+        self.max_corpo = max_corpo
+        self._servidor = None
+
+    async def iniciar(self):
+        await self.batcher.iniciar()
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta)
+        # porta=0 picks a free port; expose the real one
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+
+    async def parar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        await self.batcher.parar()
+
+    async def servir(self):
+        await self.iniciar()
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def _atender(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, caminho, _ = linha.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._responder(escritor, 400, {'erro': 'requisicao invalida'}, manter=False)
+                    break
+                cabecalhos = {}
+                while True:
+                    cab = await leitor.readline()
+                    if cab in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = cab.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                try:
+                    tamanho = int(cabecalhos.get('content-length', 0) or 0)
+                except ValueError:
+                    tamanho = -1
+                if tamanho < 0:
+                    await self._responder(escritor, 400, {'erro': 'Content-Length invalido'}, manter=False)
+                    break
+                if tamanho > self.max_corpo:
+                    await self._responder(escritor, 413, {'erro': 'corpo muito grande'}, manter=False)
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b''
+                manter = cabecalhos.get('connection', '').lower() != 'close'
+                status, resposta = await self._rotear(metodo, caminho, corpo)
+                await self._responder(escritor, status, resposta, manter)
+                if not manter:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _rotear(self, metodo, caminho, corpo):
+        if caminho == '/saude':
+            return 200, {'status': 'ok', **self.batcher.estatisticas()}
+        if caminho != '/prever':
+            return 404, {'erro': f'caminho desconhecido: {caminho}'}
+        if metodo != 'POST':
+            return 405, {'erro': 'use POST'}
+        try:
+            dados = json.loads(corpo or b'null')
+        except ValueError:
+            return 400, {'erro': 'JSON invalido'}
+        registros = [dados] if isinstance(dados, dict) else dados
+        if not isinstance(registros, list) or not registros or not all(isinstance(r, dict) for r in registros):
+            return 400, {'erro': 'envie um objeto JSON ou uma lista de objetos'}
+        try:
+            previsoes = await self.batcher.prever(registros)
+        except (ValueError, KeyError) as e:
+            # invalid record content (unknown category, wrong column type...)
+            return 400, {'erro': str(e)}
+        except Exception as e:
+            return 500, {'erro': str(e)}
+        return 200, {'previsoes': previsoes}
+
+    @staticmethod
+    async def _responder(escritor, status, resposta, manter):
+        corpo = json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+        cabecalho = (
+            f'HTTP/1.1 {status} {_MOTIVOS.get(status, "")}\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(corpo)}\r\n'
+            f'Connection: {"keep-alive" if manter else "close"}\r\n\r\n'
+        ).encode('latin-1')
+        escritor.write(cabecalho + corpo)
+        await escritor.drain()
+
+
+def carregar_pipeline(caminho, motor='numpy'):
+    """Load an artifact once for serving (column config comes from the artifact)."""
+    pipeline = ObesityPipeline([], {}, [], [], motor=motor)
+    inicio = time.perf_counter()
+    pipeline.carregar(caminho)
+    print(f'Artefato {caminho} carregado em {time.perf_counter() - inicio:.2f}s')
+    return pipeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor local de previsao com micro-lotes.')
+    parser.add_argument('--artefato', default='pipeline_obesidade.pkl')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--max-lote', type=int, default=256)
+    parser.add_argument('--max-espera-ms', type=float, default=2.0)
+    parser.add_argument('--motor', choices=ObesityPipeline.MOTORES, default='numpy')
+    args = parser.parse_args(argv)
+
+    pipeline = carregar_pipeline(args.artefato, motor=args.motor)
+    servidor = ScoringServer(MicroBatcher(pipeline, args.max_lote, args.max_espera_ms), args.host, args.porta)
+    print(f'Servindo em http://{args.host}:{args.porta} (max_lote={args.max_lote}, max_espera_ms={args.max_espera_ms})')
+    try:
+        asyncio.run(servidor.servir())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,6 @@ This script uses these features:
 - Nominal: MTRANS (transport), FAVC (eats high-calorie foods)
 """
 import os
-import pandas as pd
 from obesity_pipeline import ObesityPipeline
 
 base = os.path.dirname(__file__)
@@ -14,8 +13,6 @@ csv_path = os.path.join(base, 'Obesity.csv')
 if not os.path.exists(csv_path):
     raise FileNotFoundError(f"CSV file not found at {csv_path}")
 
-df = pd.read_csv(csv_path)
-
 # Reduced feature set (updated per request)
 # Ordinal: CAEC (eating between meals), CALC (alcohol consumption)
 # Nominal: FAVC (high-calorie foods), SCC (monitors calories)
@@ -29,7 +26,8 @@ col_nominais = ['FAVC', 'SCC', 'MTRANS', 'family_history']
 col_numericas = ['Age', 'Height', 'Weight', 'FCVC', 'FAF', 'CH2O', 'TUE']
 
 pipeline = ObesityPipeline(col_ordinais, order_ordinais, col_nominais, col_numericas)
-X_test, y_test = pipeline.treinar(df)
+# encoded matrices are reused across runs (see feature_cache)
+X_test, y_test = pipeline.treinar_csv(csv_path)
 
 # Save with a distinct name
 pipeline.salvar('pipeline_subset.pkl')
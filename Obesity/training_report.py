@@ -0,0 +1,291 @@
+"""Per-stage cost report of a training run.
+
+`RelatorioTreino` times named stages of ``ObesityPipeline.treinar`` /
+``treinar_csv``::
+
+    relatorio = RelatorioTreino()
+    with relatorio.medir():
+        with relatorio.etapa('dividir'):
+            ...
+
+Each stage records wall time, CPU time of the whole process (all threads, so
+``cpu_segundos > segundos`` means the stage ran in parallel) and memory: the
+peak during the stage and what the stage left allocated. By default memory
+is the process resident set, sampled by a background thread every
+``INTERVALO_RSS`` seconds (20 ms: negligible CPU, but spikes shorter than
+the interval are missed).
+``medir_memoria='tracemalloc'`` measures Python/NumPy allocations exactly
+instead, at the price of a forest fit several times slower, so its timings
+are not comparable with the default mode; ``medir_memoria=False`` records
+timings only.
+
+`como_dict` adds model statistics (size of the tree arrays, tree depth,
+leaves and nodes) and is plain JSON, so reports of different runs can be stored next
+to their artifacts (``<artefato>.relatorio.json``) and compared.
+"""
+import contextlib
+import datetime
+import json
+import os
+import pickle
+import platform
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+MIB = 2 ** 20
+MODOS_MEMORIA = ('rss', 'tracemalloc')
+INTERVALO_RSS = 0.02
+
+
+class RelatorioTreino:
+    """Stages of one training run, in order, plus data/model statistics.
+
+    ``medir_memoria``: True or 'rss' (default), 'tracemalloc', or False.
+    """
+
+    def __init__(self, medir_memoria=True):
+        if medir_memoria is True:
+            medir_memoria = 'rss'
+        if medir_memoria and medir_memoria not in MODOS_MEMORIA:
+            raise ValueError(f'medir_memoria must be one of {MODOS_MEMORIA} or False, got {medir_memoria!r}')
+        self.medir_memoria = medir_memoria
+        self._memoria = None
+        self.etapas = []
+        self.dados = {}
+        self.modelo = {}
+        self.avaliacao = {}
+        self.total = {}
+        self._quando = None
+
+    @contextlib.contextmanager
+    def medir(self):
+        """Scope of the whole run: total clocks and the memory probe."""
+        if self.medir_memoria == 'tracemalloc':
+            self._memoria = _MemoriaTracemalloc()
+        elif self.medir_memoria == 'rss' and _rss_bytes() is not None:
+            self._memoria = _MemoriaRSS()
+        self._quando = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        parede, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield self
+        finally:
+            self.total = {'segundos': time.perf_counter() - parede, 'cpu_segundos': time.process_time() - cpu}
+            picos = [e['pico_mib'] for e in self.etapas if 'pico_mib' in e]
+            if picos:
+                self.total['pico_mib'] = max(picos)
+            if self._memoria is not None:
+                self._memoria.parar()
+                self._memoria = None
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        """Measure the ``with`` block as stage ``nome``."""
+        memoria = self._memoria
+        if memoria is not None:
+            antes = memoria.reiniciar()
+        parede, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            registro = {'etapa': nome, 'segundos': time.perf_counter() - parede,
+                        'cpu_segundos': time.process_time() - cpu}
+            if memoria is not None:
+                atual, pico = memoria.ler()
+                registro['pico_mib'] = pico / MIB
+                registro['alocado_mib'] = (pico - antes) / MIB
+                registro['retido_mib'] = (atual - antes) / MIB
+            self.etapas.append(registro)
+
+    def como_dict(self):
+        return {
+            'quando': self._quando,
+            'memoria': self.medir_memoria or None,
+            'etapas': self.etapas,
+            'total': {**self.total, 'rss_max_mib': pico_rss_mib()},
+            'dados': self.dados,
+            'modelo': self.modelo,
+            'avaliacao': self.avaliacao,
+            'maquina': {'cpus': os.cpu_count(), 'python': platform.python_version(),
+                        'plataforma': platform.platform()},
+        }
+
+
+class _MemoriaTracemalloc:
+    # traced Python/NumPy allocations; started here unless already running
+    def __init__(self):
+        self._proprio = not tracemalloc.is_tracing()
+        if self._proprio:
+            tracemalloc.start()
+
+    def reiniciar(self):
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def ler(self):
+        return tracemalloc.get_traced_memory()
+
+    def parar(self):
+        if self._proprio:
+            tracemalloc.stop()
+
+
+class _MemoriaRSS:
+    # resident set size polled by a daemon thread; `ler` returns (current, peak since reiniciar)
+    def __init__(self, intervalo=INTERVALO_RSS):
+        self._intervalo = intervalo
+        self._trava = threading.Lock()
+        self._pico = _rss_bytes()
+        self._fim = threading.Event()
+        self._fio = threading.Thread(target=self._amostrar, name='relatorio-rss', daemon=True)
+        self._fio.start()
+
+    def _amostrar(self):
+        while not self._fim.wait(self._intervalo):
+            self._observar()
+
+    def _observar(self):
+        atual = _rss_bytes()
+        with self._trava:
+            self._pico = max(self._pico, atual)
+        return atual
+
+    def reiniciar(self):
+        atual = _rss_bytes()
+        with self._trava:
+            self._pico = atual
+        return atual
+
+    def ler(self):
+        atual = self._observar()
+        return atual, self._pico
+
+    def parar(self):
+        self._fim.set()
+        self._fio.join()
+
+
+def estatisticas_modelo(classificador, serializar=False):
+    """Size and tree-shape statistics of a fitted classifier.
+
+    ``bytes`` is the size of the tree node arrays (read in place, within a
+    few percent of the pickled size); ``bytes_exatos`` says whether it is
+    the pickled size instead, which is measured when ``serializar=True`` or
+    the model has no tree arrays. Pickling copies the whole model, so it is
+    not done on every training run.
+    """
+    arvores = [e.tree_ for e in getattr(classificador, 'estimators_', ()) if hasattr(e, 'tree_')]
+    tamanho = None if serializar else _bytes_arvores(classificador, arvores)
+    estatisticas = {
+        'tipo': type(classificador).__name__,
+        'bytes': tamanho if tamanho is not None else
+        len(pickle.dumps(classificador, protocol=pickle.HIGHEST_PROTOCOL)),
+        'bytes_exatos': tamanho is None,
+    }
+    if arvores:
+        estatisticas['n_arvores'] = len(arvores)
+        estatisticas['nos'] = int(sum(a.node_count for a in arvores))
+        estatisticas['profundidade'] = _distribuicao([a.max_depth for a in arvores])
+        estatisticas['folhas'] = _distribuicao([a.n_leaves for a in arvores])
+    elif hasattr(classificador, 'n_iter_'):
+        # an int for boosting, one per class/fold for linear models
+        estatisticas['n_iteracoes'] = int(np.max(classificador.n_iter_))
+    return estatisticas
+
+
+def avaliar(y_verdadeiro, y_previsto):
+    """Held-out metrics of a run: accuracy, macro F1 and the per-class report."""
+    from sklearn.metrics import accuracy_score, classification_report, f1_score
+
+    return {
+        'acuracia': float(accuracy_score(y_verdadeiro, y_previsto)),
+        'f1_macro': float(f1_score(y_verdadeiro, y_previsto, average='macro', zero_division=0)),
+        'por_classe': classification_report(y_verdadeiro, y_previsto, zero_division=0, output_dict=True),
+    }
+
+
+def caminho_relatorio(caminho_artefato):
+    """``pipeline.pkl`` -> ``pipeline.relatorio.json`` (directories: ``<dir>.relatorio.json``)."""
+    base = caminho_artefato.rstrip(os.sep)
+    if not os.path.isdir(base):
+        base = os.path.splitext(base)[0]
+    return base + '.relatorio.json'
+
+
+def salvar_relatorio(relatorio, caminho):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2, default=str)
+
+
+def ler_relatorio(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def formatar(relatorio):
+    """Text table of a ``como_dict`` report."""
+    linhas = [f"{'etapa':<22} {'s':>8} {'cpu s':>8} {'pico MiB':>9} {'retido MiB':>11}"]
+    for e in relatorio['etapas'] + [{'etapa': 'total', **relatorio['total']}]:
+        linhas.append(f"{e['etapa']:<22} {e['segundos']:8.3f} {e['cpu_segundos']:8.3f} "
+                      f"{e.get('pico_mib', float('nan')):9.1f} {e.get('retido_mib', float('nan')):11.1f}")
+    modelo = relatorio['modelo']
+    if modelo:
+        linha = f"modelo {modelo['tipo']}: {modelo['bytes'] / MIB:.2f} MiB"
+        if 'profundidade' in modelo:
+            p = modelo['profundidade']
+            linha += (f", {modelo['n_arvores']} arvores, {modelo['nos']} nos, "
+                      f"profundidade {p['min']}-{p['max']} (media {p['media']:.1f})")
+        elif 'n_iteracoes' in modelo:
+            linha += f", {modelo['n_iteracoes']} iteracoes"
+        linhas.append(linha)
+    return '\n'.join(linhas)
+
+
+def _bytes_arvores(classificador, arvores):
+    # node/value arrays of sklearn trees, or the predictors of a fitted
+    # HistGradientBoosting model; None for anything else
+    if arvores:
+        return int(sum(v.nbytes for a in arvores for v in a.__getstate__().values() if isinstance(v, np.ndarray)))
+    preditores = getattr(classificador, '_predictors', None)
+    if preditores:
+        return int(sum(v.nbytes for iteracao in preditores for p in iteracao
+                       for v in vars(p).values() if isinstance(v, np.ndarray)))
+    return None
+
+
+def _distribuicao(valores):
+    valores = np.asarray(valores)
+    return {'min': int(valores.min()), 'media': float(valores.mean()), 'p50': float(np.median(valores)),
+            'max': int(valores.max())}
+
+
+def _rss_bytes():
+    # current resident set size, or None where it cannot be read
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def pico_rss_mib():
+    """Lifetime peak resident set of the process in MiB (None where unavailable, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return pico / MIB if platform.system() == 'Darwin' else pico / 1024
+
+
+__all__ = ["RelatorioTreino", "avaliar", "caminho_relatorio", "estatisticas_modelo", "formatar", "ler_relatorio",
+           "pico_rss_mib", "salvar_relatorio"]
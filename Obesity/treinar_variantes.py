@@ -0,0 +1,204 @@
+"""Train several pipeline variants declared in a TOML file from one data load.
+
+Each ``[[variantes]]`` entry of the file (see variantes.toml) is a column
+subset and/or model/encoder setting of ObesityPipeline (``modelo`` with
+``parametros_floresta`` or ``parametros_hgb``). The CSV is read and
+parsed once in the parent process and handed to worker processes when the
+pool starts; the variants are then trained concurrently, each one saving its
+artifacts plus ``<nome>.metricas.json`` (test metrics and timings). A
+summary of all variants is written to ``variantes_resumo.json``.
+
+    python Obesity/treinar_variantes.py Obesity/variantes.toml --workers 4
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+from artifact_store import tamanho_artefato
+from obesity_pipeline import ObesityPipeline
+
+CHAVES_COLUNAS = ('col_ordinais', 'ordem_ordinais', 'col_nominais', 'col_numericas')
+CHAVES_VARIANTE = ('nome', 'formatos', 'modelo', 'parametros_floresta', 'parametros_hgb', 'parametros_encoders',
+                   *CHAVES_COLUNAS)
+FORMATOS = {'joblib': '.pkl', 'pickle': '_pickle.pkl', 'mmap': '_mmap'}
+RESUMO = 'variantes_resumo.json'
+
+# Parsed CSV, installed in each worker by _inicializar
+_DF = None
+
+
+def _inicializar(df):
+    global _DF
+    _DF = df
+
+
+def ler_config(caminho):
+    """Parse the TOML file into ``(geral, [variante, ...])`` with paths resolved.
+
+    Every variant comes back complete: shared ``[colunas]`` merged under its
+    own keys, plus ``formatos``, ``modelo``, ``parametros_floresta``,
+    ``parametros_hgb`` and ``parametros_encoders``. Keys outside
+    CHAVES_VARIANTE raise ValueError.
+    """
+    with open(caminho, 'rb') as f:
+        config = tomllib.load(f)
+    base = os.path.dirname(os.path.abspath(caminho))
+    geral = {'target': 'Obesity', 'test_size': 0.3, 'random_state': 4242, 'saida': '.', 'formatos': ['joblib'],
+             **config.get('geral', {})}
+    if 'csv' not in geral:
+        raise ValueError(f'{caminho}: [geral] must set csv')
+    geral['csv'] = os.path.join(base, geral['csv'])
+    geral['saida'] = os.path.join(base, geral['saida'])
+
+    variantes = []
+    for indice, entrada in enumerate(config.get('variantes', [])):
+        variante = {**config.get('colunas', {}), 'formatos': geral['formatos'],
+                    'modelo': 'floresta', 'parametros_floresta': {}, 'parametros_hgb': {},
+                    'parametros_encoders': {}, **entrada}
+        if 'nome' not in variante:
+            raise ValueError(f'{caminho}: variant #{indice} has no nome')
+        desconhecidas = set(variante) - set(CHAVES_VARIANTE)
+        if desconhecidas:
+            raise ValueError(f"{caminho}: variant {variante['nome']!r} has unknown keys {sorted(desconhecidas)}")
+        if variante['modelo'] not in ObesityPipeline.MODELOS:
+            raise ValueError(f"{caminho}: variant {variante['nome']!r} has modelo {variante['modelo']!r}, "
+                             f"expected one of {ObesityPipeline.MODELOS}")
+        if variante['modelo'] != 'floresta' and 'mmap' in variante['formatos']:
+            raise ValueError(f"{caminho}: variant {variante['nome']!r}: formato 'mmap' stores a random forest")
+        faltando = [c for c in CHAVES_COLUNAS if c not in variante]
+        if faltando:
+            raise ValueError(f"{caminho}: variant {variante['nome']!r} is missing {faltando}")
+        invalidos = set(variante['formatos']) - set(FORMATOS)
+        if invalidos:
+            raise ValueError(f"{caminho}: variant {variante['nome']!r} has unknown formatos {sorted(invalidos)}")
+        variantes.append(variante)
+    nomes = [v['nome'] for v in variantes]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError(f'{caminho}: variant names must be unique')
+    return geral, variantes
+
+
+def _treinar(tarefa):
+    """Train, evaluate and save one variant; returns its metrics dict."""
+    variante, geral = tarefa
+    inicio = time.perf_counter()
+    pipeline = ObesityPipeline(variante['col_ordinais'], variante['ordem_ordinais'], variante['col_nominais'],
+                               variante['col_numericas'], target=geral['target'], modelo=variante['modelo'],
+                               # one variant per worker: keep each forest single-threaded
+                               parametros_floresta={'n_jobs': 1, **variante['parametros_floresta']},
+                               parametros_hgb=variante['parametros_hgb'],
+                               parametros_encoders=variante['parametros_encoders'])
+    colunas = pipeline.col_ordinais + pipeline.col_nominais + pipeline.col_numericas + [geral['target']]
+    X_test, y_test = pipeline.treinar(_DF[colunas], test_size=geral['test_size'],
+                                      random_state=geral['random_state'], verbose=False)
+    # treinar already predicted X_test; its report has the metrics and the evaluation time
+    relatorio = pipeline.relatorio_treino
+    avaliacao = sum(e['segundos'] for e in relatorio['etapas'] if e['etapa'] == 'avaliar')
+    treino = time.perf_counter()
+
+    artefatos = {}
+    for formato in variante['formatos']:
+        caminho = os.path.join(geral['saida'], variante['nome'] + FORMATOS[formato])
+        if formato == 'pickle':
+            pipeline.salvar_pickle(caminho)
+        else:
+            pipeline.salvar(caminho, formato=formato)
+        artefatos[formato] = {'caminho': caminho, 'bytes': tamanho_artefato(caminho)}
+    fim = time.perf_counter()
+
+    metricas = {
+        'nome': variante['nome'],
+        'colunas': {c: variante[c] for c in CHAVES_COLUNAS},
+        'modelo': variante['modelo'],
+        'parametros_floresta': variante['parametros_floresta'],
+        'parametros_hgb': variante['parametros_hgb'],
+        'parametros_encoders': variante['parametros_encoders'],
+        'linhas_teste': int(len(y_test)),
+        'acuracia': relatorio['avaliacao']['acuracia'],
+        'f1_macro': relatorio['avaliacao']['f1_macro'],
+        'relatorio': relatorio['avaliacao']['por_classe'],
+        'artefatos': artefatos,
+        'segundos': {'treino': treino - inicio - avaliacao, 'avaliacao': avaliacao, 'salvar': fim - treino,
+                     'total': fim - inicio},
+        'relatorio_treino': relatorio,
+        'pid': os.getpid(),
+    }
+    with open(os.path.join(geral['saida'], f"{variante['nome']}.metricas.json"), 'w', encoding='utf-8') as f:
+        json.dump(metricas, f, ensure_ascii=False, indent=2)
+    return metricas
+
+
+def treinar_variantes(caminho_config, workers=None, somente=None, verbose=True):
+    """Train the variants of ``caminho_config`` (optionally only the names in ``somente``).
+
+    Returns the summary also written to ``variantes_resumo.json``:
+    ``{'csv', 'linhas', 'workers', 'segundos_leitura', 'segundos_total', 'variantes'}``; the full
+    per-variant metrics are in each ``<nome>.metricas.json``.
+    """
+    inicio = time.perf_counter()
+    geral, variantes = ler_config(caminho_config)
+    if somente:
+        desconhecidas = set(somente) - {v['nome'] for v in variantes}
+        if desconhecidas:
+            raise ValueError(f'unknown variants: {sorted(desconhecidas)}')
+        variantes = [v for v in variantes if v['nome'] in somente]
+    os.makedirs(geral['saida'], exist_ok=True)
+
+    df = pd.read_csv(geral['csv'])
+    leitura = time.perf_counter() - inicio
+    tarefas = [(v, geral) for v in variantes]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tarefas)))
+    if workers == 1:
+        _inicializar(df)
+        try:
+            resultados = [_treinar(t) for t in tarefas]
+        finally:
+            _inicializar(None)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar, initargs=(df,)) as pool:
+            resultados = list(pool.map(_treinar, tarefas))
+
+    resumo = {
+        'csv': geral['csv'],
+        'linhas': int(len(df)),
+        'workers': workers,
+        'segundos_leitura': leitura,
+        'segundos_total': time.perf_counter() - inicio,
+        'variantes': [{k: m[k] for k in ('nome', 'acuracia', 'f1_macro', 'artefatos', 'segundos')}
+                      for m in resultados],
+    }
+    with open(os.path.join(geral['saida'], RESUMO), 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+    if verbose:
+        for m in resultados:
+            print(f"{m['nome']:<24} acuracia {m['acuracia']:.4f}  f1 {m['f1_macro']:.4f}  "
+                  f"{m['segundos']['total']:.2f}s")
+        print(f"{len(resultados)} variantes em {resumo['segundos_total']:.2f}s "
+              f"(leitura do CSV {leitura:.2f}s, {workers} workers)")
+    return resumo
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Train the pipeline variants declared in a TOML file.')
+    parser.add_argument('config', nargs='?', default=os.path.join(os.path.dirname(__file__), 'variantes.toml'))
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--somente', nargs='+', default=None, metavar='NOME', help='train only these variants')
+    args = parser.parse_args(argv)
+    treinar_variantes(args.config, workers=args.workers, somente=args.somente)
+
+
+__all__ = ["ler_config", "treinar_variantes"]
+
+
+if __name__ == '__main__':
+    main()